@@ -6,7 +6,8 @@ REST API endpoints for focus tracking, productivity monitoring, and pomodoro tim
 Integrates with React frontend useGameStore and focus components.
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from datetime import datetime, date
 from typing import List, Optional, Dict, Any
@@ -14,11 +15,19 @@ import logging
 
 from services.focus_guardian.tracker import tracker
 from services.focus_guardian.pomodoro import pomodoro
+from services.focus_guardian.range_analytics import MAX_RANGE_DAYS, month_bounds, week_bounds
+from services.export import (
+    COLUMNAR_FORMATS, EXPORT_FORMATS, EXPORT_TABLES, HAS_PYARROW, MEDIA_TYPES,
+    ExportError, export_chunks, export_filename, validate_export
+)
+from models.database import async_db
 from config.settings import settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+MAX_PAGE_SIZE = 1000  # pages are built in memory; larger reads go through stream=true
+
 # Pydantic models for API requests/responses
 class FocusSession(BaseModel):
     """Current focus session data."""
@@ -26,6 +35,8 @@ class FocusSession(BaseModel):
     window_title: Optional[str] = None
     elapsed_seconds: int = 0
     is_monitoring: bool = False
+    is_idle: bool = False
+    idle_seconds: int = 0
     productivity_score: float = 0.0
 
 class PomodoroState(BaseModel):
@@ -55,6 +66,23 @@ class FocusAnalytics(BaseModel):
     distraction_count: int
     flow_sessions: int
 
+class RangeAnalytics(BaseModel):
+    """Focus analytics over several days, served from hourly buckets."""
+    start_date: str
+    end_date: str
+    days: int
+    total_focused_time: int
+    productive_time: int
+    idle_time: int
+    productivity_percentage: float
+    productivity_score: float
+    session_count: int
+    top_apps: List[Dict[str, Any]]
+    tag_breakdown: List[Dict[str, Any]]
+    daily_breakdown: List[Dict[str, Any]]
+    hourly_breakdown: List[int]
+    buckets_scanned: int
+
 # ===== FOCUS TRACKING ENDPOINTS =====
 
 @router.get("/status", response_model=FocusSession)
@@ -120,24 +148,70 @@ async def reset_focus_session():
 
 # ===== ACTIVITY LOGS ENDPOINTS =====
 
+def _parse_date(date_filter: Optional[str]) -> date:
+    try:
+        return date.fromisoformat(date_filter) if date_filter else date.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+def _log_item(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Tracker log dict -> ActivityLog fields."""
+    return {
+        "app": log.get("app_name") or "Unknown",
+        "title": log.get("window_title") or "",
+        "start_time": log.get("start_time"),
+        "end_time": log.get("end_time"),
+        "duration_seconds": log.get("duration_seconds", 0),
+        "tag": log.get("tag") or "Untagged",
+        "productivity_score": log.get("productivity_score")
+    }
+
+def _timeline_item(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Tracker log dict -> timeline entry."""
+    return {
+        "timestamp": log.get("start_time"),
+        "app_name": log.get("app_name"),
+        "window_title": log.get("window_title"),
+        "duration_seconds": log.get("duration_seconds"),
+        "productivity_score": log.get("productivity_score", 0),
+        "tag": log.get("tag", "Untagged"),
+        "end_time": log.get("end_time")
+    }
+
+def _ndjson_response(target_date: date, cursor: Optional[str], formatter) -> StreamingResponse:
+    try:
+        chunks = tracker.stream_activity_logs(target_date, cursor, formatter)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return StreamingResponse(chunks, media_type="application/x-ndjson")
+
 @router.get("/logs", response_model=List[ActivityLog])
 async def get_activity_logs(
+    response: Response,
     date_filter: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
-    limit: int = Query(100, description="Maximum number of logs to return")
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of logs per page (use stream for more)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    stream: bool = Query(False, description="Stream every remaining log as NDJSON (limit is ignored)")
 ):
     """
-    Get activity logs for analysis and timeline display.
+    Get activity logs for analysis and timeline display, newest first.
     Used by React frontend for productivity analytics.
+    Pages are keyset-paginated; the next page's cursor is returned in the
+    X-Next-Cursor header (absent on the last page).
     """
+    target_date = _parse_date(date_filter)
+    if stream:
+        return _ndjson_response(target_date, cursor, _log_item)
     try:
-        target_date = date.fromisoformat(date_filter) if date_filter else date.today()
-        logs = await tracker.get_activity_logs(target_date, limit)
-        return [ActivityLog(**log) for log in logs]
+        logs, next_cursor = await tracker.get_activity_log_page(target_date, limit, cursor)
     except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error getting activity logs: {e}")
         raise HTTPException(status_code=500, detail="Failed to get activity logs")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [ActivityLog(**_log_item(log)) for log in logs]
 
 @router.get("/analytics", response_model=FocusAnalytics)
 async def get_focus_analytics(
@@ -157,6 +231,58 @@ async def get_focus_analytics(
         logger.error(f"Error getting focus analytics: {e}")
         raise HTTPException(status_code=500, detail="Failed to get analytics")
 
+async def _range_analytics(start_date: date, end_date: date) -> RangeAnalytics:
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days")
+    try:
+        return RangeAnalytics(**await tracker.get_range_analytics(start_date, end_date))
+    except Exception as e:
+        logger.error(f"Error getting range analytics: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get analytics")
+
+@router.get("/analytics/week", response_model=RangeAnalytics)
+async def get_weekly_analytics(
+    date_filter: Optional[str] = Query(None, description="Any date in the week, YYYY-MM-DD")
+):
+    """
+    Get focus analytics for the Monday-Sunday week containing a date.
+    """
+    try:
+        target_date = date.fromisoformat(date_filter) if date_filter else date.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    return await _range_analytics(*week_bounds(target_date))
+
+@router.get("/analytics/month", response_model=RangeAnalytics)
+async def get_monthly_analytics(
+    month: Optional[str] = Query(None, description="Month in YYYY-MM format")
+):
+    """
+    Get focus analytics for a calendar month.
+    """
+    try:
+        year, month_number = (int(part) for part in month.split("-")) if month else (date.today().year, date.today().month)
+        bounds = month_bounds(year, month_number)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid month format. Use YYYY-MM")
+    return await _range_analytics(*bounds)
+
+@router.get("/analytics/range", response_model=RangeAnalytics)
+async def get_range_analytics(
+    start_date: str = Query(..., description="First date in YYYY-MM-DD format"),
+    end_date: str = Query(..., description="Last date (inclusive) in YYYY-MM-DD format")
+):
+    """
+    Get focus analytics for an arbitrary inclusive date range.
+    """
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    return await _range_analytics(start, end)
+
 @router.get("/activity/live")
 async def get_live_activity():
     """
@@ -170,6 +296,9 @@ async def get_live_activity():
             "elapsed_seconds": status.get("elapsed_seconds", 0),
             "productivity_score": status.get("productivity_score", 0),
             "is_monitoring": status.get("is_monitoring", False),
+            "is_idle": status.get("is_idle", False),
+            "idle_seconds": status.get("idle_seconds", 0),
+            "today": await tracker.get_today_summary(),
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
@@ -178,41 +307,37 @@ async def get_live_activity():
 
 @router.get("/activity/timeline")
 async def get_activity_timeline(
+    response: Response,
     date_filter: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
-    hours: int = Query(24, description="Number of hours to look back")
+    hours: int = Query(24, description="Number of hours to look back"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of entries per page (use stream for more)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: bool = Query(False, description="Stream every remaining entry as NDJSON (limit is ignored)")
 ):
     """
     Get detailed activity timeline showing app switches, time spent, and productivity.
+    Keyset-paginated: next_cursor (also in X-Next-Cursor) fetches the next page.
     """
+    target_date = _parse_date(date_filter)
+    if stream:
+        return _ndjson_response(target_date, cursor, _timeline_item)
     try:
-        target_date = date.fromisoformat(date_filter) if date_filter else date.today()
-        
-        # Get activity logs
-        logs = await tracker.get_activity_logs(target_date, limit=1000)
-        
-        # Format timeline data
-        timeline = []
-        for log in logs:
-            timeline.append({
-                "timestamp": log.get("start_time"),
-                "app_name": log.get("app_name"),
-                "window_title": log.get("window_title"),
-                "duration_seconds": log.get("duration_seconds"),
-                "productivity_score": log.get("productivity_score", 0),
-                "tag": log.get("tag", "Untagged"),
-                "end_time": log.get("end_time")
-            })
-        
-        return {
-            "date": target_date.isoformat(),
-            "total_entries": len(timeline),
-            "timeline": timeline
-        }
+        logs, next_cursor = await tracker.get_activity_log_page(target_date, limit, cursor)
     except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error getting activity timeline: {e}")
         raise HTTPException(status_code=500, detail="Failed to get activity timeline")
+    
+    timeline = [_timeline_item(log) for log in logs]
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return {
+        "date": target_date.isoformat(),
+        "total_entries": len(timeline),
+        "timeline": timeline,
+        "next_cursor": next_cursor
+    }
 
 @router.get("/activity/apps")
 async def get_app_usage_stats(
@@ -223,55 +348,7 @@ async def get_app_usage_stats(
     """
     try:
         target_date = date.fromisoformat(date_filter) if date_filter else date.today()
-        logs = await tracker.get_activity_logs(target_date, limit=1000)
-        
-        # Aggregate app usage
-        app_stats = {}
-        total_time = 0
-        
-        for log in logs:
-            app_name = log.get("app_name", "Unknown")
-            duration = log.get("duration_seconds", 0)
-            productivity = log.get("productivity_score", 0)
-            
-            if app_name not in app_stats:
-                app_stats[app_name] = {
-                    "app_name": app_name,
-                    "total_time": 0,
-                    "session_count": 0,
-                    "productivity_avg": 0,
-                    "productivity_scores": []
-                }
-            
-            app_stats[app_name]["total_time"] += duration
-            app_stats[app_name]["session_count"] += 1
-            app_stats[app_name]["productivity_scores"].append(productivity)
-            total_time += duration
-        
-        # Calculate averages and percentages
-        app_list = []
-        for app_name, stats in app_stats.items():
-            avg_productivity = sum(stats["productivity_scores"]) / len(stats["productivity_scores"]) if stats["productivity_scores"] else 0
-            percentage = (stats["total_time"] / total_time * 100) if total_time > 0 else 0
-            
-            app_list.append({
-                "app_name": app_name,
-                "total_time": stats["total_time"],
-                "session_count": stats["session_count"],
-                "productivity_avg": round(avg_productivity, 2),
-                "time_percentage": round(percentage, 2),
-                "minutes": round(stats["total_time"] / 60, 1)
-            })
-        
-        # Sort by time spent
-        app_list.sort(key=lambda x: x["total_time"], reverse=True)
-        
-        return {
-            "date": target_date.isoformat(),
-            "total_time": total_time,
-            "total_apps": len(app_list),
-            "apps": app_list
-        }
+        return await tracker.get_app_usage(target_date)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     except Exception as e:
@@ -381,4 +458,39 @@ async def update_pomodoro_config(
             raise HTTPException(status_code=400, detail="Failed to update configuration")
     except Exception as e:
         logger.error(f"Error updating pomodoro config: {e}")
-        raise HTTPException(status_code=500, detail="Failed to update configuration")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to update configuration")
+
+# ===== EXPORT ENDPOINTS =====
+
+@router.get("/export")
+async def export_history(
+    table: str = Query("activity_logs", description=f"One of: {', '.join(EXPORT_TABLES)}"),
+    fmt: str = Query("csv", alias="format", description=f"One of: {', '.join(EXPORT_FORMATS)}"),
+    start_date: Optional[str] = Query(None, description="First date in YYYY-MM-DD format"),
+    end_date: Optional[str] = Query(None, description="Last date (inclusive) in YYYY-MM-DD format"),
+    user_id: Optional[str] = Query(None, description="Defaults to the tracked user")
+):
+    """
+    Stream a table's full history as CSV, Parquet or Arrow IPC.
+    Rows are read and encoded in chunks, so exports of any size run in
+    constant memory. Parquet and Arrow require pyarrow on the server.
+    """
+    try:
+        start = date.fromisoformat(start_date) if start_date else None
+        end = date.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end date is before start date")
+    try:
+        validate_export(table, fmt)
+    except ExportError as e:
+        missing_pyarrow = fmt in COLUMNAR_FORMATS and not HAS_PYARROW
+        raise HTTPException(status_code=501 if missing_pyarrow else 400, detail=str(e))
+
+    chunks = export_chunks(table, fmt, user_id or tracker.current_user_id, start, end)
+    return StreamingResponse(
+        async_db.stream(chunks),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(table, fmt, start, end)}"'}
+    )
@@ -74,24 +74,57 @@ async def detailed_health_check():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
+@router.get("/health/database")
+async def database_health():
+    """
+    Health check for the database layer.
+    Reports DB executor load, SQLite journal mode, WAL size, checkpoints and
+    the last retention pass.
+    """
+    from models.database import async_db
+    from models.storage import checkpointer
+    from services.retention import retention_manager
+    
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "database": settings.database_url.split('/')[-1],
+        "executor": async_db.stats(),
+        "storage": checkpointer.stats(),
+        "retention": retention_manager.stats()
+    }
+
 @router.get("/health/focus")
 async def focus_service_health():
     """
     Health check specifically for the focus tracking service.
     """
     try:
-        from services.focus_guardian import tracker
+        from services.focus_guardian.tracker import tracker
         
         # Check if focus service is running
         is_running = await tracker.is_running()
+        outbox = tracker.get_outbox_stats()
+        status = "healthy" if is_running else "stopped"
+        if outbox["oldest_pending_age_seconds"] > settings.outbox_alert_seconds:
+            # Sessions have been stuck outside the database for too long
+            status = "degraded"
         
         return {
-            "status": "healthy" if is_running else "stopped",
+            "status": status,
             "timestamp": datetime.utcnow().isoformat(),
             "focus_service": {
                 "running": is_running,
                 "update_interval": settings.focus_update_interval,
+                "sampling": tracker.get_sampling_stats(),
                 "log_directory": settings.focus_log_dir,
+                "classification_cache": tracker.get_classification_stats(),
+                "session_coalescing": tracker.get_coalescing_stats(),
+                "write_behind": tracker.get_write_stats(),
+                "daily_rollups": tracker.get_rollup_stats(),
+                "day_cache": tracker.get_day_cache_stats(),
+                "fallback_log": tracker.get_fallback_log_stats(),
+                "outbox": outbox,
                 "platform_support": {
                     "windows": platform.system() == "Windows",
                     "cross_platform": settings.cross_platform_support
@@ -11,7 +11,7 @@ import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import Set
+from typing import Optional, Set
 
 from services.focus_guardian.tracker import tracker
 from services.focus_guardian.pomodoro import pomodoro
@@ -186,9 +186,20 @@ async def handle_websocket_command(message: dict, websocket: WebSocket):
             "message": f"Command failed: {str(e)}"
         }, websocket)
 
+# Set by idle and pomodoro events so the broadcast loop does not sleep through them
+_broadcast_wakeup: Optional[asyncio.Event] = None
+
+def broadcast_interval() -> float:
+    """Seconds between status broadcasts: slower only while the user is idle and no timer is counting down."""
+    if tracker.is_idle and not pomodoro.is_running:
+        return settings.focus_idle_backoff_max
+    return settings.focus_update_interval
+
 # Background task to broadcast real-time updates
 async def broadcast_updates():
     """Background task to send real-time updates to all connected clients."""
+    global _broadcast_wakeup
+    _broadcast_wakeup = asyncio.Event()
     while True:
         try:
             if manager.active_connections:
@@ -204,8 +215,12 @@ async def broadcast_updates():
                     "pomodoro": pomodoro_status
                 })
             
-            # Wait before next update
-            await asyncio.sleep(settings.focus_update_interval)
+            # Wait before next update, or less if the user comes back or a timer starts
+            try:
+                await asyncio.wait_for(_broadcast_wakeup.wait(), timeout=broadcast_interval())
+            except asyncio.TimeoutError:
+                pass
+            _broadcast_wakeup.clear()
             
         except Exception as e:
             logger.error(f"Error in broadcast updates: {e}")
@@ -236,6 +251,10 @@ async def stop_background_updates():
 # Event-based update system (replaces direct function calls)
 async def on_websocket_event(event: Event):
     """Handle events that should be broadcast to WebSocket clients."""
+    if _broadcast_wakeup is not None and event.type in (
+        EventTypes.FOCUS_IDLE_CHANGED, EventTypes.POMODORO_STARTED, EventTypes.POMODORO_PHASE_CHANGED
+    ):
+        _broadcast_wakeup.set()
     try:
         if event.type == EventTypes.FOCUS_STATUS_CHANGED:
             await manager.broadcast({
@@ -244,6 +263,13 @@ async def on_websocket_event(event: Event):
                 "data": event.data
             })
         
+        elif event.type == EventTypes.FOCUS_IDLE_CHANGED:
+            await manager.broadcast({
+                "type": "idle_changed",
+                "timestamp": event.timestamp.isoformat(),
+                "data": event.data
+            })
+        
         elif event.type == EventTypes.WINDOW_CHANGED:
             await manager.broadcast({
                 "type": "window_changed",
@@ -277,6 +303,7 @@ async def on_websocket_event(event: Event):
 def setup_websocket_listeners():
     """Set up event listeners for WebSocket broadcasts."""
     event_bus.subscribe_async(EventTypes.FOCUS_STATUS_CHANGED, on_websocket_event)
+    event_bus.subscribe_async(EventTypes.FOCUS_IDLE_CHANGED, on_websocket_event)
     event_bus.subscribe_async(EventTypes.WINDOW_CHANGED, on_websocket_event)
     event_bus.subscribe_async(EventTypes.ACTIVITY_LOGGED, on_websocket_event)
     event_bus.subscribe_async(EventTypes.POMODORO_STARTED, on_websocket_event)
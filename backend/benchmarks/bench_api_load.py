@@ -0,0 +1,123 @@
+# =============================================================================
+# bench_api_load.py - Status Latency Under Concurrent Analytics Load
+# =============================================================================
+"""
+Measures /api/focus/status latency and event-loop lag (the jitter WebSocket
+frames see) while large activity-log queries run concurrently.
+
+Usage (from backend/):
+    python -m benchmarks.bench_api_load --rows 50000 --heavy-rows 20000
+
+Seeds a throwaway SQLite database with one day of activity, then drives the
+app in-process through httpx. The --inline flag runs database calls directly
+on the event loop, reproducing the blocking behaviour before the DB executor.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+_BENCH_DIR = tempfile.mkdtemp(prefix="bench-api-load-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_BENCH_DIR}/bench.db"
+os.environ["FOCUS_LOG_DIR"] = os.path.join(_BENCH_DIR, "focus_logs")
+
+import httpx  # noqa: E402
+
+from main import app  # noqa: E402
+from models.database import Base, async_db, db_manager, engine  # noqa: E402
+from services.focus_guardian.tracker import tracker  # noqa: E402
+
+def seed(rows: int):
+    start_of_day = datetime.combine(date.today(), datetime.min.time())
+    step = 86000 / rows
+    records = []
+    for i in range(rows):
+        start = start_of_day + timedelta(seconds=i * step)
+        records.append({
+            "user_id": tracker.current_user_id,
+            "app_name": f"app-{i % 23}",
+            "window_title": f"Window {i % 311}",
+            "start_time": start,
+            "end_time": start + timedelta(seconds=step),
+            "duration_seconds": step,
+            "tag": "📝 General",
+            "productivity_score": 0.5
+        })
+    for offset in range(0, rows, 5000):
+        db_manager.bulk_create_activity_logs(records[offset:offset + 5000])
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+async def run_load(duration: float, heavy_workers: int, heavy_rows: int):
+    status_latencies = []
+    loop_lag = []
+    heavy_queries = 0
+    stop_at = time.perf_counter() + duration
+
+    async def status_client(client):
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            response = await client.get("/api/focus/status")
+            response.raise_for_status()
+            status_latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.02)
+
+    async def heavy_client():
+        nonlocal heavy_queries
+        while time.perf_counter() < stop_at:
+            await tracker.get_activity_logs(date.today(), limit=heavy_rows)
+            heavy_queries += 1
+
+    async def ticker():
+        # A 10 ms periodic task stands in for the WebSocket broadcast loop
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            loop_lag.append((time.perf_counter() - started - 0.01) * 1000)
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        await asyncio.gather(
+            status_client(client),
+            ticker(),
+            *(heavy_client() for _ in range(heavy_workers))
+        )
+
+    return status_latencies, loop_lag, heavy_queries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--heavy-rows", type=int, default=20000)
+    parser.add_argument("--heavy-workers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--inline", action="store_true", help="run DB calls on the event loop (old behaviour)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    seed(args.rows)
+
+    if args.inline:
+        async def run_inline(func, *call_args, **kwargs):
+            return func(*call_args, **kwargs)
+        async_db.read = async_db.write = run_inline
+
+    mode = "inline" if args.inline else "DB executor"
+    print(f"API load benchmark ({mode}, {args.rows} rows, {args.heavy_workers} x {args.heavy_rows}-row queries)")
+
+    for label, workers in (("idle", 0), ("loaded", args.heavy_workers)):
+        latencies, lag, heavy = asyncio.run(run_load(args.duration, workers, args.heavy_rows))
+        print(
+            f"  {label:<6}: status p50 {statistics.median(latencies):7.2f} ms, "
+            f"p99 {percentile(latencies, 0.99):7.2f} ms | "
+            f"loop lag p99 {percentile(lag, 0.99):7.2f} ms | heavy queries {heavy}"
+        )
+    async_db.shutdown()
+
+if __name__ == "__main__":
+    main()
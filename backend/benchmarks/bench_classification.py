@@ -0,0 +1,315 @@
+# =============================================================================
+# bench_classification.py - Activity Classification Throughput Benchmark
+# =============================================================================
+"""
+Compares the legacy per-call keyword chains with the compiled rule engine.
+
+Usage (from backend/):
+    python -m benchmarks.bench_classification --titles 20000 --rounds 5
+
+Both implementations process the same synthetic (app, title) corpus: enhance
+the raw title, then tag and score the enhanced one. Outputs are checked for
+equality before timing; the legacy clock suffix is canonicalised away first.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+from services.focus_guardian.analyzer import analyzer
+from services.focus_guardian.sessions import canonicalize
+
+APPS = [
+    "code", "Code.exe", "cursor", "firefox", "chrome.exe", "gnome-terminal", "cmd.exe",
+    "slack", "discord", "gedit", "notepad++.exe", "vim", "spotify", "zoom", "powershell.exe"
+]
+TITLE_PARTS = [
+    "main.py - control-station - Visual Studio Code", "tracker.py - backend - Cursor",
+    "Never Gonna Give You Up - YouTube", "Home | Facebook", "Elon's post / X", "Feed | LinkedIn",
+    "python - How do I merge dicts? - Stack Overflow", "FastAPI documentation", "BBC News - Home",
+    "Amazon.com: Books", "user@host: ~/repo (git status)", "npm run dev", "docker compose up",
+    "README.md", "meeting notes", "todo list", "Netflix", "r/programming - reddit",
+    "Untitled Document 1", "Inbox (3) - mail", "Spotify Premium", "Python tutorial for beginners",
+]
+
+class LegacyClassifier:
+    """Verbatim copy of the pre-rule-engine tracker helpers."""
+
+    def _enhance_content_detection(self, app_name: str, title: str, process=None) -> str:
+        """Enhance content detection with detailed analysis."""
+        if not title or not app_name:
+            return title or "No Title"
+        
+        app_lower = app_name.lower()
+        title_lower = title.lower()
+        
+        # Browser content enhancement
+        if any(browser in app_lower for browser in ['firefox', 'chrome', 'edge', 'safari']):
+            return self._enhance_browser_title(title)
+        
+        # Code editor enhancement
+        elif any(editor in app_lower for editor in ['code', 'cursor', 'vim', 'emacs']):
+            return self._enhance_code_editor_title(title)
+        
+        # Terminal enhancement
+        elif any(term in app_lower for term in ['terminal', 'cmd', 'powershell', 'bash']):
+            return self._enhance_terminal_title(title, process)
+        
+        # Document editor enhancement
+        elif any(doc in app_lower for doc in ['word', 'notepad', 'gedit']):
+            return self._enhance_document_title(title)
+        
+        # Default enhancement with metadata
+        else:
+            return f"{title} | {app_name} | {datetime.now().strftime('%H:%M')}"
+    
+    def _enhance_browser_title(self, title: str) -> str:
+        """Enhanced browser title with content detection."""
+        if not title:
+            return "Browser - Unknown Page"
+        
+        title_lower = title.lower()
+        
+        # YouTube detection
+        if 'youtube' in title_lower:
+            # Extract video title from YouTube page title
+            if ' - youtube' in title_lower:
+                video_title = title.split(' - youtube')[0].strip()
+                return f"🎥 YouTube: {video_title}"
+            else:
+                return f"🎥 YouTube: {title}"
+        
+        # Social media detection
+        elif 'facebook' in title_lower:
+            return f"📘 Facebook: {title.replace(' | Facebook', '').strip()}"
+        elif 'twitter' in title_lower or 'x.com' in title_lower:
+            return f"🐦 Twitter/X: {title.replace(' / X', '').strip()}"
+        elif 'linkedin' in title_lower:
+            return f"💼 LinkedIn: {title.replace(' | LinkedIn', '').strip()}"
+        elif 'instagram' in title_lower:
+            return f"📸 Instagram: {title}"
+        
+        # Development sites
+        elif any(dev in title_lower for dev in ['github', 'stackoverflow', 'docs']):
+            return f"💻 Dev: {title}"
+        
+        # News sites
+        elif any(news in title_lower for news in ['news', 'bbc', 'cnn', 'reuters']):
+            return f"📰 News: {title}"
+        
+        # Shopping
+        elif any(shop in title_lower for shop in ['amazon', 'ebay', 'shop']):
+            return f"🛒 Shopping: {title}"
+        
+        # Default browser with URL hint
+        else:
+            # Try to extract domain from title
+            if ' - ' in title:
+                parts = title.split(' - ')
+                if len(parts) > 1:
+                    return f"🌐 Web: {parts[0]} | {parts[-1]}"
+            
+            return f"🌐 Web: {title}"
+    
+    def _enhance_code_editor_title(self, title: str) -> str:
+        """Enhanced code editor title with file and project detection."""
+        if not title:
+            return "Code Editor"
+        
+        # Extract file name and project
+        if ' - ' in title:
+            parts = title.split(' - ')
+            filename = parts[0]
+            editor_info = ' - '.join(parts[1:])
+            
+            # Detect file type
+            if '.' in filename:
+                ext = filename.split('.')[-1].lower()
+                lang_map = {
+                    'py': '🐍 Python',
+                    'js': '⚡ JavaScript', 
+                    'jsx': '⚛️ React',
+                    'ts': '🔷 TypeScript',
+                    'css': '🎨 CSS',
+                    'html': '🌐 HTML',
+                    'json': '📋 JSON',
+                    'md': '📝 Markdown'
+                }
+                lang_icon = lang_map.get(ext, '📄')
+                return f"💻 {lang_icon} {filename} | {editor_info}"
+            
+            return f"💻 Code: {filename} | {editor_info}"
+        
+        return f"💻 Code: {title}"
+    
+    def _enhance_terminal_title(self, title: str, process=None) -> str:
+        """Enhanced terminal title with command detection."""
+        if not title:
+            return "Terminal Session"
+        
+        # Common command detection
+        title_lower = title.lower()
+        
+        if 'npm' in title_lower:
+            return f"⚡ Terminal: {title} (Node.js)"
+        elif 'git' in title_lower:
+            return f"🔀 Terminal: {title} (Git)"
+        elif 'python' in title_lower:
+            return f"🐍 Terminal: {title} (Python)"
+        elif 'docker' in title_lower:
+            return f"🐳 Terminal: {title} (Docker)"
+        else:
+            return f"💻 Terminal: {title}"
+    
+    def _enhance_document_title(self, title: str) -> str:
+        """Enhanced document title with file type detection."""
+        if not title:
+            return "Document"
+        
+        # Detect document type from title
+        title_lower = title.lower()
+        
+        if any(word in title_lower for word in ['readme', 'documentation', 'docs']):
+            return f"📚 Docs: {title}"
+        elif any(word in title_lower for word in ['note', 'memo']):
+            return f"📝 Notes: {title}"
+        elif any(word in title_lower for word in ['todo', 'task']):
+            return f"✅ Tasks: {title}"
+        else:
+            return f"📄 Document: {title}"
+    
+    def _calculate_session_productivity(self, app: str, title: str, duration: float) -> float:
+        """Calculate productivity score for a session."""
+        if not app or duration < 1:
+            return 0.0
+        
+        # Basic productivity classification
+        productive_apps = {
+            "code.exe": 0.9,
+            "cursor.exe": 0.9,
+            "notepad++.exe": 0.8,
+            "cmd.exe": 0.7,
+            "powershell.exe": 0.7,
+            "terminal.exe": 0.7,
+            "firefox.exe": 0.3,  # Depends on content
+            "chrome.exe": 0.3,   # Depends on content
+            "edge.exe": 0.3,     # Depends on content
+        }
+        
+        base_score = productive_apps.get(app.lower(), 0.5)
+        
+        # Analyze title for additional context
+        if title:
+            title_lower = title.lower()
+            
+            # Boost for coding/learning content
+            if any(keyword in title_lower for keyword in [
+                "python", "javascript", "react", "fastapi", "github",
+                "stackoverflow", "documentation", "tutorial"
+            ]):
+                base_score = min(1.0, base_score + 0.3)
+            
+            # Reduce for distracting content
+            elif any(keyword in title_lower for keyword in [
+                "youtube", "facebook", "twitter", "reddit", "tiktok",
+                "instagram", "netflix", "gaming"
+            ]):
+                base_score = max(0.0, base_score - 0.4)
+        
+        # Duration factor (longer focused sessions get slight boost)
+        duration_factor = min(1.1, 1.0 + (duration / 3600) * 0.1)  # Max 10% boost for 1hr+
+        
+        return min(1.0, base_score * duration_factor)
+    
+    def _classify_activity(self, app: str, title: str) -> str:
+        """Classify activity with a tag."""
+        if not app:
+            return "Untagged"
+        
+        app_lower = app.lower()
+        title_lower = (title or "").lower()
+        
+        # Development
+        if any(keyword in app_lower for keyword in ["code", "cursor", "git", "terminal", "cmd"]):
+            return "✅ Development"
+        
+        # Learning/Research
+        if any(keyword in title_lower for keyword in [
+            "documentation", "tutorial", "learning", "course", "stackoverflow"
+        ]):
+            return "🧪 Research"
+        
+        # Communication
+        if any(keyword in app_lower for keyword in ["slack", "teams", "discord", "zoom"]):
+            return "💬 Communication"
+        
+        # Entertainment/Distraction
+        if any(keyword in title_lower for keyword in [
+            "youtube", "netflix", "gaming", "social", "reddit"
+        ]):
+            return "❌ Distraction"
+        
+        # Default
+        return "📝 General"
+
+
+def build_corpus(size: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        (rng.choice(APPS), f"{rng.choice(TITLE_PARTS)} {rng.randint(0, 50)}")
+        for _ in range(size)
+    ]
+
+def run_legacy(legacy: LegacyClassifier, corpus):
+    results = []
+    for app, title in corpus:
+        enhanced = legacy._enhance_content_detection(app, title)
+        tag = legacy._classify_activity(app, enhanced)
+        score = legacy._calculate_session_productivity(app, enhanced, 60)
+        results.append((tag, score, enhanced))
+    return results
+
+def run_engine(corpus):
+    results = []
+    for app, title in corpus:
+        analysis = analyzer.analyze(app, title)
+        results.append((analysis.tag, analyzer.scale_score(analysis.base_score, 60), analysis.enhanced_title))
+    return results
+
+def timed(func, *args, rounds: int):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.titles)
+    legacy = LegacyClassifier()
+
+    mismatches = [
+        (pair, old, new)
+        for pair, old, new in zip(corpus, run_legacy(legacy, corpus), run_engine(corpus))
+        if (old[0], old[1], canonicalize(pair[0], old[2]).title) != new
+    ]
+    if mismatches:
+        pair, old, new = mismatches[0]
+        raise SystemExit(f"{len(mismatches)} mismatches, first: {pair}: {old} != {new}")
+
+    legacy_time = timed(run_legacy, legacy, corpus, rounds=args.rounds)
+    engine_time = timed(run_engine, corpus, rounds=args.rounds)
+
+    print(f"Classification benchmark ({len(corpus)} titles, best of {args.rounds})")
+    print(f"  legacy chains : {len(corpus) / legacy_time:12,.0f} matches/s")
+    print(f"  rule engine   : {len(corpus) / engine_time:12,.0f} matches/s")
+    print(f"  speedup       : {legacy_time / engine_time:12.2f}x")
+
+if __name__ == "__main__":
+    main()
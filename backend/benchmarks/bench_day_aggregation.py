@@ -0,0 +1,102 @@
+# =============================================================================
+# bench_day_aggregation.py - Day Analytics: Python Grouping vs SQL GROUP BY
+# =============================================================================
+"""
+Times the per-day aggregations behind /api/focus/activity/apps and the daily
+analytics rollup on a synthetic day of sessions.
+
+Usage (from backend/):
+    python -m benchmarks.bench_day_aggregation --sessions 20000
+
+"python" fetches the day's rows, converts each to a dict and groups them in
+Python loops: once with the old 1000-row limit (truncated), once with all rows.
+"sql" runs the GROUP BY / SUM / COUNT queries that now back both paths.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+_BENCH_DIR = tempfile.mkdtemp(prefix="bench-day-aggregation-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_BENCH_DIR}/bench.db"
+os.environ["FOCUS_LOG_DIR"] = os.path.join(_BENCH_DIR, "focus_logs")
+
+from models.database import Base, async_db, db_manager, engine  # noqa: E402
+from models.migrations import run_migrations  # noqa: E402
+from services.focus_guardian.rollups import DailyRollup, build_daily_rollup  # noqa: E402
+from services.focus_guardian.tracker import tracker  # noqa: E402
+
+TAGS = ["💻 Coding", "📝 General", "❌ Distraction", "🔍 Research"]
+
+def seed(sessions: int, day: date):
+    step = 86000 / sessions
+    start_of_day = datetime.combine(day, datetime.min.time())
+    records = []
+    for i in range(sessions):
+        start = start_of_day + timedelta(seconds=i * step)
+        records.append({
+            "user_id": tracker.current_user_id,
+            "app_name": f"app-{i % 40}",
+            "window_title": f"Window {i % 500}",
+            "start_time": start,
+            "end_time": start + timedelta(seconds=step),
+            "duration_seconds": step if i % 97 else 2400.0,
+            "tag": TAGS[i % len(TAGS)],
+            "productivity_score": (i % 10) / 10
+        })
+    for offset in range(0, sessions, 5000):
+        db_manager.bulk_create_activity_logs(records[offset:offset + 5000])
+
+def python_grouping(day: date, limit: int):
+    logs = asyncio.run(tracker.get_activity_logs(day, limit=limit))
+    rollup = DailyRollup()
+    apps = {}
+    for log in logs:
+        apps.setdefault(log["app_name"], []).append(log["duration_seconds"])
+        rollup.add_session(log["app_name"], log["tag"], log["duration_seconds"],
+                           log["productivity_score"], datetime.fromisoformat(log["start_time"]))
+    return rollup.session_count, rollup.to_analytics()
+
+def sql_grouping(day: date):
+    db_manager.get_app_usage(tracker.current_user_id, day)
+    rollup = build_daily_rollup(tracker.current_user_id, day)
+    return rollup.session_count, rollup.to_analytics()
+
+def timed(func, repeat: int):
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    day = date.today()
+    seed(args.sessions, day)
+
+    print(f"Day aggregation benchmark ({args.sessions:,} sessions)")
+    for label, func in (
+        ("python, limit 1000", lambda: python_grouping(day, 1000)),
+        ("python, all rows", lambda: python_grouping(day, args.sessions)),
+        ("sql GROUP BY", lambda: sql_grouping(day)),
+    ):
+        ms, (sessions, analytics) = timed(func, args.repeat)
+        print(
+            f"  {label:<18}: {ms:8.1f} ms median | sessions counted {sessions:>6,} | "
+            f"focused {analytics['total_focused_time']:>6,}s | flow {analytics['flow_sessions']}"
+        )
+    async_db.shutdown()
+
+if __name__ == "__main__":
+    main()
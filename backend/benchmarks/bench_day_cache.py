@@ -0,0 +1,102 @@
+# =============================================================================
+# bench_day_cache.py - Live Productivity Score: SQLite Re-query vs Day Cache
+# =============================================================================
+"""
+Times the productivity score computed by get_current_status(), which the
+WebSocket broadcast calls every second.
+
+Usage (from backend/):
+    python -m benchmarks.bench_day_cache --sessions 2000
+
+"requery" is the old path: read today's rows, convert each to a log dict and
+sum in Python (over all rows, not the old 100-row page). "cache" is the
+status path now: the day cache's running sums, seeded once from the database.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+_BENCH_DIR = tempfile.mkdtemp(prefix="bench-day-cache-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_BENCH_DIR}/bench.db"
+os.environ["FOCUS_LOG_DIR"] = os.path.join(_BENCH_DIR, "focus_logs")
+
+from models.database import Base, async_db, db_manager, engine  # noqa: E402
+from models.migrations import run_migrations  # noqa: E402
+from services.focus_guardian.day_cache import HAS_NUMPY, activity_day_cache  # noqa: E402
+from services.focus_guardian.idle import IDLE_TAG  # noqa: E402
+from services.focus_guardian.tracker import tracker  # noqa: E402
+
+TAGS = ["💻 Coding", "📝 General", "❌ Distraction", IDLE_TAG]
+
+def seed(sessions: int, day: date):
+    step = 8 * 3600 / sessions
+    start_of_day = datetime.combine(day, datetime.min.time()) + timedelta(hours=9)
+    db_manager.bulk_create_activity_logs([
+        {
+            "user_id": tracker.current_user_id,
+            "app_name": f"app-{i % 12}",
+            "window_title": f"Window {i % 40}",
+            "start_time": start_of_day + timedelta(seconds=i * step),
+            "end_time": start_of_day + timedelta(seconds=(i + 1) * step),
+            "duration_seconds": step,
+            "tag": TAGS[i % len(TAGS)],
+            "productivity_score": (i % 10) / 10
+        }
+        for i in range(sessions)
+    ])
+
+async def requery_score() -> float:
+    rows = await async_db.read(
+        lambda: [row for batch in db_manager.iter_activity_log_rows(tracker.current_user_id, date.today().isoformat())
+                 for row in batch]
+    )
+    logs = [tracker._activity_log_to_dict(row) for row in rows]
+    logs = [log for log in logs if log["tag"] != IDLE_TAG]
+    total = sum(log["duration_seconds"] for log in logs)
+    return sum(log["duration_seconds"] * log["productivity_score"] for log in logs) / total if total else 0.0
+
+async def cache_score() -> float:
+    return tracker._calculate_productivity_score()
+
+async def timed(func, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+async def run(args):
+    cold_started = time.perf_counter()
+    await activity_day_cache.get(tracker.current_user_id)
+    cold_ms = (time.perf_counter() - cold_started) * 1000
+
+    requery_ms, requery = await timed(requery_score, args.repeat)
+    cache_ms, cached = await timed(cache_score, args.repeat)
+    assert abs(requery - cached) < 1e-9
+
+    print(f"Live productivity score ({args.sessions:,} sessions today, numpy={HAS_NUMPY})")
+    print(f"  requery   : {requery_ms:8.3f} ms median")
+    print(f"  day cache : {cache_ms:8.3f} ms median (cold load {cold_ms:.1f} ms, once)")
+    print(f"  speedup   : {requery_ms / cache_ms:8.0f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    seed(args.sessions, date.today())
+    asyncio.run(run(args))
+    async_db.shutdown()
+
+if __name__ == "__main__":
+    main()
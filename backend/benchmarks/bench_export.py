@@ -0,0 +1,99 @@
+# =============================================================================
+# bench_export.py - Streaming Export Throughput and Memory
+# =============================================================================
+"""
+Measures the streaming exporter on a large activity_logs table.
+
+Usage (from backend/):
+    python -m benchmarks.bench_export --rows 1000000 --format csv
+
+Seeds a throwaway SQLite database with a raw executemany (bypassing the
+ingest path, which is not what is measured here), then drains
+export_chunks() into /dev/null and reports rows/s, MB/s and the peak RSS
+growth, which should stay flat as --rows grows. Memory is the process's
+anonymous RSS: pages of the SQLite mmap window (sqlite_mmap_size) are
+file-backed, reclaimable, and would otherwise swamp the figure.
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_BENCH_DIR = tempfile.mkdtemp(prefix="bench-export-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_BENCH_DIR}/bench.db"
+os.environ["FOCUS_LOG_DIR"] = os.path.join(_BENCH_DIR, "focus_logs")
+
+from sqlalchemy import insert  # noqa: E402
+
+from models.database import ActivityLog, Base, engine  # noqa: E402
+from models.migrations import run_migrations  # noqa: E402
+from services.export import export_chunks  # noqa: E402
+
+USER = "bench"
+APPS = [f"app-{i}" for i in range(8)]
+TAGS = ["💻 Coding", "📝 General", "❌ Distraction"]
+
+def seed(rows: int, batch: int = 50000):
+    start = datetime(2023, 1, 1, 9)
+    with engine.begin() as connection:
+        for offset in range(0, rows, batch):
+            records = []
+            for i in range(offset, min(offset + batch, rows)):
+                begin = start + timedelta(seconds=i * 20)
+                records.append({
+                    "user_id": USER,
+                    "app_name": APPS[i % len(APPS)],
+                    "window_title": f"Window {i % 50} - project, file {i % 300}",
+                    "start_time": begin,
+                    "end_time": begin + timedelta(seconds=15),
+                    "duration_seconds": 15.0,
+                    "tag": TAGS[i % len(TAGS)],
+                    "productivity_score": (i % 10) / 10,
+                    "day_key": begin.strftime("%Y-%m-%d"),
+                    "hour": begin.hour,
+                    "created_at": begin
+                })
+            connection.execute(insert(ActivityLog), records)
+
+def anon_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak incl. file pages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--format", default="csv", choices=["csv", "parquet", "arrow"])
+    parser.add_argument("--chunk-rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    seed(args.rows)
+
+    baseline_rss = peak_rss = anon_rss_mb()
+    written = chunks = 0
+    started = time.perf_counter()
+    with open(os.devnull, "wb") as sink:
+        for chunk in export_chunks("activity_logs", args.format, USER, chunk_rows=args.chunk_rows):
+            sink.write(chunk)
+            written += len(chunk)
+            chunks += 1
+            peak_rss = max(peak_rss, anon_rss_mb())
+    elapsed = time.perf_counter() - started
+
+    print(f"Export benchmark ({args.rows:,} rows, {args.format}, {args.chunk_rows:,} rows/chunk)")
+    print(f"  elapsed     : {elapsed:8.2f} s ({chunks:,} chunks, {written / 1e6:,.1f} MB)")
+    print(f"  throughput  : {args.rows / elapsed:10,.0f} rows/s, {written / 1e6 / elapsed:6.1f} MB/s")
+    print(f"  peak RSS    : {peak_rss:8.1f} MB anonymous (+{peak_rss - baseline_rss:.1f} MB during export)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# =============================================================================
+# bench_fallback_log.py - Fallback Log: JSON Rewrite vs Append-Only JSONL
+# =============================================================================
+"""
+Times a day's worth of sessions going to the fallback log, batch by batch.
+
+Usage (from backend/):
+    python -m benchmarks.bench_fallback_log --sessions 5000 --batch 10
+
+"rewrite" is the old store: load <date>.json, extend, dump the whole array
+with indent=2 (O(n^2) over a day). "jsonl" appends to the rotated, indexed
+JSON Lines log, with and without the per-batch fsync. A final time-range read
+shows the offset index at work.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from services.focus_guardian.fallback_log import JsonlActivityLog, to_entry
+
+def make_records(sessions: int):
+    start = datetime(2024, 3, 1, 8)
+    return [
+        {
+            "user_id": "bench",
+            "app_name": f"app-{i % 8}",
+            "window_title": f"Window {i % 50} - some document title",
+            "start_time": start + timedelta(seconds=i * 5),
+            "end_time": start + timedelta(seconds=i * 5 + 4),
+            "duration_seconds": 4.0,
+            "tag": "💻 Coding",
+            "productivity_score": 0.7
+        }
+        for i in range(sessions)
+    ]
+
+def rewrite_store(log_dir: Path, batches):
+    log_file = log_dir / "2024-03-01.json"
+    for batch in batches:
+        logs = json.loads(log_file.read_text(encoding="utf-8")) if log_file.exists() else []
+        logs.extend(to_entry(record) for record in batch)
+        with log_file.open("w", encoding="utf-8") as f:
+            json.dump(logs, f, indent=2, ensure_ascii=False)
+
+def jsonl_store(log_dir: Path, batches, fsync: bool) -> JsonlActivityLog:
+    log = JsonlActivityLog(log_dir, fsync=fsync)
+    for batch in batches:
+        log.append(batch)
+    log.close()
+    return log
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - started) * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=10)
+    args = parser.parse_args()
+
+    records = make_records(args.sessions)
+    batches = [records[i:i + args.batch] for i in range(0, len(records), args.batch)]
+
+    print(f"Fallback log benchmark ({args.sessions:,} sessions in batches of {args.batch})")
+    rewrite_ms, _ = timed(lambda: rewrite_store(Path(tempfile.mkdtemp(prefix="bench-fallback-")), batches))
+    print(f"  rewrite JSON      : {rewrite_ms:9.1f} ms")
+    for fsync in (False, True):
+        ms, log = timed(lambda: jsonl_store(Path(tempfile.mkdtemp(prefix="bench-fallback-")), batches, fsync))
+        print(f"  JSONL fsync={str(fsync):<5} : {ms:9.1f} ms ({log.stats()['fsyncs']} fsyncs)")
+
+    since = records[-50]["start_time"]
+    full_ms, entries = timed(lambda: log.read_day(since.date()))
+    range_ms, window = timed(lambda: log.read_day(since.date(), since))
+    print(f"  read whole day    : {full_ms:9.1f} ms ({len(entries):,} entries)")
+    print(f"  read last 50      : {range_ms:9.1f} ms ({len(window):,} entries, via the offset index)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# =============================================================================
+# bench_range_analytics.py - Multi-Day Analytics: Raw Rows vs Hour Buckets
+# =============================================================================
+"""
+Compares a 90-day dashboard query answered from raw activity rows with the
+same query answered from activity_hour_buckets.
+
+Usage (from backend/):
+    python -m benchmarks.bench_range_analytics --days 90 --sessions-per-day 3000
+
+Seeds a throwaway SQLite database through the normal ingest path (which
+maintains the buckets), then times both queries and reports rows read.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+_BENCH_DIR = tempfile.mkdtemp(prefix="bench-range-analytics-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_BENCH_DIR}/bench.db"
+os.environ["FOCUS_LOG_DIR"] = os.path.join(_BENCH_DIR, "focus_logs")
+
+from sqlalchemy import select  # noqa: E402
+
+from models.database import ActivityLog, Base, ReadSessionLocal, db_manager, engine  # noqa: E402
+from models.migrations import run_migrations  # noqa: E402
+from services.focus_guardian.range_analytics import load_range_analytics, summarize_buckets  # noqa: E402
+
+USER = "bench"
+APPS = [f"app-{i}" for i in range(8)]
+TAGS = ["💻 Coding", "📝 General", "❌ Distraction"]
+
+def seed(days: int, sessions_per_day: int, end_day: date):
+    step = 8 * 3600 / sessions_per_day  # sessions packed into an 8-hour working day
+    for offset in range(days):
+        day_start = datetime.combine(end_day - timedelta(days=offset), datetime.min.time()) + timedelta(hours=9)
+        records = []
+        for i in range(sessions_per_day):
+            start = day_start + timedelta(seconds=i * step)
+            records.append({
+                "user_id": USER,
+                "app_name": APPS[i % len(APPS)],
+                "window_title": f"Window {i % 50}",
+                "start_time": start,
+                "end_time": start + timedelta(seconds=step),
+                "duration_seconds": step,
+                "tag": TAGS[i % len(TAGS)],
+                "productivity_score": (i % 10) / 10
+            })
+        db_manager.bulk_create_activity_logs(records)
+
+def raw_range_query(start_day: date, end_day: date):
+    """Pre-bucket approach: read every raw row in the range and aggregate in Python."""
+    db = ReadSessionLocal()
+    try:
+        rows = db.execute(select(
+            ActivityLog.start_time, ActivityLog.app_name, ActivityLog.tag,
+            ActivityLog.duration_seconds, ActivityLog.productivity_score
+        ).where(
+            ActivityLog.user_id == USER,
+            ActivityLog.start_time >= datetime.combine(start_day, datetime.min.time()),
+            ActivityLog.start_time < datetime.combine(end_day + timedelta(days=1), datetime.min.time())
+        )).all()
+    finally:
+        db.close()
+
+    class _Row:
+        __slots__ = ("hour", "app_name", "tag", "total_seconds", "productive_seconds", "weighted_score", "session_count")
+
+    converted = []
+    for row in rows:
+        item = _Row()
+        item.hour = row.start_time.strftime("%Y-%m-%d %H")
+        item.app_name, item.tag = row.app_name, row.tag
+        item.total_seconds = row.duration_seconds
+        item.productive_seconds = row.duration_seconds if (row.productivity_score or 0) > 0.6 else 0.0
+        item.weighted_score = row.duration_seconds * (row.productivity_score or 0)
+        item.session_count = 1
+        converted.append(item)
+    return summarize_buckets(converted, start_day, end_day), len(rows)
+
+def timed(func, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--sessions-per-day", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    end_day = date.today()
+    start_day = end_day - timedelta(days=args.days - 1)
+    seed(args.days, args.sessions_per_day, end_day)
+
+    raw_ms, (raw_summary, raw_rows) = timed(lambda: raw_range_query(start_day, end_day), args.repeat)
+    bucket_ms, bucket_summary = timed(lambda: load_range_analytics(USER, start_day, end_day), args.repeat)
+
+    assert abs(raw_summary["total_focused_time"] - bucket_summary["total_focused_time"]) <= 1
+    print(f"Range analytics benchmark ({args.days} days, {args.days * args.sessions_per_day:,} sessions)")
+    print(f"  raw rows    : {raw_ms:8.1f} ms median, {raw_rows:>9,} rows read")
+    print(f"  hour buckets: {bucket_ms:8.1f} ms median, {bucket_summary['buckets_scanned']:>9,} rows read")
+    print(f"  speedup     : {raw_ms / bucket_ms:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# =============================================================================
+# bench_sqlite_contention.py - SQLite Read/Write Contention Benchmark
+# =============================================================================
+"""
+Runs one writer committing small transactions against several readers
+running analytics-style aggregates, first with SQLite's defaults (rollback
+journal, synchronous=FULL) and then with the configured storage profile.
+
+Usage (from backend/):
+    python -m benchmarks.bench_sqlite_contention --seconds 5 --readers 3
+
+Each profile gets a fresh database file seeded with the same rows. Reported
+are commit throughput and p99 latency, reader throughput and p99 latency, and
+how many operations failed with "database is locked".
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.exc import OperationalError
+
+from models.database import ActivityLog, Base, apply_sqlite_pragmas, sqlite_storage_profile
+
+DEFAULT_PROFILE = {"journal_mode": "DELETE", "synchronous": "FULL"}
+
+def make_row(i: int):
+    start = datetime(2024, 1, 1) + timedelta(seconds=i * 5)
+    return {
+        "user_id": "bench",
+        "app_name": f"app-{i % 19}",
+        "window_title": f"Window {i % 97}",
+        "start_time": start,
+        "end_time": start + timedelta(seconds=5),
+        "duration_seconds": 5.0,
+        "tag": "📝 General",
+        "productivity_score": 0.5,
+        "day_key": start.strftime("%Y-%m-%d"),
+        "hour": start.hour,
+        "created_at": start
+    }
+
+def build_engine(path: str, profile):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, profile)
+
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_profile(name: str, profile, seconds: float, readers: int, seed_rows: int):
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-sqlite-"), "bench.db")
+    engine = build_engine(path, profile)
+    with engine.begin() as connection:
+        for offset in range(0, seed_rows, 100):
+            connection.execute(insert(ActivityLog).values([make_row(i) for i in range(offset, offset + 100)]))
+
+    stop_at = time.perf_counter() + seconds
+    write_latencies, read_latencies = [], []
+    errors = {"write": 0, "read": 0}
+    lock = threading.Lock()
+
+    def writer():
+        i = seed_rows
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(ActivityLog).values(make_row(i)))
+                with lock:
+                    write_latencies.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                with lock:
+                    errors["write"] += 1
+            i += 1
+
+    def reader():
+        query = text(
+            "SELECT app_name, SUM(duration_seconds), COUNT(*) FROM activity_logs "
+            "WHERE user_id = 'bench' GROUP BY app_name"
+        )
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    connection.execute(query).all()
+                with lock:
+                    read_latencies.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                with lock:
+                    errors["read"] += 1
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    print(
+        f"  {name:<8}: writes {len(write_latencies) / seconds:8,.0f} tx/s (p99 {percentile(write_latencies, 0.99):7.2f} ms) | "
+        f"reads {len(read_latencies) / seconds:7,.0f} q/s (p99 {percentile(read_latencies, 0.99):7.2f} ms) | "
+        f"locked {errors['write']}w/{errors['read']}r"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=3)
+    parser.add_argument("--seed-rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"SQLite contention benchmark (1 writer, {args.readers} readers, {args.seconds:g}s, {args.seed_rows} rows)")
+    run_profile("defaults", DEFAULT_PROFILE, args.seconds, args.readers, args.seed_rows)
+    run_profile("profile", sqlite_storage_profile(), args.seconds, args.readers, args.seed_rows)
+
+if __name__ == "__main__":
+    main()
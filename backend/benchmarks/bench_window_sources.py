@@ -0,0 +1,63 @@
+# =============================================================================
+# bench_window_sources.py - Window Source Latency and CPU Benchmark
+# =============================================================================
+"""
+Compares per-sample latency and CPU cost of the Linux window source backends.
+
+Usage (from backend/, inside an X11 session):
+    python -m benchmarks.bench_window_sources --samples 500
+
+CPU cost includes time spent in child processes, so the xdotool backend is
+charged for the three fork/execs it performs per sample.
+"""
+
+import argparse
+import resource
+import statistics
+import time
+
+from services.focus_guardian.window_sources import WINDOW_SOURCES
+
+def _cpu_seconds() -> float:
+    """Total user+system CPU of this process and its reaped children."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def bench_source(name: str, samples: int):
+    source = WINDOW_SOURCES[name]()
+    if not source.is_available():
+        print(f"{name:>8}: unavailable, skipped")
+        return
+
+    # Warm up the connection / page cache
+    source.get_active_window()
+
+    latencies = []
+    cpu_start = _cpu_seconds()
+    for _ in range(samples):
+        started = time.perf_counter()
+        source.get_active_window()
+        latencies.append((time.perf_counter() - started) * 1000)
+    cpu_used = _cpu_seconds() - cpu_start
+    source.close()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:>8}: mean {statistics.mean(latencies):7.3f} ms | "
+        f"p50 {statistics.median(latencies):7.3f} ms | p99 {p99:7.3f} ms | "
+        f"cpu {cpu_used / samples * 1000:7.3f} ms/sample"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"Window source benchmark ({args.samples} samples per backend)")
+    for name in WINDOW_SOURCES:
+        bench_source(name, args.samples)
+
+if __name__ == "__main__":
+    main()
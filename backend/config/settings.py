@@ -39,10 +39,59 @@ class Settings(BaseSettings):
     
     # Database Configuration
     database_url: str = f"sqlite:///{PROJECT_ROOT}/backend/data/control_station.db"
+    database_read_pool_size: int = 4  # read-only connections (and threads) for queries
+    database_write_queue_size: int = 1000  # pending writes before callers wait for the writer thread
+    
+    # SQLite storage profile (applied to every new connection)
+    sqlite_auto_vacuum: str = "INCREMENTAL"  # freed pages can be returned in small steps (existing files need one VACUUM)
+    sqlite_journal_mode: str = "WAL"  # WAL lets readers run alongside the writer
+    sqlite_synchronous: str = "NORMAL"  # fsync at checkpoints, not every commit (safe with WAL)
+    sqlite_mmap_size: int = 268435456  # bytes of the database file memory-mapped (256 MB)
+    sqlite_cache_size: int = -16000  # page cache; negative values are KiB (16 MB)
+    sqlite_temp_store: str = "MEMORY"  # temp tables and sort spill in memory
+    sqlite_busy_timeout: int = 5000  # ms a connection waits on a lock before failing
+    sqlite_wal_autocheckpoint: int = 10000  # pages; safety net behind the background checkpointer
+    sqlite_checkpoint_interval: float = 30.0  # seconds between background PASSIVE checkpoints
+    sqlite_wal_truncate_bytes: int = 67108864  # WAL size that triggers a TRUNCATE checkpoint (64 MB)
+    export_chunk_rows: int = 10000  # rows fetched from the DB cursor per export chunk
+    
+    # Retention tiering (see services/retention.py)
+    retention_raw_days: int = 0  # delete raw activity rows older than this, keeping hourly/daily rollups (0 = keep forever)
+    retention_title_days: int = 0  # hash or drop window titles older than this (0 = keep)
+    retention_title_mode: str = "hash"  # hash or drop
+    retention_interval: float = 3600.0  # seconds between background retention passes
+    retention_batch_rows: int = 2000  # rows deleted or scrubbed per writer transaction
+    retention_vacuum_pages: int = 256  # pages returned to the filesystem per incremental vacuum step
+    retention_vacuum_pause: float = 0.05  # seconds between vacuum steps, so queued writes go first
     
     # Focus Guardian Configuration (from original modules)
-    focus_update_interval: float = 1.0  # seconds
+    focus_update_interval: float = 1.0  # seconds (WebSocket broadcasts, idle re-check floor)
+    focus_min_interval: float = 0.5  # polling interval right after a window switch
+    focus_max_interval: float = 5.0  # polling interval ceiling while the foreground is stable
+    focus_interval_backoff: float = 1.5  # growth factor per unchanged sample
     focus_log_dir: str = str(PROJECT_ROOT / "backend" / "data" / "focus_logs")
+    focus_log_segment_bytes: int = 8388608  # rotate a day's JSONL fallback log past this size (8 MB)
+    focus_log_index_stride: int = 256  # fallback log records per offset-index block
+    focus_log_fsync: bool = True  # fsync the fallback log once per appended batch
+    outbox_drain_interval: float = 30.0  # seconds between attempts to replay fallback sessions into the DB
+    outbox_max_backoff: float = 300.0  # ceiling for the doubling retry delay while the DB stays down
+    outbox_batch_size: int = 500  # fallback sessions replayed per transaction
+    outbox_alert_seconds: float = 900.0  # /health/focus reports "degraded" once a pending session is older
+    focus_window_backend: str = "auto"  # auto, x11, xdotool (Linux only)
+    focus_event_driven: bool = True  # React to X11 focus/title events instead of polling
+    focus_safety_poll_interval: float = 30.0  # seconds between samples in event-driven mode
+    focus_probe_deadline: float = 1.5  # seconds a single foreground sample may take
+    focus_probe_workers: int = 2  # threads for blocking probes (Xlib, win32gui, psutil)
+    focus_coalesce_gap: float = 120.0  # max seconds between samples merged into one session
+    focus_idle_detection: bool = True  # Suspend sampling while the user is away (Linux/X11)
+    focus_idle_threshold: float = 300.0  # seconds without input before the user counts as idle
+    focus_idle_backoff_max: float = 10.0  # status broadcast interval while idle and no pomodoro runs (idle re-checks stay at focus_update_interval)
+    activity_flush_size: int = 50  # queued sessions that trigger a batch insert
+    activity_flush_interval: float = 2.0  # max seconds a finished session waits in the queue
+    rollup_flush_interval: float = 30.0  # seconds between writes of rollup changes no activity batch carried (pomodoros)
+    classification_rules_path: str = str(BACKEND_ROOT / "config" / "classification_rules.json")
+    classification_rules_check_interval: float = 5.0  # seconds between rule file mtime checks
+    classification_cache_size: int = 512  # (app, title) pairs kept in the LRU
     
     # Pomodoro Configuration (from original pomodoro_engine.py)
     pomodoro_focus_minutes: int = 25
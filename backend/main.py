@@ -90,10 +90,22 @@ async def startup_event():
     from models.database import init_database
     await init_database()
     
+    # Background WAL checkpoints keep checkpoint I/O out of commits
+    from models.storage import checkpointer
+    await checkpointer.start()
+    
     # Initialize focus guardian service
     from services.focus_guardian.tracker import tracker
     await tracker.initialize()
     
+    # Keep daily analytics rollups current from session events
+    from services.focus_guardian.rollups import rollup_aggregator
+    await rollup_aggregator.start()
+    
+    # Expire old raw activity rows and titles in small background steps
+    from services.retention import retention_manager
+    await retention_manager.start()
+    
     # Start WebSocket background updates
     from api.websocket import start_background_updates, setup_websocket_listeners
     await start_background_updates()
@@ -117,6 +129,19 @@ async def shutdown_event():
     from services.focus_guardian.tracker import tracker
     await tracker.cleanup()
     
+    # Rollup changes the final activity flush did not carry (pomodoros)
+    from services.focus_guardian.rollups import rollup_aggregator
+    await rollup_aggregator.stop()
+    
+    from services.retention import retention_manager
+    await retention_manager.stop()
+    
+    # Final checkpoint, then release database threads once the write-behind queue has drained
+    from models.storage import checkpointer
+    await checkpointer.stop()
+    from models.database import async_db
+    async_db.shutdown()
+    
     logger.info("✅ Shutdown complete")
 
 # Development server entry point
@@ -0,0 +1,135 @@
+# =============================================================================
+# manage.py - Backend Maintenance Commands
+# =============================================================================
+"""
+Maintenance commands for the Control Station OS backend database.
+
+Usage (from backend/):
+    python manage.py rebuild-rollups [--user USER_ID]
+    python manage.py export [--table TABLE] [--format FORMAT] [--start DATE] [--end DATE]
+                            [--user USER_ID] [--output PATH]
+    python manage.py retention [--raw-days N] [--title-days N] [--title-mode hash|drop]
+                               [--compact] [--measure] [--user USER_ID]
+
+Run with the backend stopped, or restart it afterwards: the running server
+keeps recent rollups cached in memory.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+
+from models.database import init_database
+
+logger = logging.getLogger(__name__)
+
+def rebuild_rollups_command(args) -> int:
+    from services.focus_guardian.rollups import rebuild_rollups
+
+    days = rebuild_rollups(args.user)
+    scope = f"user {args.user}" if args.user else "all users"
+    print(f"📊 Rebuilt {days} daily rollups for {scope}")
+    return 0
+
+def export_command(args) -> int:
+    from services.export import ExportError, export_chunks, export_filename, validate_export
+
+    start = date.fromisoformat(args.start) if args.start else None
+    end = date.fromisoformat(args.end) if args.end else None
+    output = args.output or export_filename(args.table, args.format, start, end)
+    try:
+        validate_export(args.table, args.format)
+    except ExportError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    written = 0
+    with (sys.stdout.buffer if output == "-" else open(output, "wb")) as sink:
+        for chunk in export_chunks(args.table, args.format, args.user, start, end):
+            sink.write(chunk)
+            written += len(chunk)
+    print(f"📤 Wrote {written:,} bytes of {args.table} to {output}", file=sys.stderr)
+    return 0
+
+def retention_command(args) -> int:
+    from config.settings import settings
+    from models.database import async_db
+    from services.focus_guardian.fallback_log import JsonlActivityLog
+    from services.focus_guardian.outbox import FallbackOutbox
+    from services.retention import RetentionManager, measure_query_latency
+
+    manager = RetentionManager(
+        raw_days=settings.retention_raw_days if args.raw_days is None else args.raw_days,
+        title_days=settings.retention_title_days if args.title_days is None else args.title_days,
+        title_mode=args.title_mode or settings.retention_title_mode,
+        batch_rows=settings.retention_batch_rows,
+        vacuum_pages=settings.retention_vacuum_pages,
+        vacuum_pause=0.0
+    )
+    # Fallback files the app's outbox already replayed expire with the pass
+    manager.outbox = FallbackOutbox(JsonlActivityLog(Path(settings.focus_log_dir)), async_db.replay_activity_logs)
+    today = date.today()
+    latency_before = measure_query_latency(args.user, today) if args.measure else None
+    try:
+        report = asyncio.run(manager.run(today, compact=args.compact))
+    finally:
+        async_db.shutdown()
+
+    megabytes = lambda value: f"{value / 1048576:,.1f} MB"
+    print(f"🧹 Retention pass (raw rows kept from {report['raw_kept_from'] or 'forever'}, "
+          f"titles kept from {report['titles_kept_from'] or 'forever'})")
+    print(f"   daily rollups built: {report['rollups_built']:,}   rows pruned: {report['rows_pruned']:,}   "
+          f"titles scrubbed: {report['titles_scrubbed']:,}   fallback files expired: {report['fallback_files_expired']:,}")
+    print(f"   database: {megabytes(report['database_bytes_before'])} -> {megabytes(report['database_bytes_after'])} "
+          f"({megabytes(report['bytes_reclaimed'])} reclaimed, {megabytes(report['free_bytes'])} still free, "
+          f"auto_vacuum {report['auto_vacuum']})")
+    if report["free_bytes"] and report["auto_vacuum"] != "incremental":
+        print("   run again with --compact to reclaim the free space and enable incremental vacuum")
+    if latency_before is not None:
+        latency_after = measure_query_latency(args.user, today)
+        print(f"   query latency for {args.user} (median ms)   before      after")
+        for name, before in latency_before.items():
+            print(f"     {name:<28} {before:9.3f}  {latency_after[name]:9.3f}")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="regenerate daily analytics rollups from raw logs")
+    rebuild.add_argument("--user", default=None, help="only rebuild this user's rollups")
+    rebuild.set_defaults(handler=rebuild_rollups_command)
+
+    export = commands.add_parser("export", help="stream a table's history to CSV, Parquet or Arrow")
+    export.add_argument("--table", default="activity_logs", help="activity_logs or pomodoro_sessions")
+    export.add_argument("--format", default="csv", help="csv, parquet or arrow (the last two need pyarrow)")
+    export.add_argument("--start", default=None, help="first day (YYYY-MM-DD), by start_time")
+    export.add_argument("--end", default=None, help="last day (YYYY-MM-DD), inclusive")
+    export.add_argument("--user", default=None, help="only export this user's rows")
+    export.add_argument("--output", default=None, help="output path, '-' for stdout (default: derived from the table)")
+    export.set_defaults(handler=export_command)
+
+    retention = commands.add_parser("retention", help="expire old raw activity rows and titles, then reclaim space")
+    retention.add_argument("--raw-days", type=int, default=None, help="keep raw rows this many days (default: RETENTION_RAW_DAYS)")
+    retention.add_argument("--title-days", type=int, default=None, help="keep window titles this many days (default: RETENTION_TITLE_DAYS)")
+    retention.add_argument("--title-mode", default=None, help="hash or drop expired titles (default: RETENTION_TITLE_MODE)")
+    retention.add_argument("--compact", action="store_true", help="full VACUUM instead of incremental steps (backend stopped)")
+    retention.add_argument("--measure", action="store_true", help="time the affected queries before and after")
+    retention.add_argument("--user", default="default", help="user whose queries --measure times")
+    retention.set_defaults(handler=retention_command)
+
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    # Schema and migrations first, so commands always see the current layout
+    asyncio.run(init_database())
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# =============================================================================
+# buckets.py - Hourly Activity Bucket Aggregation
+# =============================================================================
+"""
+Pure helpers behind the activity_hour_buckets table.
+
+Each activity session is split at local hour boundaries and its duration is
+added to one bucket per (user_id, hour, app, tag), together with the
+productive time (sessions scoring above 0.6) and the score-weighted
+duration. Multi-day analytics then read a few rows per active hour instead
+of every raw session. Shared by the ingest path and the backfill migration.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+DEFAULT_TAG = "Untagged"
+PRODUCTIVE_SCORE = 0.6
+HOUR_KEY_FORMAT = "%Y-%m-%d %H"
+
+BucketKey = Tuple[str, str, str, str]  # (user_id, hour, app_name, tag)
+
+def hour_key(timestamp: datetime) -> str:
+    """Bucket key of the local hour containing `timestamp`, e.g. '2024-03-05 14'."""
+    return timestamp.strftime(HOUR_KEY_FORMAT)
+
+def hour_slices(start: datetime, end: datetime, duration: float) -> Iterator[Tuple[str, float]]:
+    """
+    Split a session into (hour key, seconds) pieces. Pieces are proportional
+    to the wall-clock overlap with each hour and sum to `duration`.
+    """
+    span = (end - start).total_seconds()
+    if span <= 0 or hour_key(start) == hour_key(end - timedelta(microseconds=1)):
+        yield hour_key(start), duration
+        return
+
+    cursor = start
+    while cursor < end:
+        next_hour = cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        piece_end = min(next_hour, end)
+        yield hour_key(cursor), duration * (piece_end - cursor).total_seconds() / span
+        cursor = piece_end
+
+def aggregate_hour_buckets(records: Iterable[Dict[str, Any]]) -> Dict[BucketKey, Dict[str, float]]:
+    """
+    Sum activity records (create_activity_log keyword dicts) into bucket
+    deltas: total_seconds, productive_seconds, weighted_score and
+    session_count (counted in the hour the session started).
+    """
+    buckets: Dict[BucketKey, Dict[str, float]] = {}
+    for record in records:
+        user_id = record["user_id"]
+        app_name = record["app_name"]
+        tag = record.get("tag") or DEFAULT_TAG
+        score = record.get("productivity_score") or 0.0
+        productive = score > PRODUCTIVE_SCORE
+
+        first = True
+        for hour, seconds in hour_slices(record["start_time"], record["end_time"], record["duration_seconds"]):
+            bucket = buckets.setdefault((user_id, hour, app_name, tag), {
+                "total_seconds": 0.0, "productive_seconds": 0.0, "weighted_score": 0.0, "session_count": 0
+            })
+            bucket["total_seconds"] += seconds
+            bucket["weighted_score"] += seconds * score
+            if productive:
+                bucket["productive_seconds"] += seconds
+            if first:
+                bucket["session_count"] += 1
+                first = False
+    return buckets
+
+def bucket_rows(buckets: Dict[BucketKey, Dict[str, float]]) -> List[Dict[str, Any]]:
+    """Flatten aggregated buckets into insert parameter dicts."""
+    return [
+        {"user_id": user_id, "hour": hour, "app_name": app_name, "tag": tag, **sums}
+        for (user_id, hour, app_name, tag), sums in buckets.items()
+    ]
@@ -7,31 +7,136 @@ Stores activity logs, focus sessions, and analytics data.
 Complements existing localStorage approach in React frontend.
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import case, cast, create_engine, delete, event, exists, func, insert, or_, select, type_coerce, update, Column, Index, Integer, String, Float, DateTime, Boolean, Text, JSON
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Union
+import asyncio
+import base64
+import json
 import logging
+import time
 
 from config.settings import settings
+from models.buckets import aggregate_hour_buckets, bucket_rows
+from models.migrations import run_migrations
 
 logger = logging.getLogger(__name__)
 
+# SQLite caps bound parameters per statement (999 on older builds)
+SQLITE_MAX_VARIABLES = 999
+
+def sqlite_storage_profile() -> Dict[str, Any]:
+    """PRAGMA values from settings, in the order they are applied."""
+    return {
+        "auto_vacuum": settings.sqlite_auto_vacuum,  # only takes effect before the first table (or at VACUUM)
+        "busy_timeout": settings.sqlite_busy_timeout,
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "temp_store": settings.sqlite_temp_store,
+        "wal_autocheckpoint": settings.sqlite_wal_autocheckpoint,
+    }
+
+def apply_sqlite_pragmas(dbapi_connection, profile: Dict[str, Any]):
+    """Apply a storage profile to a raw sqlite3 connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in profile.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    finally:
+        cursor.close()
+
+def sqlite_read_only_profile() -> Dict[str, Any]:
+    """Storage profile for reader connections (no journal changes, writes refused)."""
+    profile = {
+        key: value for key, value in sqlite_storage_profile().items()
+        if key not in ("auto_vacuum", "journal_mode", "wal_autocheckpoint")
+    }
+    profile["query_only"] = 1
+    return profile
+
+def _read_only_url(database_url: str) -> Optional[str]:
+    """Read-only URI for a file-backed SQLite database, None otherwise."""
+    if not database_url.startswith("sqlite:///"):
+        return None
+    path = database_url.replace("sqlite:///", "", 1)
+    if not path or path.startswith(":memory:") or path.startswith("file:"):
+        return None
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+# Keyset pagination position in activity logs: (start_time, id) of the last row served
+LogCursor = Tuple[datetime, int]
+
+def encode_log_cursor(start_time: datetime, row_id: int) -> str:
+    """Opaque, URL-safe cursor for the row after which the next page starts."""
+    payload = json.dumps({"t": start_time.isoformat(), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_log_cursor(cursor: str) -> LogCursor:
+    """Inverse of encode_log_cursor; raises ValueError for malformed cursors."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
 # Database setup
+# Writes: one connection, used by the single writer thread of async_db
 engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
+    **({"pool_size": 1, "max_overflow": 0} if "sqlite" in settings.database_url else {})
 )
+
+# Reads: a pool of read-only connections for analytics queries
+_read_url = _read_only_url(settings.database_url)
+read_engine = create_engine(
+    _read_url,
+    connect_args={"check_same_thread": False},
+    pool_size=settings.database_read_pool_size,
+    max_overflow=0
+) if _read_url else engine
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _on_sqlite_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, sqlite_storage_profile())
+
+if read_engine is not engine:
+    @event.listens_for(read_engine, "connect")
+    def _on_sqlite_read_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, sqlite_read_only_profile())
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
+def _start_day_key(context) -> str:
+    """Local YYYY-MM-DD of the row's start_time."""
+    return context.get_current_parameters()["start_time"].strftime("%Y-%m-%d")
+
+def _start_hour(context) -> int:
+    """Local hour (0-23) of the row's start_time."""
+    return context.get_current_parameters()["start_time"].hour
+
 # Database Models
 class ActivityLog(Base):
     """Activity log entries from focus tracking."""
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        Index("ix_activity_logs_user_start", "user_id", "start_time"),
+        Index("ix_activity_logs_user_day_hour", "user_id", "day_key", "hour"),
+        Index("ux_activity_logs_source_key", "source_key", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, index=True)  # For multi-user support
+    user_id = Column(String)  # For multi-user support (indexed with start_time)
     app_name = Column(String, nullable=False)
     window_title = Column(Text)
     start_time = Column(DateTime, nullable=False)
@@ -39,8 +144,28 @@ class ActivityLog(Base):
     duration_seconds = Column(Float, nullable=False)
     tag = Column(String, default="Untagged")
     productivity_score = Column(Float, default=0.0)
+    day_key = Column(String(10), default=_start_day_key)  # local YYYY-MM-DD of start_time
+    hour = Column(Integer, default=_start_hour)  # local hour of start_time
+    source_key = Column(String(40))  # set on rows replayed from the fallback outbox (idempotency)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class ActivityHourBucket(Base):
+    """Activity time summed per user, local hour, app and tag (maintained on ingest)."""
+    __tablename__ = "activity_hour_buckets"
+    __table_args__ = (
+        Index("ux_activity_hour_buckets_key", "user_id", "hour", "app_name", "tag", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String, nullable=False)
+    hour = Column(String(13), nullable=False)  # local 'YYYY-MM-DD HH'
+    app_name = Column(String, nullable=False)
+    tag = Column(String, nullable=False)
+    total_seconds = Column(Float, nullable=False, default=0.0)
+    productive_seconds = Column(Float, nullable=False, default=0.0)  # from sessions scoring > 0.6
+    weighted_score = Column(Float, nullable=False, default=0.0)  # sum of seconds * productivity_score
+    session_count = Column(Integer, nullable=False, default=0)  # sessions starting in this hour
+
 class PomodoroSession(Base):
     """Pomodoro timer session records."""
     __tablename__ = "pomodoro_sessions"
@@ -73,8 +198,11 @@ class FocusSession(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class UserAnalytics(Base):
-    """Daily analytics summaries for users."""
+    """Daily analytics summaries for users, maintained incrementally by the rollup aggregator."""
     __tablename__ = "user_analytics"
+    __table_args__ = (
+        Index("ux_user_analytics_user_date", "user_id", "date", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, index=True)
@@ -87,6 +215,13 @@ class UserAnalytics(Base):
     productivity_percentage = Column(Float, default=0.0)
     top_productive_app = Column(String)
     top_distraction_app = Column(String)
+    session_count = Column(Integer, default=0)
+    distraction_count = Column(Integer, default=0)
+    flow_sessions = Column(Integer, default=0)
+    app_seconds = Column(JSON)  # {app: seconds}
+    productive_app_seconds = Column(JSON)  # {app: seconds} for sessions scoring > 0.6
+    distraction_app_seconds = Column(JSON)  # {app: seconds} for distraction-tagged sessions
+    hourly_minutes = Column(JSON)  # 24 buckets by session start hour
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -95,7 +230,8 @@ async def init_database():
     """Initialize database tables."""
     try:
         Base.metadata.create_all(bind=engine)
-        logger.info("✅ Database tables created successfully")
+        version = run_migrations(engine)
+        logger.info(f"✅ Database tables created successfully (schema v{version})")
     except Exception as e:
         logger.error(f"❌ Failed to create database tables: {e}")
         raise
@@ -137,6 +273,15 @@ class DatabaseManager:
                 productivity_score=productivity_score
             )
             db.add(log_entry)
+            DatabaseManager._add_to_hour_buckets(db, [{
+                "user_id": user_id,
+                "app_name": app_name,
+                "start_time": start_time,
+                "end_time": end_time,
+                "duration_seconds": duration_seconds,
+                "tag": tag,
+                "productivity_score": productivity_score
+            }])
             db.commit()
             db.refresh(log_entry)
             return log_entry
@@ -147,27 +292,283 @@ class DatabaseManager:
         finally:
             db.close()
     
+    @staticmethod
+    def bulk_create_activity_logs(
+        records: List[Dict[str, Any]],
+        rollups: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None
+    ) -> int:
+        """
+        Insert many activity log entries in one transaction.
+        Each record carries the create_activity_log keyword arguments; rows are
+        written with multi-row INSERT ... VALUES statements. Daily rollup rows
+        passed alongside are upserted in the same transaction (one commit
+        instead of two; the rollups may already count later sessions).
+        """
+        if not records and not rollups:
+            return 0
+        
+        db = SessionLocal()
+        try:
+            if records:
+                DatabaseManager._insert_activity_rows(db, records)
+            if rollups:
+                DatabaseManager._upsert_rollups(db, rollups)
+            db.commit()
+            return len(records)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to bulk create {len(records)} activity logs: {e}")
+            raise
+        finally:
+            db.close()
+    
+    @staticmethod
+    def replay_activity_logs(records: List[Dict[str, Any]]) -> int:
+        """
+        Insert records that carry a source_key, skipping keys already stored,
+        in one transaction. Replaying the same batch twice inserts nothing the
+        second time. Returns the number of rows inserted.
+        """
+        if not records:
+            return 0
+        
+        db = SessionLocal()
+        try:
+            keys = list({record["source_key"] for record in records})
+            seen = set()
+            for offset in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                seen.update(db.scalars(
+                    select(ActivityLog.source_key).where(ActivityLog.source_key.in_(keys[offset:offset + SQLITE_MAX_VARIABLES]))
+                ))
+            fresh = []
+            for record in records:
+                if record["source_key"] not in seen:
+                    seen.add(record["source_key"])
+                    fresh.append(record)
+            if fresh:
+                DatabaseManager._insert_activity_rows(db, fresh)
+            db.commit()
+            return len(fresh)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to replay {len(records)} activity logs: {e}")
+            raise
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _insert_activity_rows(db, records: List[Dict[str, Any]]):
+        """Multi-row INSERT ... VALUES of create_activity_log keyword dicts, plus their hour buckets."""
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                **record,
+                "created_at": created_at,
+                # Column defaults cannot see per-row parameters in multi-VALUES inserts
+                "day_key": record["start_time"].strftime("%Y-%m-%d"),
+                "hour": record["start_time"].hour
+            }
+            for record in records
+        ]
+        rows_per_statement = max(1, SQLITE_MAX_VARIABLES // len(rows[0]))
+        for offset in range(0, len(rows), rows_per_statement):
+            db.execute(insert(ActivityLog).values(rows[offset:offset + rows_per_statement]))
+        DatabaseManager._add_to_hour_buckets(db, records)
+    
+    @staticmethod
+    def _add_to_hour_buckets(db, records: List[Dict[str, Any]]):
+        """Fold new activity rows into activity_hour_buckets, in the caller's transaction."""
+        rows = bucket_rows(aggregate_hour_buckets(records))
+        if not rows:
+            return
+        stmt = sqlite_insert(ActivityHourBucket)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "hour", "app_name", "tag"],
+            set_={
+                column: getattr(ActivityHourBucket, column) + getattr(stmt.excluded, column)
+                for column in ("total_seconds", "productive_seconds", "weighted_score", "session_count")
+            }
+        )
+        db.execute(stmt, rows)
+    
+    @staticmethod
+    def get_hour_buckets(user_id: str, start_day: date, end_day: date):
+        """Hour buckets for a user over the local days [start_day, end_day]."""
+        db = ReadSessionLocal()
+        try:
+            stmt = select(
+                ActivityHourBucket.hour, ActivityHourBucket.app_name, ActivityHourBucket.tag,
+                ActivityHourBucket.total_seconds, ActivityHourBucket.productive_seconds,
+                ActivityHourBucket.weighted_score, ActivityHourBucket.session_count
+            ).where(
+                ActivityHourBucket.user_id == user_id,
+                ActivityHourBucket.hour >= f"{start_day.isoformat()} 00",
+                ActivityHourBucket.hour <= f"{end_day.isoformat()} 23"
+            )
+            return db.execute(stmt).all()
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _activity_logs_statement(
+        columns,
+        user_id: str,
+        date_filter: Union[str, date] = None,
+        limit: Optional[int] = 100,
+        after: Optional[LogCursor] = None
+    ):
+        """
+        SELECT for a user's activity logs, newest first, keyset-paginated on
+        (start_time, id). Served by a backwards range scan of
+        ix_activity_logs_user_start (whose entries end in the rowid).
+        """
+        stmt = select(*columns).where(ActivityLog.user_id == user_id)
+        
+        if date_filter:
+            # Whole local day: [midnight, next midnight)
+            day = date.fromisoformat(date_filter) if isinstance(date_filter, str) else date_filter
+            day_start = datetime.combine(day, datetime.min.time())
+            stmt = stmt.where(
+                ActivityLog.start_time >= day_start,
+                ActivityLog.start_time < day_start + timedelta(days=1)
+            )
+        
+        if after is not None:
+            # Rows strictly after the cursor in (start_time DESC, id DESC) order
+            after_start, after_id = after
+            # (the <= bound keeps it an index range scan; the OR only filters ties)
+            stmt = stmt.where(
+                ActivityLog.start_time <= after_start,
+                or_(ActivityLog.start_time < after_start, ActivityLog.id < after_id)
+            )
+        
+        return stmt.order_by(ActivityLog.start_time.desc(), ActivityLog.id.desc()).limit(limit)
+    
     @staticmethod
     def get_activity_logs(user_id: str, date_filter: str = None, limit: int = 100):
         """Get activity logs for user."""
-        db = SessionLocal()
+        db = ReadSessionLocal()
         try:
-            query = db.query(ActivityLog).filter(ActivityLog.user_id == user_id)
-            
-            if date_filter:
-                # Filter by date (YYYY-MM-DD format)
-                query = query.filter(
-                    ActivityLog.start_time >= f"{date_filter} 00:00:00",
-                    ActivityLog.start_time < f"{date_filter} 23:59:59"
-                )
-            
-            return query.order_by(ActivityLog.start_time.desc()).limit(limit).all()
+            stmt = DatabaseManager._activity_logs_statement([ActivityLog], user_id, date_filter, limit)
+            return db.scalars(stmt).all()
         except Exception as e:
             logger.error(f"Failed to get activity logs: {e}")
             return []
         finally:
             db.close()
     
+    _LOG_ROW_COLUMNS = [
+        ActivityLog.id, ActivityLog.app_name, ActivityLog.window_title, ActivityLog.start_time,
+        ActivityLog.end_time, ActivityLog.duration_seconds, ActivityLog.tag,
+        ActivityLog.productivity_score
+    ]
+    
+    @staticmethod
+    def get_activity_log_rows(user_id: str, date_filter: str = None, limit: int = 100, after: Optional[LogCursor] = None):
+        """
+        Same as get_activity_logs but returns lightweight rows (attribute access,
+        no ORM identity map), roughly 3x cheaper for large result sets.
+        `after` continues from a keyset cursor.
+        """
+        db = ReadSessionLocal()
+        try:
+            stmt = DatabaseManager._activity_logs_statement(
+                DatabaseManager._LOG_ROW_COLUMNS, user_id, date_filter, limit, after
+            )
+            return db.execute(stmt).all()
+        except Exception as e:
+            logger.error(f"Failed to get activity log rows: {e}")
+            return []
+        finally:
+            db.close()
+    
+    @staticmethod
+    def iter_activity_log_rows(
+        user_id: str,
+        date_filter: str = None,
+        after: Optional[LogCursor] = None,
+        batch_size: int = 500
+    ) -> Iterator[List[Any]]:
+        """
+        Yield a user's activity rows in batches, newest first, so arbitrarily
+        large ranges are never materialised at once. Each batch is its own
+        keyset query from the previous batch's last (start_time, id) on a
+        short-lived read connection, so a slow consumer holds neither a
+        pooled connection nor a WAL snapshot between batches.
+        """
+        position = after
+        while True:
+            db = ReadSessionLocal()
+            try:
+                stmt = DatabaseManager._activity_logs_statement(
+                    DatabaseManager._LOG_ROW_COLUMNS, user_id, date_filter, batch_size, position
+                )
+                batch = db.execute(stmt).all()
+            finally:
+                db.close()
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            position = (batch[-1].start_time, batch[-1].id)
+    
+    EXPORT_TABLES = {"activity_logs": ActivityLog, "pomodoro_sessions": PomodoroSession}
+    
+    @staticmethod
+    def iter_export_rows(
+        table: str,
+        user_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 10000
+    ) -> Iterator[List[Any]]:
+        """
+        Yield every column of an exportable table in batches. `start`/`end`
+        bound start_time (end exclusive); datetimes come back as their stored
+        ISO strings so large exports skip per-value datetime parsing. Like
+        iter_activity_log_rows, each batch is a keyset query on a short-lived
+        read connection, so a slow download pins no connection or snapshot.
+        """
+        model = DatabaseManager.EXPORT_TABLES[table]
+        columns = [
+            type_coerce(column, String).label(column.name) if isinstance(column.type, DateTime) else column
+            for column in model.__table__.columns
+        ]
+        # Order the way the chosen index walks: one user's activity follows
+        # (user_id, start_time); anything else is a rowid scan. Any other
+        # order makes SQLite sort the whole export in a temp B-tree first.
+        by_start = bool(user_id) and model is ActivityLog
+        order = (model.start_time, model.id) if by_start else (model.id,)
+        stmt = select(*columns).order_by(*order).limit(batch_size)
+        if user_id:
+            stmt = stmt.where(model.user_id == user_id)
+        if start:
+            stmt = stmt.where(model.start_time >= start)
+        if end:
+            stmt = stmt.where(model.start_time < end)
+        
+        page = stmt
+        while True:
+            db = ReadSessionLocal()
+            try:
+                batch = db.execute(page).all()
+            finally:
+                db.close()
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            last = batch[-1]
+            if by_start:
+                # start_time comes back as its stored string; compare it as one
+                stored_start = type_coerce(model.start_time, String)
+                page = stmt.where(
+                    stored_start >= last.start_time,
+                    or_(stored_start > last.start_time, model.id > last.id)
+                )
+            else:
+                page = stmt.where(model.id > last.id)
+    
     @staticmethod
     def create_pomodoro_session(
         user_id: str,
@@ -243,5 +644,469 @@ class DatabaseManager:
         finally:
             db.close()
 
-# Export database manager instance
-db_manager = DatabaseManager()
\ No newline at end of file
+    @staticmethod
+    def get_daily_rollup(user_id: str, date_filter: str):
+        """Stored rollup row for one user/day, or None."""
+        db = ReadSessionLocal()
+        try:
+            return db.scalars(select(UserAnalytics).where(
+                UserAnalytics.user_id == user_id,
+                UserAnalytics.date == date_filter
+            )).first()
+        finally:
+            db.close()
+
+    @staticmethod
+    def save_daily_rollups(
+        rollups: Dict[Tuple[str, str], Dict[str, Any]],
+        replace_user: Optional[str] = None,
+        replace_all: bool = False,
+        keep_before: Optional[str] = None
+    ):
+        """
+        Upsert rollup rows keyed by (user_id, date) in one transaction.
+        With replace_user/replace_all, existing rows in that scope are deleted
+        first (used by rebuilds so days without data disappear); rows dated
+        before keep_before (days whose raw logs retention removed) are kept.
+        """
+        db = SessionLocal()
+        try:
+            scope = delete(UserAnalytics)
+            if keep_before is not None:
+                scope = scope.where(UserAnalytics.date >= keep_before)
+            if replace_all:
+                db.execute(scope)
+            elif replace_user is not None:
+                db.execute(scope.where(UserAnalytics.user_id == replace_user))
+            DatabaseManager._upsert_rollups(db, rollups)
+            db.commit()
+            return len(rollups)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to save daily rollups: {e}")
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _upsert_rollups(db, rollups: Dict[Tuple[str, str], Dict[str, Any]]):
+        """Write rollup rows keyed by (user_id, date) into the session's transaction."""
+        for (user_id, day_key), values in rollups.items():
+            row = db.scalars(select(UserAnalytics).where(
+                UserAnalytics.user_id == user_id,
+                UserAnalytics.date == day_key
+            )).first()
+            if row is None:
+                row = UserAnalytics(user_id=user_id, date=day_key)
+                db.add(row)
+            for key, value in values.items():
+                setattr(row, key, value)
+
+    @staticmethod
+    def _filter_activity(stmt, user_id: Optional[str], date_filter: Union[str, date, None], before: Optional[datetime]):
+        """Apply the optional user / local day / start-before filters shared by the aggregate queries."""
+        if user_id is not None:
+            stmt = stmt.where(ActivityLog.user_id == user_id)
+        if date_filter:
+            day = date.fromisoformat(date_filter) if isinstance(date_filter, str) else date_filter
+            day_start = datetime.combine(day, datetime.min.time())
+            stmt = stmt.where(
+                ActivityLog.start_time >= day_start,
+                ActivityLog.start_time < day_start + timedelta(days=1)
+            )
+        if before is not None:
+            stmt = stmt.where(ActivityLog.start_time < before)
+        return stmt
+
+    @staticmethod
+    def get_activity_aggregates(
+        user_id: str = None,
+        date_filter: Union[str, date] = None,
+        before: datetime = None,
+        *,
+        exclude_tag: str,
+        productive_score: float,
+        distraction_tag: str,
+        flow_seconds: float
+    ):
+        """
+        Per-day activity totals computed in SQL, without materialising sessions.
+        Returns (app_rows, hour_rows): per (user_id, day_key, app_name) the
+        seconds, productive/distraction seconds and session, distraction and
+        flow counts; per (user_id, day_key, hour) the summed whole minutes of
+        sessions starting in that hour.
+        """
+        duration = ActivityLog.duration_seconds
+        score = func.coalesce(ActivityLog.productivity_score, 0.0)
+        is_distraction = ActivityLog.tag == distraction_tag
+        not_excluded = func.coalesce(ActivityLog.tag, "") != exclude_tag
+
+        app_stmt = select(
+            ActivityLog.user_id, ActivityLog.day_key, ActivityLog.app_name,
+            func.sum(duration).label("seconds"),
+            func.sum(case((score > productive_score, duration), else_=0.0)).label("productive_seconds"),
+            func.sum(case((is_distraction, duration), else_=0.0)).label("distraction_seconds"),
+            func.count().label("sessions"),
+            func.sum(case((is_distraction, 1), else_=0)).label("distraction_count"),
+            func.sum(case((duration > flow_seconds, 1), else_=0)).label("flow_sessions")
+        ).where(not_excluded)
+        app_stmt = DatabaseManager._filter_activity(app_stmt, user_id, date_filter, before).group_by(
+            ActivityLog.user_id, ActivityLog.day_key, ActivityLog.app_name
+        )
+
+        hour_stmt = select(
+            ActivityLog.user_id, ActivityLog.day_key, ActivityLog.hour,
+            func.sum(cast(duration / 60, Integer)).label("minutes")
+        ).where(not_excluded)
+        hour_stmt = DatabaseManager._filter_activity(hour_stmt, user_id, date_filter, before).group_by(
+            ActivityLog.user_id, ActivityLog.day_key, ActivityLog.hour
+        )
+
+        db = ReadSessionLocal()
+        try:
+            return db.execute(app_stmt).all(), db.execute(hour_stmt).all()
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_app_usage(user_id: str, date_filter: Union[str, date], exclude_tag: str = None):
+        """Per-app time, session count and mean productivity for one day, largest first."""
+        total_time = func.sum(ActivityLog.duration_seconds).label("total_time")
+        stmt = select(
+            ActivityLog.app_name,
+            total_time,
+            func.count().label("session_count"),
+            func.avg(func.coalesce(ActivityLog.productivity_score, 0.0)).label("productivity_avg")
+        )
+        if exclude_tag is not None:
+            stmt = stmt.where(func.coalesce(ActivityLog.tag, "") != exclude_tag)
+        stmt = DatabaseManager._filter_activity(stmt, user_id, date_filter, None)
+        stmt = stmt.group_by(ActivityLog.app_name).order_by(total_time.desc())
+
+        db = ReadSessionLocal()
+        try:
+            return db.execute(stmt).all()
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_bucket_app_usage(user_id: str, date_filter: Union[str, date], exclude_tag: str = None):
+        """
+        get_app_usage answered from the hour buckets, for days whose raw rows
+        were removed by retention (productivity is time-weighted here).
+        """
+        day = date_filter if isinstance(date_filter, str) else date_filter.isoformat()
+        total_time = func.sum(ActivityHourBucket.total_seconds).label("total_time")
+        stmt = select(
+            ActivityHourBucket.app_name,
+            total_time,
+            func.sum(ActivityHourBucket.session_count).label("session_count"),
+            (func.sum(ActivityHourBucket.weighted_score) / func.nullif(func.sum(ActivityHourBucket.total_seconds), 0)).label("productivity_avg")
+        ).where(
+            ActivityHourBucket.user_id == user_id,
+            ActivityHourBucket.hour >= f"{day} 00",
+            ActivityHourBucket.hour <= f"{day} 23"
+        )
+        if exclude_tag is not None:
+            stmt = stmt.where(ActivityHourBucket.tag != exclude_tag)
+        stmt = stmt.group_by(ActivityHourBucket.app_name).order_by(total_time.desc())
+
+        db = ReadSessionLocal()
+        try:
+            return db.execute(stmt).all()
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_activity_users() -> List[str]:
+        """Distinct user ids that have raw activity rows."""
+        db = ReadSessionLocal()
+        try:
+            return list(db.scalars(select(ActivityLog.user_id).where(ActivityLog.user_id.is_not(None)).distinct()))
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_days_without_rollup(user_id: str, before_day: str) -> List[str]:
+        """Local days before `before_day` with raw activity rows but no stored daily rollup."""
+        has_rollup = exists().where(UserAnalytics.user_id == user_id, UserAnalytics.date == ActivityLog.day_key)
+        stmt = select(ActivityLog.day_key).where(
+            ActivityLog.user_id == user_id,
+            ActivityLog.day_key < before_day,
+            ~has_rollup
+        ).distinct().order_by(ActivityLog.day_key)
+        db = ReadSessionLocal()
+        try:
+            return list(db.scalars(stmt))
+        finally:
+            db.close()
+
+    @staticmethod
+    def prune_activity_logs(user_id: str, before: datetime, limit: int) -> int:
+        """Delete up to `limit` of a user's oldest activity rows starting before `before`."""
+        oldest = select(ActivityLog.id).where(
+            ActivityLog.user_id == user_id,
+            ActivityLog.start_time < before
+        ).order_by(ActivityLog.start_time).limit(limit).scalar_subquery()
+        db = SessionLocal()
+        try:
+            deleted = db.execute(delete(ActivityLog).where(ActivityLog.id.in_(oldest))).rowcount
+            db.commit()
+            return deleted
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to prune activity logs: {e}")
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_window_titles(user_id: str, before: datetime, after: Optional[LogCursor] = None, limit: int = 1000):
+        """
+        (id, start_time, window_title) of a user's rows starting before
+        `before`, oldest first, resuming after an (start_time, id) position.
+        """
+        stmt = select(ActivityLog.id, ActivityLog.start_time, ActivityLog.window_title).where(
+            ActivityLog.user_id == user_id,
+            ActivityLog.start_time < before
+        )
+        if after is not None:
+            stmt = stmt.where(
+                ActivityLog.start_time >= after[0],
+                or_(ActivityLog.start_time > after[0], ActivityLog.id > after[1])
+            )
+        stmt = stmt.order_by(ActivityLog.start_time, ActivityLog.id).limit(limit)
+        db = ReadSessionLocal()
+        try:
+            return db.execute(stmt).all()
+        finally:
+            db.close()
+
+    @staticmethod
+    def update_window_titles(titles: Dict[int, str]) -> int:
+        """Overwrite window_title by row id in one transaction."""
+        if not titles:
+            return 0
+        db = SessionLocal()
+        try:
+            db.execute(update(ActivityLog), [{"id": row_id, "window_title": title} for row_id, title in titles.items()])
+            db.commit()
+            return len(titles)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to update window titles: {e}")
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_finished_focus_pomodoros(user_id: str = None, since: datetime = None, until: datetime = None):
+        """Ended Focus-phase pomodoro sessions (end_time is UTC), optionally bounded to [since, until)."""
+        db = ReadSessionLocal()
+        try:
+            stmt = select(
+                PomodoroSession.user_id, PomodoroSession.completed,
+                PomodoroSession.skipped, PomodoroSession.end_time
+            ).where(PomodoroSession.phase == "Focus", PomodoroSession.end_time.is_not(None))
+            if user_id is not None:
+                stmt = stmt.where(PomodoroSession.user_id == user_id)
+            if since is not None:
+                stmt = stmt.where(PomodoroSession.end_time >= since)
+            if until is not None:
+                stmt = stmt.where(PomodoroSession.end_time < until)
+            return db.execute(stmt).all()
+        finally:
+            db.close()
+
+_EXHAUSTED = object()
+
+class AsyncDatabaseManager:
+    """
+    Coroutine facade over DatabaseManager.
+    SQLite allows one writer at a time, so every write runs on a single writer
+    thread that owns the write connection and drains a bounded queue in order;
+    reads run on a pool of read-only connections and never contend with it.
+    Neither path blocks the event loop.
+    """
+    
+    def __init__(self, manager: DatabaseManager, read_pool_size: int = 4, write_queue_size: int = 1000):
+        self._manager = manager
+        self.read_pool_size = read_pool_size
+        self.write_queue_size = write_queue_size
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._readers: Optional[ThreadPoolExecutor] = None
+        
+        # Writer queue observability
+        self._write_depth = 0
+        self.max_write_depth = 0
+        self.writes_completed = 0
+        self.writes_failed = 0
+        self._write_wait_ms = 0.0
+        self.max_write_wait_ms = 0.0
+        self._write_slots: Optional[asyncio.Semaphore] = None
+        self._write_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Reader pool observability
+        self._reads_in_flight = 0
+        self.reads_completed = 0
+    
+    async def write(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Queue a blocking write on the writer thread and await its result.
+        Waits (without blocking the loop) for a free slot while the queue is full.
+        """
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        
+        slots = self._get_write_slots()
+        await slots.acquire()
+        
+        queued_at = time.perf_counter()
+        
+        def timed():
+            wait_ms = (time.perf_counter() - queued_at) * 1000
+            self._write_wait_ms += wait_ms
+            self.max_write_wait_ms = max(self.max_write_wait_ms, wait_ms)
+            return func(*args, **kwargs)
+        
+        def release():
+            self._write_depth -= 1
+            slots.release()
+        
+        def finished(_):
+            # The slot stays taken until the job leaves the writer, even if the caller was cancelled
+            try:
+                loop.call_soon_threadsafe(release)
+            except RuntimeError:
+                pass  # loop already closed; nobody is waiting for the slot
+        
+        loop = asyncio.get_running_loop()
+        self._write_depth += 1
+        self.max_write_depth = max(self.max_write_depth, self._write_depth)
+        try:
+            job = self._writer.submit(timed)
+        except BaseException:
+            release()
+            raise
+        job.add_done_callback(finished)
+        try:
+            result = await asyncio.wrap_future(job)
+            self.writes_completed += 1
+            return result
+        except Exception:
+            self.writes_failed += 1
+            raise
+    
+    def _get_write_slots(self) -> asyncio.Semaphore:
+        """The queue-size semaphore for the running loop (each asyncio.run gets its own)."""
+        loop = asyncio.get_running_loop()
+        if self._write_slots is None or self._write_slots_loop is not loop:
+            self._write_slots = asyncio.Semaphore(self.write_queue_size)
+            self._write_slots_loop = loop
+        return self._write_slots
+    
+    async def read(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking read (or CPU-heavy row conversion) on the reader pool."""
+        if self._readers is None:
+            self._readers = ThreadPoolExecutor(max_workers=self.read_pool_size, thread_name_prefix="db-reader")
+        
+        loop = asyncio.get_running_loop()
+        self._reads_in_flight += 1
+        try:
+            return await loop.run_in_executor(self._readers, partial(func, *args, **kwargs))
+        finally:
+            self._reads_in_flight -= 1
+            self.reads_completed += 1
+    
+    async def stream(self, iterator: Iterator[Any]) -> AsyncIterator[Any]:
+        """
+        Drain a blocking iterator (typically a batched keyset reader) on the
+        reader pool, one item per hop, and close it at the end.
+        """
+        try:
+            while True:
+                item = await self.read(next, iterator, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    break
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                await self.read(close)
+    
+    async def create_activity_log(self, **kwargs):
+        return await self.write(self._manager.create_activity_log, **kwargs)
+    
+    async def bulk_create_activity_logs(
+        self,
+        records: List[Dict[str, Any]],
+        rollups: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None
+    ) -> int:
+        return await self.write(self._manager.bulk_create_activity_logs, records, rollups)
+    
+    async def replay_activity_logs(self, records: List[Dict[str, Any]]) -> int:
+        return await self.write(self._manager.replay_activity_logs, records)
+    
+    async def get_activity_logs(self, user_id: str, date_filter: str = None, limit: int = 100):
+        return await self.read(self._manager.get_activity_logs, user_id, date_filter, limit)
+    
+    async def get_activity_log_rows(self, user_id: str, date_filter: str = None, limit: int = 100, after: Optional[LogCursor] = None):
+        return await self.read(self._manager.get_activity_log_rows, user_id, date_filter, limit, after)
+    
+    async def get_app_usage(self, user_id: str, date_filter: str, exclude_tag: str = None):
+        return await self.read(self._manager.get_app_usage, user_id, date_filter, exclude_tag)
+    
+    async def get_bucket_app_usage(self, user_id: str, date_filter: str, exclude_tag: str = None):
+        return await self.read(self._manager.get_bucket_app_usage, user_id, date_filter, exclude_tag)
+    
+    async def create_pomodoro_session(self, **kwargs):
+        return await self.write(self._manager.create_pomodoro_session, **kwargs)
+    
+    async def update_pomodoro_session(self, session_id: int, **kwargs):
+        return await self.write(self._manager.update_pomodoro_session, session_id, **kwargs)
+    
+    async def get_user_analytics(self, user_id: str, date_filter: str):
+        # Get-or-create, so it goes through the writer
+        return await self.write(self._manager.get_user_analytics, user_id, date_filter)
+    
+    async def get_daily_rollup(self, user_id: str, date_filter: str):
+        return await self.read(self._manager.get_daily_rollup, user_id, date_filter)
+    
+    async def save_daily_rollups(self, rollups: Dict[Tuple[str, str], Dict[str, Any]]) -> int:
+        return await self.write(self._manager.save_daily_rollups, rollups)
+    
+    def stats(self) -> Dict[str, Any]:
+        finished_writes = self.writes_completed + self.writes_failed
+        return {
+            "writer": {
+                "queue_depth": self._write_depth,
+                "max_queue_depth": self.max_write_depth,
+                "queue_size": self.write_queue_size,
+                "completed": self.writes_completed,
+                "failed": self.writes_failed,
+                "avg_queue_wait_ms": round(self._write_wait_ms / finished_writes, 3) if finished_writes else 0.0,
+                "max_queue_wait_ms": round(self.max_write_wait_ms, 3)
+            },
+            "readers": {
+                "pool_size": self.read_pool_size,
+                "in_flight": self._reads_in_flight,
+                "completed": self.reads_completed,
+                "read_only": read_engine is not engine
+            }
+        }
+    
+    def shutdown(self):
+        """Wait for queued writes and running reads, then release the DB threads."""
+        for executor in (self._writer, self._readers):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._writer = None
+        self._readers = None
+
+# Export database manager instances
+db_manager = DatabaseManager()
+async_db = AsyncDatabaseManager(
+    db_manager,
+    read_pool_size=settings.database_read_pool_size,
+    write_queue_size=settings.database_write_queue_size
+)
\ No newline at end of file
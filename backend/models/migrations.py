@@ -0,0 +1,168 @@
+# =============================================================================
+# migrations.py - SQLite Schema Migrations
+# =============================================================================
+"""
+Forward-only schema migrations for existing databases.
+
+Base.metadata.create_all() creates missing tables but never alters existing
+ones, so databases created by older versions keep their old shape. Each
+migration here is an idempotent step tagged with a schema version; the
+database's current version lives in SQLite's PRAGMA user_version and every
+pending step runs in its own transaction before the version is bumped.
+Fresh databases run the same steps, which find nothing to change.
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from models.buckets import aggregate_hour_buckets, bucket_rows
+
+logger = logging.getLogger(__name__)
+
+def _columns(connection: Connection, table: str) -> set:
+    return {row[1] for row in connection.execute(text(f"PRAGMA table_info({table})"))}
+
+def _add_column(connection: Connection, table: str, column: str, ddl_type: str):
+    if column not in _columns(connection, table):
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+# ===== MIGRATIONS =====
+
+def _activity_time_keys(connection: Connection):
+    """
+    v1: local day/hour keys and a (user_id, start_time) index on activity_logs.
+    The composite index turns the per-day log query into a backwards index
+    range scan without a sort and makes the single-column user_id index
+    redundant.
+    """
+    _add_column(connection, "activity_logs", "day_key", "VARCHAR(10)")
+    _add_column(connection, "activity_logs", "hour", "INTEGER")
+
+    # start_time is stored as local 'YYYY-MM-DD HH:MM:SS[.ffffff]'
+    connection.execute(text(
+        "UPDATE activity_logs "
+        "SET day_key = substr(start_time, 1, 10), hour = CAST(substr(start_time, 12, 2) AS INTEGER) "
+        "WHERE day_key IS NULL OR hour IS NULL"
+    ))
+
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_activity_logs_user_start ON activity_logs (user_id, start_time)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_activity_logs_user_day_hour ON activity_logs (user_id, day_key, hour)"
+    ))
+    connection.execute(text("DROP INDEX IF EXISTS ix_activity_logs_user_id"))
+
+def _analytics_rollups(connection: Connection):
+    """
+    v2: rollup state on user_analytics and one row per (user_id, date), so
+    the aggregator can upsert a day's totals instead of recomputing them.
+    """
+    for column, ddl_type in (
+        ("session_count", "INTEGER DEFAULT 0"),
+        ("distraction_count", "INTEGER DEFAULT 0"),
+        ("flow_sessions", "INTEGER DEFAULT 0"),
+        ("app_seconds", "JSON"),
+        ("productive_app_seconds", "JSON"),
+        ("distraction_app_seconds", "JSON"),
+        ("hourly_minutes", "JSON"),
+    ):
+        _add_column(connection, "user_analytics", column, ddl_type)
+
+    # Rows created by the old get-or-create were never filled; keep one per day
+    connection.execute(text(
+        "DELETE FROM user_analytics WHERE id NOT IN "
+        "(SELECT MIN(id) FROM user_analytics GROUP BY user_id, date)"
+    ))
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_user_analytics_user_date ON user_analytics (user_id, date)"
+    ))
+
+def _activity_hour_buckets(connection: Connection):
+    """
+    v3: activity_hour_buckets, the (user_id, hour, app, tag) pre-aggregation
+    behind multi-day analytics, backfilled from existing activity logs.
+    """
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS activity_hour_buckets ("
+        "id INTEGER NOT NULL PRIMARY KEY, user_id VARCHAR NOT NULL, hour VARCHAR(13) NOT NULL, "
+        "app_name VARCHAR NOT NULL, tag VARCHAR NOT NULL, total_seconds FLOAT NOT NULL, "
+        "productive_seconds FLOAT NOT NULL, weighted_score FLOAT NOT NULL, session_count INTEGER NOT NULL)"
+    ))
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_activity_hour_buckets_key "
+        "ON activity_hour_buckets (user_id, hour, app_name, tag)"
+    ))
+    if connection.execute(text("SELECT COUNT(*) FROM activity_hour_buckets")).scalar():
+        return
+
+    records = (
+        {
+            "user_id": row.user_id,
+            "app_name": row.app_name,
+            "tag": row.tag,
+            "start_time": datetime.fromisoformat(row.start_time),
+            "end_time": datetime.fromisoformat(row.end_time),
+            "duration_seconds": row.duration_seconds,
+            "productivity_score": row.productivity_score
+        }
+        for row in connection.execute(text(
+            "SELECT user_id, app_name, tag, start_time, end_time, duration_seconds, productivity_score "
+            "FROM activity_logs WHERE user_id IS NOT NULL"
+        ))
+    )
+    rows = bucket_rows(aggregate_hour_buckets(records))
+    if rows:
+        connection.execute(text(
+            "INSERT INTO activity_hour_buckets "
+            "(user_id, hour, app_name, tag, total_seconds, productive_seconds, weighted_score, session_count) "
+            "VALUES (:user_id, :hour, :app_name, :tag, :total_seconds, :productive_seconds, :weighted_score, :session_count)"
+        ), rows)
+
+def _activity_source_key(connection: Connection):
+    """
+    v4: activity_logs.source_key, a unique key on rows replayed from the JSON
+    fallback outbox so a replay interrupted after commit can safely re-run.
+    """
+    _add_column(connection, "activity_logs", "source_key", "VARCHAR(40)")
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_activity_logs_source_key ON activity_logs (source_key)"
+    ))
+
+Migration = Tuple[int, str, Callable[[Connection], None]]
+
+MIGRATIONS: List[Migration] = [
+    (1, "activity_logs day_key/hour and (user_id, start_time) index", _activity_time_keys),
+    (2, "user_analytics rollup columns and (user_id, date) uniqueness", _analytics_rollups),
+    (3, "activity_hour_buckets pre-aggregation", _activity_hour_buckets),
+    (4, "activity_logs source_key for idempotent outbox replay", _activity_source_key),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# ===== RUNNER =====
+
+def get_schema_version(engine: Engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(text("PRAGMA user_version")).scalar() or 0
+
+def run_migrations(engine: Engine) -> int:
+    """Apply pending migrations in order. Returns the resulting schema version."""
+    if engine.dialect.name != "sqlite":
+        return 0
+
+    current = get_schema_version(engine)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(text(f"PRAGMA user_version = {version}"))
+        logger.info(f"🗄️ Applied migration v{version}: {description}")
+        current = version
+
+    return current
@@ -0,0 +1,182 @@
+# =============================================================================
+# storage.py - SQLite WAL Checkpoint Scheduler
+# =============================================================================
+"""
+Background WAL maintenance for the SQLite database.
+
+With WAL journaling, commits append to the -wal file and a checkpoint later
+copies pages back into the main database. Left to SQLite's auto-checkpoint,
+that copy runs inside whichever commit crosses the threshold and stalls it.
+The checkpointer runs PASSIVE checkpoints (never wait on readers or writers)
+on the writer thread, between queued writes, at a fixed interval; escalates
+to TRUNCATE once the WAL grows past the configured size; and reports WAL
+size for health checks. Page accounting and the VACUUM helpers used by
+retention (services/retention.py) live here as well.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from config.settings import settings
+from models.database import async_db, engine
+
+logger = logging.getLogger(__name__)
+
+def sqlite_database_path() -> Optional[str]:
+    """Filesystem path of the SQLite database, or None for other backends / :memory:."""
+    if engine.dialect.name != "sqlite":
+        return None
+    database = engine.url.database
+    if not database or database == ":memory:":
+        return None
+    return database
+
+def wal_size_bytes() -> int:
+    """Current size of the -wal file (0 if absent)."""
+    path = sqlite_database_path()
+    if not path:
+        return 0
+    try:
+        return os.path.getsize(f"{path}-wal")
+    except OSError:
+        return 0
+
+def run_checkpoint(mode: str = "PASSIVE") -> Dict[str, int]:
+    """Run a WAL checkpoint; returns SQLite's (busy, log, checkpointed) frame counts."""
+    with engine.connect() as connection:
+        busy, log_frames, checkpointed = connection.execute(text(f"PRAGMA wal_checkpoint({mode})")).one()
+    return {"busy": busy, "log_frames": log_frames, "checkpointed_frames": checkpointed}
+
+def journal_mode() -> Optional[str]:
+    if engine.dialect.name != "sqlite":
+        return None
+    with engine.connect() as connection:
+        return connection.execute(text("PRAGMA journal_mode")).scalar()
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+def database_pages() -> Dict[str, Any]:
+    """Page size, page and free-page counts, and the auto_vacuum mode of the database file."""
+    with engine.connect() as connection:
+        pragma = lambda name: connection.execute(text(f"PRAGMA {name}")).scalar()
+        page_size, page_count, freelist_count = pragma("page_size"), pragma("page_count"), pragma("freelist_count")
+        auto_vacuum = AUTO_VACUUM_MODES.get(pragma("auto_vacuum"), "unknown")
+    return {
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist_count,
+        "database_bytes": page_size * page_count,
+        "free_bytes": page_size * freelist_count,
+        "auto_vacuum": auto_vacuum
+    }
+
+def run_incremental_vacuum(pages: int) -> int:
+    """Return up to `pages` free pages to the filesystem; returns how many were released."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        before = connection.execute(text("PRAGMA freelist_count")).scalar()
+        # sqlite3's execute() steps a row-less statement once (freeing one
+        # page); executescript() runs it to completion
+        connection.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+        return before - connection.execute(text("PRAGMA freelist_count")).scalar()
+
+def run_vacuum():
+    """
+    Rebuild the whole file with VACUUM, also switching an existing database
+    to the configured auto_vacuum mode. Blocks every other writer while it
+    runs; meant for `python manage.py retention --compact`.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"PRAGMA auto_vacuum={settings.sqlite_auto_vacuum}"))
+        connection.execute(text("VACUUM"))
+
+class WalCheckpointer:
+    """Periodic WAL checkpoints on the database writer thread."""
+
+    def __init__(self, interval: float, truncate_bytes: int):
+        self.interval = interval
+        self.truncate_bytes = truncate_bytes
+        self._task: Optional[asyncio.Task] = None
+        self.journal_mode: Optional[str] = None
+        self.runs = 0
+        self.truncations = 0
+        self.last_result: Optional[Dict[str, int]] = None
+        self.last_duration_ms = 0.0
+        self.last_run_at: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return sqlite_database_path() is not None
+
+    async def start(self):
+        """Start the background checkpoint task (no-op unless SQLite is in WAL mode)."""
+        if not self.enabled or self._task is not None:
+            return
+        self.journal_mode = await async_db.write(journal_mode)
+        if (self.journal_mode or "").lower() != "wal":
+            logger.info(f"🗄️ SQLite journal mode is {self.journal_mode}; WAL checkpointer not started")
+            return
+        self._task = asyncio.create_task(self._checkpoint_loop())
+        logger.info(f"🗄️ WAL checkpointer started (every {self.interval:g}s)")
+
+    async def checkpoint(self) -> Dict[str, int]:
+        """Run one checkpoint now, escalating to TRUNCATE for an oversized WAL."""
+        mode = "TRUNCATE" if wal_size_bytes() >= self.truncate_bytes else "PASSIVE"
+        started = time.perf_counter()
+        result = await async_db.write(run_checkpoint, mode)
+        self.last_duration_ms = (time.perf_counter() - started) * 1000
+        self.last_result = {**result, "mode": mode}
+        self.last_run_at = time.time()
+        self.runs += 1
+        if mode == "TRUNCATE":
+            self.truncations += 1
+        return result
+
+    async def _checkpoint_loop(self):
+        while True:
+            try:
+                await asyncio.sleep(self.interval)
+                await self.checkpoint()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"WAL checkpoint failed: {e}")
+
+    async def stop(self):
+        """Stop the task and leave a truncated WAL behind on clean shutdown."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await async_db.write(run_checkpoint, "TRUNCATE")
+        except Exception as e:
+            logger.warning(f"Final WAL checkpoint failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "journal_mode": self.journal_mode,
+            "wal_size_bytes": wal_size_bytes(),
+            "checkpoint_running": self._task is not None,
+            "checkpoint_interval": self.interval,
+            "truncate_threshold_bytes": self.truncate_bytes,
+            "checkpoints": self.runs,
+            "truncations": self.truncations,
+            "last_checkpoint": self.last_result,
+            "last_checkpoint_ms": round(self.last_duration_ms, 3),
+            "last_checkpoint_at": self.last_run_at
+        }
+
+# Global checkpointer instance
+checkpointer = WalCheckpointer(
+    interval=settings.sqlite_checkpoint_interval,
+    truncate_bytes=settings.sqlite_wal_truncate_bytes
+)
@@ -94,6 +94,7 @@ class EventTypes:
     FOCUS_STATUS_CHANGED = "focus_status_changed"
     FOCUS_MONITORING_STARTED = "focus_monitoring_started"
     FOCUS_MONITORING_STOPPED = "focus_monitoring_stopped"
+    FOCUS_IDLE_CHANGED = "focus_idle_changed"
     ACTIVITY_LOGGED = "activity_logged"
     WINDOW_CHANGED = "window_changed"
     
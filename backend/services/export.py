@@ -0,0 +1,169 @@
+# =============================================================================
+# export.py - Streaming Export of Activity History
+# =============================================================================
+"""
+Bulk export of activity_logs and pomodoro_sessions as CSV, Parquet or Arrow
+IPC streams.
+
+Rows are pulled in keyset-paginated batches of settings.export_chunk_rows,
+each on a short-lived read connection, and each batch is encoded and handed
+on before the next is fetched, so memory stays flat no matter how much history is
+exported. CSV needs nothing beyond the standard library; Parquet and Arrow
+need the optional pyarrow package.
+"""
+
+import csv
+import io
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Iterator, List, Optional
+
+from config.settings import settings
+from models.database import DatabaseManager, db_manager
+
+# Optional columnar formats
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TABLES = tuple(DatabaseManager.EXPORT_TABLES)
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+FILE_EXTENSIONS = {"csv": "csv", "parquet": "parquet", "arrow": "arrows"}
+
+class ExportError(Exception):
+    """Raised for an export that cannot be produced (bad table/format or missing pyarrow)."""
+
+def validate_export(table: str, fmt: str):
+    """Check an export request before any rows are read."""
+    if table not in EXPORT_TABLES:
+        raise ExportError(f"Unknown table '{table}' (expected one of {', '.join(EXPORT_TABLES)})")
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown format '{fmt}' (expected one of {', '.join(EXPORT_FORMATS)})")
+    if fmt in COLUMNAR_FORMATS and not HAS_PYARROW:
+        raise ExportError(f"The {fmt} format requires pyarrow, which is not installed")
+
+def export_filename(table: str, fmt: str, start_day: Optional[date] = None, end_day: Optional[date] = None) -> str:
+    span = "-".join(day.isoformat() for day in (start_day, end_day) if day)
+    return f"{table}{'-' + span if span else ''}.{FILE_EXTENSIONS[fmt]}"
+
+def _bounds(start_day: Optional[date], end_day: Optional[date]):
+    start = datetime.combine(start_day, datetime.min.time()) if start_day else None
+    end = datetime.combine(end_day + timedelta(days=1), datetime.min.time()) if end_day else None
+    return start, end
+
+# ===== ENCODERS =====
+
+def _csv_chunks(columns: List[str], batches: Iterator[List[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+class _ChunkSink:
+    """Write-only file object that collects what pyarrow writes until drained."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._parts.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+def _arrow_schema(model) -> "pa.Schema":
+    types = {"INTEGER": pa.int64(), "FLOAT": pa.float64(), "BOOLEAN": pa.bool_(), "DATETIME": pa.timestamp("us")}
+    return pa.schema([
+        pa.field(column.name, types.get(column.type.__visit_name__.upper(), pa.string()))
+        for column in model.__table__.columns
+    ])
+
+def _arrow_batch(schema: "pa.Schema", batch: List[Any]) -> "pa.RecordBatch":
+    arrays = []
+    for index, field in enumerate(schema):
+        values = [row[index] for row in batch]
+        if pa.types.is_timestamp(field.type):
+            # Stored as 'YYYY-MM-DD HH:MM:SS[.ffffff]'; let arrow parse them in bulk
+            arrays.append(pa.array(values, pa.string()).cast(field.type))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def _columnar_chunks(fmt: str, model, batches: Iterator[List[Any]]) -> Iterator[bytes]:
+    schema = _arrow_schema(model)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema) if fmt == "parquet" else pa.ipc.new_stream(sink, schema)
+    try:
+        for batch in batches:
+            # One row group / record batch per DB batch, flushed straight out
+            writer.write_batch(_arrow_batch(schema, batch))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = sink.drain()
+    if data:
+        yield data
+
+# ===== EXPORT =====
+
+def export_chunks(
+    table: str,
+    fmt: str = "csv",
+    user_id: Optional[str] = None,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    chunk_rows: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Encode a table (optionally one user's rows within [start_day, end_day] by
+    start_time) as a stream of byte chunks. Blocking: drive it from the reader
+    pool (async_db.stream) or a plain thread.
+    """
+    validate_export(table, fmt)
+    model = DatabaseManager.EXPORT_TABLES[table]
+    start, end = _bounds(start_day, end_day)
+    batches = db_manager.iter_export_rows(table, user_id, start, end, chunk_rows or settings.export_chunk_rows)
+    try:
+        if fmt == "csv":
+            yield from _csv_chunks([column.name for column in model.__table__.columns], batches)
+        else:
+            yield from _columnar_chunks(fmt, model, batches)
+    finally:
+        batches.close()
+    logger.info(f"📤 Exported {table} as {fmt}")
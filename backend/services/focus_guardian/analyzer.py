@@ -0,0 +1,390 @@
+# =============================================================================
+# analyzer.py - Compiled Activity Classification Rules
+# =============================================================================
+"""
+Rule engine for activity tagging, base productivity scoring and title enhancement.
+
+Rules are declared in config/classification_rules.json and compiled once into
+one combined, trie-factored keyword regex per field (app name, window title). A single scan
+of a string yields every keyword it contains; each rule group then resolves
+its first matching rule from that shared set instead of re-running its own
+chain of substring checks.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+EMPTY_MATCHES: FrozenSet[str] = frozenset()
+MAX_MEMOISED_DECISIONS = 4096
+
+@dataclass(frozen=True)
+class ActivityAnalysis:
+    """Result of analysing one (app, title) pair."""
+    tag: str
+    base_score: float
+    enhanced_title: str
+
+def _trie_pattern(keywords) -> str:
+    """Build a regex alternation factored as a character trie (longest match first)."""
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+class KeywordMatcher:
+    """
+    Finds every keyword contained in a string with one compiled regex.
+    Keywords are merged into a trie-shaped alternation so each position is
+    tested in a single pass. Overlapping keywords are handled by resuming the
+    search one character after each match start and by expanding a match to
+    all keywords that are substrings of it (e.g. 'github' also implies 'git').
+    """
+
+    def __init__(self, keywords):
+        unique = sorted(set(keywords))
+        self._regex = re.compile(_trie_pattern(unique)) if unique else None
+        self._implied: Dict[str, FrozenSet[str]] = {
+            kw: frozenset(other for other in unique if other in kw) for kw in unique
+        }
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """Return the set of keywords occurring in (already lowercased) text."""
+        if self._regex is None or not text:
+            return EMPTY_MATCHES
+
+        search = self._regex.search
+        found = None
+        m = search(text)
+        while m is not None:
+            implied = self._implied[m.group()]
+            found = implied if found is None else found | implied
+            m = search(text, m.start() + 1)
+        return found or EMPTY_MATCHES
+
+class RuleGroup:
+    """Ordered rules on one field; the first rule whose keywords match wins."""
+
+    def __init__(self, rules: List[Dict[str, Any]], field: str = "title"):
+        self.field = field
+        self.rules = rules
+        # (field, keyword) -> index of the first rule that lists it
+        self._ranks: Dict[str, Dict[str, int]] = {}
+        for index, rule in enumerate(rules):
+            ranks = self._ranks.setdefault(rule.get("field", field), {})
+            for keyword in rule["keywords"]:
+                ranks.setdefault(keyword.lower(), index)
+
+    def keywords(self) -> Dict[str, List[str]]:
+        """Keywords used by this group, per field."""
+        return {field: list(ranks) for field, ranks in self._ranks.items()}
+
+    def first(self, matched: Dict[str, FrozenSet[str]]) -> Optional[Dict[str, Any]]:
+        best = None
+        for field, ranks in self._ranks.items():
+            for keyword in matched.get(field, ()):
+                rank = ranks.get(keyword)
+                if rank is not None and (best is None or rank < best):
+                    best = rank
+        return self.rules[best] if best is not None else None
+
+class ActivityAnalyzer:
+    """Compiled classification rules with hot reload support."""
+
+    def __init__(self, rules_path: Optional[str] = None):
+        self.rules_path = Path(rules_path or settings.classification_rules_path)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._rules_mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.reload()
+
+    def reload(self):
+        """Load and compile the rule table; bumps `version` on success."""
+        mtime = self.rules_path.stat().st_mtime
+        with self.rules_path.open("r", encoding="utf-8") as f:
+            rules = json.load(f)
+
+        with self._lock:
+            self._compile(rules)
+            self._rules_mtime = mtime
+            self.version += 1
+        logger.info(f"📐 Loaded classification rules v{self.version} from {self.rules_path.name}")
+
+    def check_for_updates(self) -> bool:
+        """
+        Reload the rules if the file changed on disk.
+        The file is stat'ed at most once per classification_rules_check_interval.
+        """
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + settings.classification_rules_check_interval
+
+        try:
+            if self.rules_path.stat().st_mtime == self._rules_mtime:
+                return False
+            self.reload()
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to reload classification rules: {e}")
+            return False
+
+    def _compile(self, rules: Dict[str, Any]):
+        tags = rules["tags"]
+        scores = rules["scores"]
+        enhancers = rules["enhancers"]
+
+        self._default_tag = tags["default"]
+        self._tag_rules = RuleGroup(tags["rules"])
+        self._default_score = float(scores["default"])
+        self._app_scores = {app.lower(): float(score) for app, score in scores["apps"].items()}
+        self._score_rules = RuleGroup(scores["adjustments"])
+        self._app_kinds = RuleGroup(enhancers["apps"], field="app")
+        self._browser_rules = RuleGroup(enhancers["browser"])
+        self._terminal_rules = RuleGroup(enhancers["terminal"])
+        self._document_rules = RuleGroup(enhancers["document"])
+        self._languages = enhancers["languages"]
+
+        groups = [
+            self._tag_rules, self._score_rules, self._app_kinds,
+            self._browser_rules, self._terminal_rules, self._document_rules
+        ]
+        field_keywords: Dict[str, List[str]] = {"app": [], "title": []}
+        for group in groups:
+            for field, keywords in group.keywords().items():
+                field_keywords[field].extend(keywords)
+
+        self._matchers = {field: KeywordMatcher(kws) for field, kws in field_keywords.items()}
+        self._decisions = {}
+        self._title_decisions = {}
+
+    # ===== PUBLIC API =====
+
+    def analyze(self, app: str, title: str) -> ActivityAnalysis:
+        """Enhance the raw title, then tag and score the enhanced result."""
+        app_matches = self._matchers["app"].match((app or "").lower())
+        enhanced = self._enhance(app, title, app_matches)
+        tag, base_score = self._classify(app, enhanced, app_matches)
+        return ActivityAnalysis(tag=tag, base_score=base_score, enhanced_title=enhanced)
+
+    def enhance_title(self, app: str, title: str) -> str:
+        """Return the display title with content detection applied."""
+        return self._enhance(app, title, self._matchers["app"].match((app or "").lower()))
+
+    def enhance_browser_title(self, title: str) -> str:
+        """Enhance a title known to come from a browser window."""
+        return self._format_browser(title, self._title_matches(title))
+
+    def classify(self, app: str, title: str) -> Tuple[str, float]:
+        """Return (tag, base productivity score) for an already-enhanced title."""
+        return self._classify(app, title, self._matchers["app"].match((app or "").lower()))
+
+    @staticmethod
+    def scale_score(base_score: float, duration: float) -> float:
+        """Apply the duration bonus (max 10% for sessions of an hour or more)."""
+        duration_factor = min(1.1, 1.0 + (duration / 3600) * 0.1)
+        return min(1.0, base_score * duration_factor)
+
+    # ===== CLASSIFICATION =====
+
+    def _title_matches(self, title: Optional[str]) -> FrozenSet[str]:
+        return self._matchers["title"].match((title or "").lower())
+
+    def _resolve(self, app_matches: FrozenSet[str], title_matches: FrozenSet[str]) -> Tuple[Optional[Dict], Optional[Dict], Optional[Dict]]:
+        """
+        Resolve (tag rule, score adjustment, app kind) for a keyword combination.
+        Only a handful of distinct combinations occur in practice, so the
+        decisions are memoised per (app keywords, title keywords) pair.
+        """
+        key = (app_matches, title_matches)
+        decision = self._decisions.get(key)
+        if decision is None:
+            matched = {"app": app_matches, "title": title_matches}
+            decision = (
+                self._tag_rules.first(matched),
+                self._score_rules.first(matched),
+                self._app_kinds.first(matched)
+            )
+            if len(self._decisions) >= MAX_MEMOISED_DECISIONS:
+                self._decisions.clear()
+            self._decisions[key] = decision
+        return decision
+
+    def _resolve_title(self, title_matches: FrozenSet[str]) -> Tuple[Optional[Dict], Optional[Dict], Optional[Dict]]:
+        """Resolve (browser, terminal, document) enhancer rules for title keywords."""
+        decision = self._title_decisions.get(title_matches)
+        if decision is None:
+            matched = {"title": title_matches}
+            decision = (
+                self._browser_rules.first(matched),
+                self._terminal_rules.first(matched),
+                self._document_rules.first(matched)
+            )
+            if len(self._title_decisions) >= MAX_MEMOISED_DECISIONS:
+                self._title_decisions.clear()
+            self._title_decisions[title_matches] = decision
+        return decision
+
+    def _classify(self, app: str, title: str, app_matches: FrozenSet[str]) -> Tuple[str, float]:
+        if not app:
+            return "Untagged", 0.0
+
+        tag_rule, adjustment, _ = self._resolve(app_matches, self._title_matches(title))
+        tag = tag_rule["tag"] if tag_rule else self._default_tag
+
+        base_score = self._app_scores.get(app.lower(), self._default_score)
+        if title and adjustment:
+            base_score = min(1.0, max(0.0, base_score + adjustment["delta"]))
+
+        return tag, base_score
+
+    # ===== TITLE ENHANCEMENT =====
+
+    def _enhance(self, app: str, title: str, app_matches: FrozenSet[str]) -> str:
+        if not title or not app:
+            return title or "No Title"
+
+        _, _, kind_rule = self._resolve(app_matches, EMPTY_MATCHES)
+        kind = kind_rule["kind"] if kind_rule else None
+
+        if kind == "browser":
+            return self._format_browser(title, self._title_matches(title))
+        elif kind == "code_editor":
+            return self._format_code_editor(title)
+        elif kind == "terminal":
+            return self._format_terminal(title, self._title_matches(title))
+        elif kind == "document":
+            return self._format_document(title, self._title_matches(title))
+
+        # Default enhancement with metadata (no clock - it would split sessions)
+        return f"{title} | {app}"
+
+    def _format_browser(self, title: str, title_matches: FrozenSet[str]) -> str:
+        if not title:
+            return "Browser - Unknown Page"
+
+        rule, _, _ = self._resolve_title(title_matches)
+        if rule:
+            content = title
+            if "cut" in rule and rule["cut"] in title.lower():
+                content = title.split(rule["cut"])[0].strip()
+            elif "strip" in rule:
+                content = title.replace(rule["strip"], "").strip()
+            return f"{rule['label']}: {content}"
+
+        # Default browser with URL hint
+        if ' - ' in title:
+            parts = title.split(' - ')
+            return f"🌐 Web: {parts[0]} | {parts[-1]}"
+        return f"🌐 Web: {title}"
+
+    def _format_code_editor(self, title: str) -> str:
+        if ' - ' in title:
+            parts = title.split(' - ')
+            filename = parts[0]
+            editor_info = ' - '.join(parts[1:])
+
+            # Detect file type
+            if '.' in filename:
+                ext = filename.split('.')[-1].lower()
+                lang_icon = self._languages.get(ext, '📄')
+                return f"💻 {lang_icon} {filename} | {editor_info}"
+
+            return f"💻 Code: {filename} | {editor_info}"
+
+        return f"💻 Code: {title}"
+
+    def _format_terminal(self, title: str, title_matches: FrozenSet[str]) -> str:
+        _, rule, _ = self._resolve_title(title_matches)
+        if rule:
+            return f"{rule['icon']} Terminal: {title}{rule['suffix']}"
+        return f"💻 Terminal: {title}"
+
+    def _format_document(self, title: str, title_matches: FrozenSet[str]) -> str:
+        _, _, rule = self._resolve_title(title_matches)
+        if rule:
+            return f"{rule['label']}: {title}"
+        return f"📄 Document: {title}"
+
+class ClassificationCache:
+    """
+    Size-bounded LRU of (tag, base score) per normalised (app, title) pair.
+    Entries are dropped automatically when the analyzer's rule version changes;
+    duration scaling is left to the caller so one entry serves every session.
+    """
+
+    def __init__(self, activity_analyzer: ActivityAnalyzer, max_size: int = 512):
+        self.analyzer = activity_analyzer
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._rules_version = activity_analyzer.version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def classify(self, app: str, title: str) -> Tuple[str, float]:
+        """Cached equivalent of ActivityAnalyzer.classify."""
+        self.analyzer.check_for_updates()
+        if self.analyzer.version != self._rules_version:
+            self.clear()
+            self._rules_version = self.analyzer.version
+            self.invalidations += 1
+
+        # Classification only looks at lowercased text, so this key is exact
+        key = ((app or "").lower(), (title or "").lower())
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = self.analyzer.classify(app, title)
+        self._entries[key] = result
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "rules_version": self._rules_version
+        }
+
+# Global analyzer instance
+analyzer = ActivityAnalyzer()
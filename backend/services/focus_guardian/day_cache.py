@@ -0,0 +1,310 @@
+# =============================================================================
+# day_cache.py - Columnar In-Memory Cache of Today's Activity
+# =============================================================================
+"""
+Per-user, column-oriented cache of the current day's finished sessions.
+
+get_current_status() runs every second for the WebSocket broadcast and again
+on every event; its productivity score used to re-query SQLite, rebuild log
+dicts and sum them in Python each time. Instead, each finished session is
+appended to typed arrays (start, duration, score, local hour, interned app and
+tag ids) and the breakdowns are reductions over those columns: numpy views
+over the same buffers when numpy is installed, C-level builtins otherwise.
+The productivity score itself comes from two running sums, total_seconds and
+weighted_score_seconds, so the per-second status call is O(1).
+
+The day is seeded once per user (at tracker startup or on first use) through
+the tracker's merged log reader, so sessions still waiting in the JSON
+fallback log or its replay outbox count too; at local midnight a warm user
+rolls over to an empty day in memory. A session spanning midnight is split:
+each day gets the part that falls inside it.
+"""
+
+import asyncio
+import logging
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from models.database import async_db, db_manager
+from services.focus_guardian.idle import IDLE_TAG
+from services.focus_guardian.log_merge import LogItem
+
+# Optional vectorised reductions
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+TOP_APPS = 5
+
+# reader(day, user_id=...) -> that day's merged logs, newest first
+DayReader = Callable[..., Iterator[LogItem]]
+
+def midnight_after(day: date) -> datetime:
+    """Local midnight at the end of `day`."""
+    return datetime.combine(day + timedelta(days=1), datetime.min.time())
+
+def split_at_midnight(record: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """A session as one piece per local day it touches, durations scaled to each piece."""
+    start, end = record["start_time"], record.get("end_time") or record["start_time"]
+    span = (end - start).total_seconds()
+    pieces = []
+    while True:
+        piece_end = min(end, midnight_after(start.date()))
+        kept = (piece_end - start).total_seconds()
+        pieces.append({
+            **record,
+            "start_time": start,
+            "end_time": piece_end,
+            "duration_seconds": record["duration_seconds"] * kept / span if span > 0 else record["duration_seconds"]
+        })
+        if piece_end >= end:
+            return pieces
+        start = piece_end
+
+class DayColumns:
+    """One user's non-idle sessions for one local day, stored column by column."""
+
+    def __init__(self, day: date):
+        self.day = day
+        self.starts = array("d")     # epoch seconds
+        self.durations = array("d")
+        self.scores = array("d")
+        self.hours = array("B")      # local start hour
+        self.app_ids = array("I")
+        self.tag_ids = array("I")
+        self.apps: List[str] = []
+        self.tags: List[str] = []
+        self._app_ids: Dict[str, int] = {}
+        self._tag_ids: Dict[str, int] = {}
+        self.idle_seconds = 0.0
+        # Running sums behind the O(1) productivity score
+        self.total_seconds = 0.0
+        self.weighted_score_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    @staticmethod
+    def _intern(value: str, names: List[str], ids: Dict[str, int]) -> int:
+        index = ids.get(value)
+        if index is None:
+            index = ids[value] = len(names)
+            names.append(value)
+        return index
+
+    def append(self, app: str, tag: Optional[str], duration: float, productivity_score: Optional[float], start: datetime):
+        """Add one finished session (idle time is tracked separately, not as focus)."""
+        if tag == IDLE_TAG:
+            self.idle_seconds += duration
+            return
+        score = productivity_score or 0.0
+        self.total_seconds += duration
+        self.weighted_score_seconds += duration * score
+        self.starts.append(start.timestamp())
+        self.durations.append(duration)
+        self.scores.append(score)
+        self.hours.append(start.hour)
+        self.app_ids.append(self._intern(app, self.apps, self._app_ids))
+        self.tag_ids.append(self._intern(tag or "Untagged", self.tags, self._tag_ids))
+
+    # ===== REDUCTIONS =====
+
+    def weighted_productivity(self) -> float:
+        """Duration-weighted mean productivity score of the day (O(1))."""
+        return self.weighted_score_seconds / self.total_seconds if self.total_seconds > 0 else 0.0
+
+    def hourly_breakdown(self) -> List[int]:
+        """Whole minutes per start hour, summed per session like the daily rollup."""
+        if HAS_NUMPY and len(self):
+            hours = np.frombuffer(self.hours, dtype=self.hours.typecode)
+            minutes = np.floor(np.frombuffer(self.durations) / 60)
+            return [int(m) for m in np.bincount(hours, weights=minutes, minlength=24)]
+        hourly = [0] * 24
+        for hour, duration in zip(self.hours, self.durations):
+            hourly[hour] += int(duration / 60)
+        return hourly
+
+    def app_seconds(self) -> Dict[str, float]:
+        if HAS_NUMPY and len(self):
+            app_ids = np.frombuffer(self.app_ids, dtype=self.app_ids.typecode)
+            sums = np.bincount(app_ids, weights=np.frombuffer(self.durations), minlength=len(self.apps))
+            return {app: float(seconds) for app, seconds in zip(self.apps, sums)}
+        sums = [0.0] * len(self.apps)
+        for app_id, duration in zip(self.app_ids, self.durations):
+            sums[app_id] += duration
+        return dict(zip(self.apps, sums))
+
+    def top_apps(self, limit: int = TOP_APPS) -> List[Dict[str, Any]]:
+        total = self.total_seconds
+        if total <= 0:
+            return []
+        ranked = sorted(self.app_seconds().items(), key=lambda x: x[1], reverse=True)[:limit]
+        return [{"app": app, "time": seconds, "percentage": seconds / total * 100} for app, seconds in ranked]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "date": self.day.isoformat(),
+            "session_count": len(self),
+            "total_focused_time": int(self.total_seconds),
+            "idle_time": int(self.idle_seconds),
+            "productivity_score": self.weighted_productivity(),
+            "top_apps": self.top_apps(),
+            "hourly_breakdown": self.hourly_breakdown()
+        }
+
+class ActivityDayCache:
+    """Today's DayColumns per user, appended to as sessions end."""
+
+    def __init__(self, reader: Optional[DayReader] = None):
+        # Merged log reader (the tracker's); database rows only until one is set
+        self.reader = reader
+        self._days: Dict[str, DayColumns] = {}
+        # Sessions that ended while their user's day was not loaded yet
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = asyncio.Lock()
+        self._cold_loads = 0
+        self._rollovers = 0
+        self._appended = 0
+
+    def append(self, record: Dict[str, Any]):
+        """Add a finished session (a create_activity_log keyword dict)."""
+        for piece in split_at_midnight(record):
+            start = piece["start_time"]
+            columns = self._days.get(piece["user_id"])
+            if columns is not None and columns.day < start.date() == date.today():
+                columns = self._roll_over(piece["user_id"])
+            if columns is not None and columns.day == start.date():
+                columns.append(piece["app_name"], piece.get("tag"), piece["duration_seconds"],
+                               piece.get("productivity_score"), start)
+                self._appended += 1
+            elif start.date() == date.today():
+                # Still queued for the database, so a cold load could miss it
+                self._pending.setdefault(piece["user_id"], []).append(piece)
+
+    def current(self, user_id: str) -> Optional[DayColumns]:
+        """
+        The user's columns for today without any I/O, or None if the user has
+        not been seeded yet. A seeded user crossing local midnight rolls over
+        to a fresh day: every session since the seed was appended, so the new
+        day has nothing to read back.
+        """
+        columns = self._days.get(user_id)
+        if columns is None or columns.day == date.today():
+            return columns
+        return self._roll_over(user_id)
+
+    def _roll_over(self, user_id: str) -> DayColumns:
+        columns = DayColumns(date.today())
+        self._merge_pending(user_id, columns, set())
+        self._days[user_id] = columns
+        self._rollovers += 1
+        logger.debug(f"Day cache for {user_id} rolled over to {columns.day}")
+        return columns
+
+    async def get(self, user_id: str) -> DayColumns:
+        """The user's columns for today, seeded from the database on a cold start."""
+        columns = self.current(user_id)
+        if columns is not None:
+            return columns
+        today = date.today()
+
+        async with self._lock:
+            columns = self._days.get(user_id)
+            if columns is not None and columns.day == today:
+                return columns
+            columns, loaded = await async_db.read(self._load, user_id, today)
+            self._merge_pending(user_id, columns, loaded)
+            self._days[user_id] = columns
+            self._cold_loads += 1
+            logger.debug(f"Loaded {len(columns)} sessions for {user_id} on {today} into the day cache")
+            return columns
+
+    def _load(self, user_id: str, day: date) -> Tuple[DayColumns, Set[Tuple[datetime, str]]]:
+        """Read a user's day (plus the tail of a session from the night before): its columns and the (start, app) keys seen."""
+        columns = DayColumns(day)
+        loaded = set()
+        midnight = datetime.combine(day, datetime.min.time())
+        for item in self._previous_night(user_id, day):
+            # Only the part after midnight belongs to this day
+            for piece in split_at_midnight(self._record(item)):
+                if piece["start_time"] >= midnight:
+                    self._add_loaded(columns, loaded, piece)
+        for item in self._read_day(user_id, day):
+            self._add_loaded(columns, loaded, self._record(item))
+        return columns, loaded
+
+    def _read_day(self, user_id: str, day: date) -> Iterator[LogItem]:
+        if self.reader is not None:
+            return self.reader(day, user_id=user_id)
+        return (
+            LogItem(row.start_time, row.end_time, 0, row.id, {
+                "app_name": row.app_name, "tag": row.tag,
+                "duration_seconds": row.duration_seconds, "productivity_score": row.productivity_score
+            })
+            for batch in db_manager.iter_activity_log_rows(user_id, day.isoformat())
+            for row in batch
+        )
+
+    def _previous_night(self, user_id: str, day: date) -> List[LogItem]:
+        """Sessions of the day before still running at midnight (the newest ones)."""
+        midnight = datetime.combine(day, datetime.min.time())
+        spanning = []
+        items = self._read_day(user_id, day - timedelta(days=1))
+        try:
+            for item in items:
+                if item.end <= midnight:
+                    break
+                spanning.append(item)
+        finally:
+            close = getattr(items, "close", None)
+            if close:
+                close()
+        return spanning
+
+    @staticmethod
+    def _record(item: LogItem) -> Dict[str, Any]:
+        return {
+            "app_name": item.log.get("app_name"),
+            "tag": item.log.get("tag"),
+            "duration_seconds": item.log.get("duration_seconds") or 0.0,
+            "productivity_score": item.log.get("productivity_score"),
+            "start_time": item.start,
+            "end_time": item.end
+        }
+
+    @staticmethod
+    def _add_loaded(columns: DayColumns, loaded: Set[Tuple[datetime, str]], record: Dict[str, Any]):
+        columns.append(record["app_name"], record["tag"], record["duration_seconds"],
+                       record["productivity_score"], record["start_time"])
+        loaded.add((record["start_time"], record["app_name"]))
+
+    def _merge_pending(self, user_id: str, columns: DayColumns, loaded: Set[Tuple[datetime, str]]):
+        for record in self._pending.pop(user_id, []):
+            # Anything flushed before the load was already read from the database
+            if record["start_time"].date() != columns.day or (record["start_time"], record["app_name"]) in loaded:
+                continue
+            columns.append(record["app_name"], record.get("tag"), record["duration_seconds"],
+                           record.get("productivity_score"), record["start_time"])
+            self._appended += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._days),
+            "sessions_cached": sum(len(columns) for columns in self._days.values()),
+            "sessions_appended": self._appended,
+            "cold_loads": self._cold_loads,
+            "rollovers": self._rollovers,
+            "vectorised": HAS_NUMPY
+        }
+
+    def reset(self):
+        self._days.clear()
+        self._pending.clear()
+
+# Global cache instance
+activity_day_cache = ActivityDayCache()
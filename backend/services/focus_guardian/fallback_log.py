@@ -0,0 +1,340 @@
+# =============================================================================
+# fallback_log.py - Append-Only JSONL Fallback Store for Activity Sessions
+# =============================================================================
+"""
+Where finished sessions go when the database rejects them.
+
+Sessions are appended as JSON Lines to focus_logs/<date>.jsonl (one line per
+session, grouped by local start date) instead of re-reading and rewriting a
+whole JSON array per write. Each appended batch costs one write and one fsync
+per touched file. A day's log rotates to <date>.1.jsonl, <date>.2.jsonl, ...
+once a segment passes focus_log_segment_bytes.
+
+Next to each segment, <segment>.idx holds one JSON line per block of
+focus_log_index_stride records: its byte range and min/max start_time. Range
+reads seek straight to the blocks that can match; byte ranges not covered by
+the index (a block still being filled, or one cut short by a crash) are
+scanned. A torn last line is skipped on read and fenced off with a newline
+before the next append.
+
+Days written by older versions as a single JSON array (<date>.json) are still
+read. A day is read lazily: sessions are appended as they finish, so each
+segment is already in start_time order, and iter_day merges the segments
+(and the sorted legacy file) entry by entry, oldest or newest first.
+"""
+
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:\.(\d+))?\.jsonl$")
+
+def to_entry(record: Dict[str, Any]) -> Dict[str, Any]:
+    """create_activity_log keyword dict -> fallback entry (the original tracker's keys plus user_id)."""
+    return {
+        "user_id": record["user_id"],
+        "app": record["app_name"],
+        "title": record["window_title"],
+        "start_time": record["start_time"].isoformat(sep=" "),
+        "end_time": record["end_time"].isoformat(sep=" "),
+        "duration_seconds": round(record["duration_seconds"], 2),
+        "tag": record["tag"],
+        "productivity_score": record["productivity_score"]
+    }
+
+def _entry_start(entry: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(entry["start_time"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _start_key(entry: Dict[str, Any]) -> str:
+    return entry.get("start_time") or ""
+
+def _in_range(start: Optional[datetime], since: Optional[datetime], until: Optional[datetime]) -> bool:
+    if start is None:
+        return since is None and until is None
+    return (since is None or start >= since) and (until is None or start < until)
+
+class _Block:
+    """Index state of the block currently being appended to a segment."""
+
+    __slots__ = ("offset", "end", "count", "min_start", "max_start")
+
+    def __init__(self, offset: int):
+        self.offset = self.end = offset
+        self.count = 0
+        self.min_start: Optional[str] = None
+        self.max_start: Optional[str] = None
+
+    def add(self, start: str, end_offset: int):
+        self.count += 1
+        self.end = end_offset
+        self.min_start = start if self.min_start is None else min(self.min_start, start)
+        self.max_start = start if self.max_start is None else max(self.max_start, start)
+
+    def to_line(self) -> str:
+        return json.dumps({
+            "offset": self.offset, "end": self.end, "count": self.count,
+            "min": self.min_start, "max": self.max_start
+        }) + "\n"
+
+class JsonlActivityLog:
+    """Append-only, rotated, indexed JSON Lines store for fallback sessions."""
+
+    def __init__(self, log_dir: Path, segment_bytes: int = 8388608, index_stride: int = 256, fsync: bool = True):
+        self.log_dir = Path(log_dir)
+        self.segment_bytes = segment_bytes
+        self.index_stride = max(1, index_stride)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._current: Dict[str, Path] = {}     # day -> segment being appended to
+        self._blocks: Dict[Path, _Block] = {}   # segment -> open index block
+        self.records_written = 0
+        self.fsyncs = 0
+        self.rotations = 0
+
+    # ===== WRITING =====
+
+    def append(self, records: List[Dict[str, Any]]) -> int:
+        """Append records (create_activity_log keyword dicts), fsyncing once per touched file."""
+        by_day: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_day.setdefault(record["start_time"].date().isoformat(), []).append(to_entry(record))
+
+        with self._lock:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            for day, entries in by_day.items():
+                self._append_day(day, entries)
+        return len(records)
+
+    def _append_day(self, day: str, entries: List[Dict[str, Any]]):
+        index_lines: Dict[Path, List[str]] = {}
+        handle = None
+        try:
+            for entry in entries:
+                segment = self._segment_for(day)
+                if handle is None or Path(handle.name) != segment:
+                    if handle is not None:
+                        self._sync_close(handle)
+                    handle = self._open_segment(segment)
+                line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+                handle.write(line)
+                block = self._blocks.setdefault(segment, _Block(handle.tell() - len(line)))
+                block.add(entry["start_time"], handle.tell())
+                if block.count >= self.index_stride:
+                    index_lines.setdefault(segment, []).append(block.to_line())
+                    self._blocks[segment] = _Block(block.end)
+                self.records_written += 1
+                if handle.tell() >= self.segment_bytes:
+                    self._rotate(day, segment, index_lines)
+        finally:
+            if handle is not None:
+                self._sync_close(handle)
+        # Index after the data it points at is durable
+        for segment, lines in index_lines.items():
+            with open(self._index_path(segment), "a", encoding="utf-8") as index:
+                index.writelines(lines)
+
+    def _segment_for(self, day: str) -> Path:
+        segment = self._current.get(day)
+        if segment is None:
+            existing = self._segments(day)
+            segment = existing[-1] if existing else self.log_dir / f"{day}.jsonl"
+            self._current[day] = segment
+        return segment
+
+    def _rotate(self, day: str, segment: Path, index_lines: Dict[Path, List[str]]):
+        block = self._blocks.pop(segment, None)
+        if block is not None and block.count:
+            index_lines.setdefault(segment, []).append(block.to_line())
+        match = _SEGMENT_RE.match(segment.name)
+        self._current[day] = self.log_dir / f"{day}.{int(match.group(2) or 0) + 1}.jsonl"
+        self.rotations += 1
+        logger.info(f"🔁 Rotated fallback log {segment.name}")
+
+    def _open_segment(self, segment: Path):
+        handle = open(segment, "ab")
+        if handle.tell() and segment not in self._blocks:
+            # First append since startup: fence off a line torn by a crash
+            with open(segment, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    handle.write(b"\n")
+        return handle
+
+    def _sync_close(self, handle):
+        handle.flush()
+        if self.fsync:
+            os.fsync(handle.fileno())
+            self.fsyncs += 1
+        handle.close()
+
+    def close(self):
+        """Write index entries for partly filled blocks."""
+        with self._lock:
+            for segment, block in self._blocks.items():
+                if block.count:
+                    with open(self._index_path(segment), "a", encoding="utf-8") as index:
+                        index.write(block.to_line())
+            self._blocks.clear()
+            self._current.clear()
+
+    def remove_days_before(self, day: date, removable: Callable[[Path], bool]) -> List[Path]:
+        """
+        Delete segments (with their index) and legacy files of days before
+        `day` that removable() accepts, holding the append lock so nothing is
+        written to a file between the check and the delete. Returns what was removed.
+        """
+        cutoff = day.isoformat()
+        removed = []
+        with self._lock:
+            candidates = [path for path in self.legacy_files() if path.stem < cutoff]
+            candidates += [path for path in self.all_segments() if _SEGMENT_RE.match(path.name).group(1) < cutoff]
+            for path in candidates:
+                if not removable(path):
+                    continue
+                path.unlink()
+                self._index_path(path).unlink(missing_ok=True)
+                self._blocks.pop(path, None)
+                removed.append(path)
+            self._current = {key: segment for key, segment in self._current.items() if key >= cutoff}
+        return removed
+
+    # ===== READING =====
+
+    def read_day(self, day: date, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """A day's entries with since <= start_time < until, in start_time order."""
+        return list(self.iter_day(day, since, until))
+
+    def iter_day(
+        self,
+        day: date,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        newest_first: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """Like read_day, but merged lazily, holding one entry per segment at a time."""
+        legacy = sorted(self._read_legacy(day, since, until), key=_start_key, reverse=newest_first)
+        sources = [iter(legacy)] + [
+            self._read_segment(segment, since, until, reverse=newest_first)
+            for segment in self._segments(day.isoformat())
+        ]
+        return heapq.merge(*sources, key=_start_key, reverse=newest_first)
+
+    def _segments(self, day: str) -> List[Path]:
+        found = []
+        for path in self.log_dir.glob(f"{day}*.jsonl"):
+            match = _SEGMENT_RE.match(path.name)
+            if match and match.group(1) == day:
+                found.append((int(match.group(2) or 0), path))
+        return [path for _, path in sorted(found)]
+
+    def _read_legacy(self, day: date, since: Optional[datetime], until: Optional[datetime]) -> Iterator[Dict[str, Any]]:
+        legacy = self.log_dir / f"{day.isoformat()}.json"
+        if not legacy.exists():
+            return
+        try:
+            with legacy.open("r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read legacy JSON log {legacy.name}: {e}")
+            return
+        for entry in entries:
+            if _in_range(_entry_start(entry), since, until):
+                yield entry
+
+    def all_segments(self) -> List[Path]:
+        """Every JSONL segment, oldest day and segment first (legacy .json files excluded)."""
+        found = []
+        for path in self.log_dir.glob("*.jsonl"):
+            match = _SEGMENT_RE.match(path.name)
+            if match:
+                found.append((match.group(1), int(match.group(2) or 0), path))
+        return [path for _, _, path in sorted(found)]
+
+    def legacy_files(self) -> List[Path]:
+        """Day files written by older versions as a single JSON array."""
+        return sorted(self.log_dir.glob("????-??-??.json"))
+
+    def read_from(self, segment: Path, offset: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Up to `limit` entries of complete lines from byte `offset` on, and the
+        offset just past the last line consumed. A line still being written
+        is left for the next call; torn lines are consumed and skipped.
+        """
+        entries: List[Dict[str, Any]] = []
+        with open(segment, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n") or len(entries) >= limit:
+                    break
+                offset += len(line)
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries, offset
+
+    def _index_path(self, segment: Path) -> Path:
+        return segment.with_name(segment.name + ".idx")
+
+    def _read_index(self, segment: Path) -> List[Dict[str, Any]]:
+        blocks = []
+        try:
+            with open(self._index_path(segment), "r", encoding="utf-8") as index:
+                for line in index:
+                    try:
+                        blocks.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return sorted(blocks, key=lambda block: block["offset"])
+
+    def _read_segment(
+        self,
+        segment: Path,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        reverse: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        lower = since.isoformat(sep=" ") if since else None
+        upper = until.isoformat(sep=" ") if until else None
+        ranges: List[Tuple[int, Optional[int]]] = []
+        position = 0
+        for block in self._read_index(segment):
+            if block["offset"] > position:
+                ranges.append((position, block["offset"]))  # unindexed gap
+            if (lower is None or block["max"] >= lower) and (upper is None or block["min"] < upper):
+                ranges.append((block["offset"], block["end"]))
+            position = max(position, block["end"])
+        ranges.append((position, None))
+
+        with open(segment, "rb") as f:
+            for start, end in (reversed(ranges) if reverse else ranges):
+                f.seek(start)
+                data = f.read() if end is None else f.read(end - start)
+                lines = data.splitlines()
+                for line in (reversed(lines) if reverse else lines):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn by a crash
+                    if _in_range(_entry_start(entry), since, until):
+                        yield entry
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "records_written": self.records_written,
+            "fsyncs": self.fsyncs,
+            "rotations": self.rotations
+        }
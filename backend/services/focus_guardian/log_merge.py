@@ -0,0 +1,130 @@
+# =============================================================================
+# log_merge.py - k-way Merge of Activity Log Sources
+# =============================================================================
+"""
+One time-ordered view over every place activity sessions are stored.
+
+Each source (database rows, JSON fallback entries) is already sorted by
+start_time; heapq.merge interleaves them lazily, so a consumer reading the
+first page of a long range only pulls that much from each source. While
+merging, each item is checked against the items of every other source it
+can still collide with (items of one source are trusted as recorded and
+passed through untouched):
+
+- duplicates (same app, overlapping for at least half of the shorter
+  session), such as a fallback entry that was later replayed into the
+  database, collapse into the copy from the higher-priority source. An item
+  from a lower-priority source is held back until the next item from a
+  higher-priority source has been compared with it, so its twin wins even
+  when the lower-priority copy sorts first;
+- other overlaps are trimmed off the item that comes second in iteration
+  order (its end when reading newest first, its start otherwise), scaling
+  its duration to what remains; items left empty are dropped.
+"""
+
+import heapq
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+DUPLICATE_OVERLAP = 0.5  # share of the shorter session two same-app sessions must overlap
+
+class LogItem(NamedTuple):
+    """A log dict with its parsed interval and merge ordering fields."""
+    start: datetime
+    end: datetime
+    priority: int  # lower wins duplicates (0 = database)
+    row_id: int    # tie-breaker within a start_time (database id; 0 for fallback entries)
+    log: Dict[str, Any]
+
+def _sort_key(item: LogItem):
+    return item.start, item.row_id
+
+def _is_duplicate(a: LogItem, b: LogItem) -> bool:
+    if a.log.get("app_name") != b.log.get("app_name"):
+        return False
+    overlap = (min(a.end, b.end) - max(a.start, b.start)).total_seconds()
+    shorter = min((a.end - a.start).total_seconds(), (b.end - b.start).total_seconds())
+    if shorter <= 0:
+        return a.start == b.start
+    return overlap >= shorter * DUPLICATE_OVERLAP
+
+def _trim(item: LogItem, start: datetime, end: datetime) -> Optional[LogItem]:
+    """item clipped to [start, end], or None if nothing remains."""
+    if end <= start:
+        return None
+    span = (item.end - item.start).total_seconds()
+    kept = (end - start).total_seconds()
+    duration = item.log.get("duration_seconds") or 0
+    log = {
+        **item.log,
+        "start_time": start.isoformat(),
+        "end_time": end.isoformat(),
+        "duration_seconds": duration * kept / span if span > 0 else duration
+    }
+    return item._replace(start=start, end=end, log=log)
+
+def merge_logs(sources: Iterable[Iterator[LogItem]], newest_first: bool = True) -> Iterator[LogItem]:
+    """
+    Merge sources sorted by (start_time, row_id) (descending when
+    newest_first) into one stream, resolving each item against the items
+    of every other source it may collide with. Items of the same source are
+    passed through as they are. Priority 0 (the database) is authoritative
+    and never waits; any other item is held back, in order, until an item
+    from a higher-priority source has been compared with it (or the sources
+    run out).
+    """
+    held: Deque[List[Any]] = deque()          # [item, settled], kept but not yet yielded, in merge order
+    waiting: Dict[int, List[List[Any]]] = {}  # priority -> its unsettled entries of `held`
+    latest: Dict[int, LogItem] = {}           # priority -> last item kept from that source
+    for item in heapq.merge(*sources, key=_sort_key, reverse=newest_first):
+        incoming = item.priority
+
+        # Duplicates of items still held back: the higher-priority copy wins
+        replaced = None
+        for priority, entries in waiting.items():
+            if priority == incoming:
+                continue
+            duplicate = next((entry for entry in entries if _is_duplicate(entry[0], item)), None)
+            if duplicate is not None:
+                if incoming < priority:
+                    replaced = (priority, duplicate)
+                else:
+                    item = None
+                break
+        if replaced is not None:
+            priority, entry = replaced
+            waiting[priority].remove(entry)
+            held.remove(entry)
+            if latest.get(priority) is entry[0]:
+                del latest[priority]
+
+        if item is not None:
+            for priority, other in list(latest.items()):
+                if priority == incoming:
+                    continue
+                if _is_duplicate(other, item):
+                    item = None  # its twin was already passed on
+                    break
+                # Resolve a partial overlap against the session already kept
+                if newest_first and item.end > other.start:
+                    item = _trim(item, item.start, other.start)
+                elif not newest_first and item.start < other.end:
+                    item = _trim(item, other.end, item.end)
+                if item is None:
+                    break
+
+        if item is not None:
+            latest[incoming] = item
+            entry = [item, incoming == 0]
+            held.append(entry)
+            if not entry[1]:
+                waiting.setdefault(incoming, []).append(entry)
+        # Lower-priority items have now met the next item of a better source
+        for priority in [priority for priority in waiting if priority > incoming]:
+            for entry in waiting.pop(priority):
+                entry[1] = True
+        while held and held[0][1]:
+            yield held.popleft()[0]
+    for entry in held:
+        yield entry[0]
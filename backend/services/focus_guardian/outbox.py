@@ -0,0 +1,317 @@
+# =============================================================================
+# outbox.py - Replay of JSON-Fallback Sessions into SQLite
+# =============================================================================
+"""
+Treats the fallback log as an outbox.
+
+Sessions the database rejected sit in focus_logs until a background task
+finds the database writable again and replays them with
+DatabaseManager.replay_activity_logs: batches of outbox_batch_size records,
+one transaction each, skipping any source_key already stored. After each
+committed batch the per-file drain position is saved to focus_logs/outbox.json
+(byte offset for JSONL segments, entry count for legacy JSON arrays), so a
+crash between commit and checkpoint only replays work the unique key then
+ignores. Failed attempts back off exponentially up to outbox_max_backoff.
+
+Outbox depth and the age of the oldest pending session are measured after
+every pass and reported by stats() for health checks and alerting.
+
+Retention calls expire() so fallback files do not keep window titles past
+their horizon: a file of an older day is deleted once its cursor shows it was
+fully replayed (the database copy is then scrubbed or pruned like any other
+row). Files still pending stay until a later pass finds them drained.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.focus_guardian.fallback_log import JsonlActivityLog
+
+logger = logging.getLogger(__name__)
+
+ReplaySink = Callable[[List[Dict[str, Any]]], Awaitable[int]]
+
+CURSOR_FILE = "outbox.json"
+
+def source_key(user_id: str, start: datetime, app_name: str, window_title: str) -> str:
+    """Stable identity of a fallback session, stored in activity_logs.source_key."""
+    raw = "\x1f".join((user_id, start.isoformat(), app_name, window_title))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def entry_to_record(entry: Dict[str, Any], default_user: str) -> Optional[Dict[str, Any]]:
+    """Fallback entry -> replay_activity_logs record, or None if it cannot be parsed."""
+    try:
+        start = datetime.fromisoformat(entry["start_time"])
+        end = datetime.fromisoformat(entry["end_time"])
+        duration = float(entry.get("duration_seconds") or 0.0)
+    except (KeyError, TypeError, ValueError):
+        return None
+    user_id = entry.get("user_id") or default_user
+    app_name = entry.get("app") or "Unknown"
+    window_title = entry.get("title") or ""
+    return {
+        "user_id": user_id,
+        "app_name": app_name,
+        "window_title": window_title,
+        "start_time": start,
+        "end_time": end,
+        "duration_seconds": duration,
+        "tag": entry.get("tag") or "Untagged",
+        "productivity_score": entry.get("productivity_score") or 0.0,
+        "source_key": source_key(user_id, start, app_name, window_title)
+    }
+
+class FallbackOutbox:
+    """Background drain of the fallback log into the database."""
+
+    def __init__(
+        self,
+        log: JsonlActivityLog,
+        sink: ReplaySink,
+        default_user: str = "default",
+        batch_size: int = 500,
+        interval: float = 30.0,
+        max_backoff: float = 300.0
+    ):
+        self.log = log
+        self.sink = sink
+        self.default_user = default_user
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.max_backoff = max(interval, max_backoff)
+
+        self._cursors: Optional[Dict[str, int]] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drain_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Observability
+        self.pending = 0
+        self.oldest_pending: Optional[datetime] = None
+        self.replayed_rows = 0
+        self.duplicate_rows = 0
+        self.skipped_entries = 0
+        self.drains = 0
+        self.failed_drains = 0
+        self.last_error: Optional[str] = None
+        self.last_drained_at: Optional[float] = None
+        self._delay = interval
+
+    @property
+    def cursor_path(self) -> Path:
+        return self.log.log_dir / CURSOR_FILE
+
+    async def start(self):
+        """Measure what is pending and start the background drain."""
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._drain_lock = asyncio.Lock()
+            await asyncio.to_thread(self._measure)
+            self._task = asyncio.create_task(self._drain_loop())
+
+    def notify(self):
+        """Sessions were just written to the fallback log: re-measure on the next pass."""
+        self.pending = max(self.pending, 1)
+
+    async def stop(self):
+        if self._task:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+    async def _drain_loop(self):
+        while not self._stopping:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                if self._stopping or not self.pending:
+                    continue
+                try:
+                    await self.drain()
+                    self._delay = self.interval
+                except Exception as e:
+                    # Database still unavailable: try again later, less often
+                    self.failed_drains += 1
+                    self.last_error = str(e)
+                    self._delay = min(self._delay * 2, self.max_backoff)
+                    logger.warning(f"⚠️ Outbox drain failed, retrying in {self._delay:.0f}s: {e}")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Outbox loop error: {e}")
+                await asyncio.sleep(1)
+
+    async def drain(self) -> int:
+        """Replay everything pending, batch by batch. Returns rows inserted."""
+        if self._drain_lock is None:
+            self._drain_lock = asyncio.Lock()
+
+        async with self._drain_lock:
+            inserted = 0
+            try:
+                while True:
+                    batch, checkpoint = await asyncio.to_thread(self._next_batch)
+                    if checkpoint is None:
+                        break
+                    if batch:
+                        rows = await self.sink(batch)
+                        inserted += rows
+                        self.replayed_rows += rows
+                        self.duplicate_rows += len(batch) - rows
+                    await asyncio.to_thread(self._save_cursor, *checkpoint)
+            finally:
+                await asyncio.to_thread(self._measure)
+            self.drains += 1
+            self.last_error = None
+            self.last_drained_at = time.time()
+            if inserted:
+                logger.info(f"📮 Replayed {inserted} fallback sessions into the database")
+            return inserted
+
+    async def expire(self, before: date) -> int:
+        """Delete fully replayed fallback files of days before `before`; returns files removed."""
+        if self._drain_lock is None:
+            self._drain_lock = asyncio.Lock()
+
+        async with self._drain_lock:
+            removed = await asyncio.to_thread(self._expire, before)
+        if removed:
+            logger.info(f"🧹 Expired {removed} replayed fallback log files")
+        return removed
+
+    # ===== FILE STATE (runs in a worker thread) =====
+
+    def _load_cursors(self) -> Dict[str, int]:
+        if self._cursors is None:
+            try:
+                with open(self.cursor_path, "r", encoding="utf-8") as f:
+                    self._cursors = {name: int(position) for name, position in json.load(f).items()}
+            except FileNotFoundError:
+                self._cursors = {}
+            except (OSError, ValueError) as e:
+                # Replay is idempotent, so starting over is safe
+                logger.error(f"Unreadable outbox cursor file, replaying from the start: {e}")
+                self._cursors = {}
+        return self._cursors
+
+    def _save_cursor(self, name: str, position: int):
+        self._load_cursors()[name] = position
+        self._write_cursors()
+
+    def _write_cursors(self):
+        cursors = self._load_cursors()
+        temporary = self.cursor_path.with_suffix(".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(cursors, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.cursor_path)
+
+    def _expire(self, before: date) -> int:
+        cursors = self._load_cursors()
+
+        def drained(path: Path) -> bool:
+            if path.suffix == ".json":
+                # An unreadable legacy file reads as empty: never treat it as drained
+                return 0 < len(self._legacy_entries(path)) <= cursors.get(path.name, 0)
+            return path.stat().st_size <= cursors.get(path.name, 0)
+
+        removed = self.log.remove_days_before(before, drained)
+        if removed:
+            for path in removed:
+                cursors.pop(path.name, None)
+            self._write_cursors()
+        return len(removed)
+
+    def _next_batch(self) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """
+        The next batch of pending records and the (file name, position) to
+        checkpoint once it is committed; (_, None) when nothing is pending.
+        """
+        cursors = self._load_cursors()
+        for legacy in self.log.legacy_files():
+            entries = self._legacy_entries(legacy)
+            done = cursors.get(legacy.name, 0)
+            if done < len(entries):
+                chunk = entries[done:done + self.batch_size]
+                return self._to_records(chunk), (legacy.name, done + len(chunk))
+        for segment in self.log.all_segments():
+            offset = cursors.get(segment.name, 0)
+            if offset < segment.stat().st_size:
+                entries, position = self.log.read_from(segment, offset, self.batch_size)
+                if position > offset:
+                    return self._to_records(entries), (segment.name, position)
+        return [], None
+
+    def _legacy_entries(self, path: Path) -> List[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, list) else []
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read legacy JSON log {path.name}: {e}")
+            return []
+
+    def _to_records(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        records = []
+        for entry in entries:
+            record = entry_to_record(entry, self.default_user)
+            if record is None:
+                self.skipped_entries += 1
+            else:
+                records.append(record)
+        return records
+
+    def _measure(self):
+        """Count pending entries and find the oldest one (by end_time)."""
+        cursors = self._load_cursors()
+        pending = 0
+        oldest: Optional[datetime] = None
+
+        def consider(entries: List[Dict[str, Any]]):
+            nonlocal pending, oldest
+            pending += len(entries)
+            for entry in entries:
+                try:
+                    ended = datetime.fromisoformat(entry["end_time"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if oldest is None or ended < oldest:
+                    oldest = ended
+
+        for legacy in self.log.legacy_files():
+            consider(self._legacy_entries(legacy)[cursors.get(legacy.name, 0):])
+        for segment in self.log.all_segments():
+            offset = cursors.get(segment.name, 0)
+            if offset < segment.stat().st_size:
+                consider(self.log.read_from(segment, offset, float("inf"))[0])
+        self.pending, self.oldest_pending = pending, oldest
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "oldest_pending_age_seconds": (
+                round((datetime.now() - self.oldest_pending).total_seconds(), 1) if self.oldest_pending else 0.0
+            ),
+            "replayed_rows": self.replayed_rows,
+            "duplicate_rows": self.duplicate_rows,
+            "skipped_entries": self.skipped_entries,
+            "drains": self.drains,
+            "failed_drains": self.failed_drains,
+            "last_error": self.last_error,
+            "last_drained_at": datetime.fromtimestamp(self.last_drained_at).isoformat() if self.last_drained_at else None,
+            "retry_delay_seconds": self._delay
+        }
@@ -16,7 +16,7 @@ from typing import Dict, Any, Optional
 from plyer import notification
 
 from config.settings import settings
-from models.database import db_manager
+from models.database import async_db
 
 logger = logging.getLogger(__name__)
 
@@ -279,7 +279,7 @@ class PomodoroService:
         """Create new pomodoro session in database."""
         try:
             planned_duration = self.seconds_left
-            session = db_manager.create_pomodoro_session(
+            session = await async_db.create_pomodoro_session(
                 user_id=self.current_user_id,
                 phase=self.phase,
                 planned_duration=planned_duration,
@@ -302,7 +302,7 @@ class PomodoroService:
             elapsed = (datetime.utcnow() - self.session_start_time).total_seconds()
             actual_duration = int(elapsed)
             
-            db_manager.update_pomodoro_session(
+            await async_db.update_pomodoro_session(
                 self.current_session_id,
                 actual_duration=actual_duration
             )
@@ -318,19 +318,21 @@ class PomodoroService:
             return
         
         try:
+            ended_at = datetime.utcnow()
             elapsed = 0
             if self.session_start_time:
-                elapsed = (datetime.utcnow() - self.session_start_time).total_seconds()
+                elapsed = (ended_at - self.session_start_time).total_seconds()
             
-            db_manager.update_pomodoro_session(
+            await async_db.update_pomodoro_session(
                 self.current_session_id,
                 actual_duration=int(elapsed),
                 completed=completed,
                 skipped=skipped,
-                end_time=datetime.utcnow()
+                end_time=ended_at
             )
             
             logger.debug(f"Completed session {self.current_session_id} (completed={completed}, skipped={skipped})")
+            await self._emit_session_completed_event(int(elapsed), completed, skipped, ended_at)
             
             # Reset session tracking
             self.current_session_id = None
@@ -390,6 +392,32 @@ class PomodoroService:
         except Exception as e:
             logger.error(f"Failed to trigger achievement: {e}")
     
+    # ===== EVENT BUS INTEGRATION =====
+    
+    async def _emit_session_completed_event(self, duration: int, completed: bool, skipped: bool, ended_at: datetime):
+        """Emit POMODORO_COMPLETED (current status plus the ended session) for rollups and clients."""
+        try:
+            from services.event_bus import event_bus, EventTypes
+            
+            await event_bus.emit_async(
+                EventTypes.POMODORO_COMPLETED,
+                {
+                    **await self.get_status(),
+                    "completed_session": {
+                        "session_id": self.current_session_id,
+                        "user_id": self.current_user_id,
+                        "phase": self.phase,
+                        "duration_seconds": duration,
+                        "completed": completed,
+                        "skipped": skipped,
+                        "ended_at": ended_at.isoformat()
+                    }
+                },
+                source="pomodoro"
+            )
+        except Exception as e:
+            logger.error(f"Failed to emit pomodoro completed event: {e}")
+    
     # ===== WEBSOCKET INTEGRATION =====
     
     async def _send_websocket_update(self):
@@ -0,0 +1,104 @@
+# =============================================================================
+# probes.py - Non-blocking Platform Probes for Focus Tracking
+# =============================================================================
+"""
+Helpers that keep foreground-window probes off the asyncio event loop.
+
+External tools (xdotool, wmctrl, osascript) run as asyncio subprocesses that
+are killed when their deadline expires or the sample is cancelled. In-process
+probes that can block (Xlib, win32gui, psutil scans) run on a small bounded
+thread pool that refuses new work while all workers are stuck.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class ProbeBusyError(Exception):
+    """Raised when every probe worker is still occupied by an earlier probe."""
+
+async def run_probe(*argv: str, timeout: float = 2) -> Optional[str]:
+    """
+    Run an external probe command and return its stripped stdout.
+    Returns None on non-zero exit or timeout. The child is killed if the
+    deadline expires or the awaiting task is cancelled.
+    Raises FileNotFoundError if the command is not installed.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *argv,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.debug(f"Probe timed out after {timeout}s: {argv[0]}")
+        return None
+    finally:
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    if process.returncode != 0:
+        return None
+    return stdout.decode("utf-8", errors="replace").strip()
+
+class ProbeExecutor:
+    """Bounded thread pool for blocking in-process probes."""
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of probes currently occupying a worker thread."""
+        return self._in_flight
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Run `func` on a probe worker and await its result.
+        Cancelling the caller does not wait for the thread; the worker slot is
+        only released once the blocking call actually returns.
+        """
+        if self._in_flight >= self.max_workers:
+            raise ProbeBusyError(f"All {self.max_workers} probe workers are busy")
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="focus-probe"
+            )
+
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+
+        def on_done(_):
+            try:
+                loop.call_soon_threadsafe(self._release, executor)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+        self._in_flight += 1
+        future = executor.submit(func, *args)
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, executor: ThreadPoolExecutor):
+        # Ignore stragglers from an executor that was already shut down
+        if executor is self._executor:
+            self._in_flight -= 1
+
+    def shutdown(self):
+        """Stop accepting probes without waiting for stalled workers."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._in_flight = 0
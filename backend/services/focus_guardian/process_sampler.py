@@ -0,0 +1,135 @@
+# =============================================================================
+# process_sampler.py - Incremental Per-Process CPU Sampler
+# =============================================================================
+"""
+Persistent CPU sampler used by the Linux "most active process" fallback.
+
+psutil's cpu_percent() is always 0.0 on the first read of a fresh Process
+object, so rebuilding the process list every tick never produces a ranking.
+The sampler keeps Process handles keyed by (pid, create_time) across ticks,
+computes CPU deltas between samples, evicts processes that exited, re-checks
+create_time so a reused PID never inherits another process's baseline, and
+only resolves the name for PIDs it has not seen before.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+import psutil
+
+logger = logging.getLogger(__name__)
+
+ProcessKey = Tuple[int, float]  # (pid, create_time)
+
+@dataclass
+class ProcessActivity:
+    """CPU usage of one process over the last sampling interval."""
+    pid: int
+    name: str
+    cpu_percent: float
+
+@dataclass
+class _TrackedProcess:
+    process: psutil.Process
+    name: str
+    cpu_seconds: float
+
+class ProcessSampler:
+    """Tracks per-process CPU time between ticks to rank active processes."""
+
+    def __init__(self):
+        self._processes: Dict[ProcessKey, _TrackedProcess] = {}
+        self._keys_by_pid: Dict[int, ProcessKey] = {}
+        self._inaccessible: Set[int] = set()  # PIDs we may not inspect
+        self._last_sample: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracked_count(self) -> int:
+        """Number of processes currently holding a handle."""
+        return len(self._processes)
+
+    def sample(self) -> List[ProcessActivity]:
+        """
+        Take a sample and return processes sorted by CPU usage since the last one.
+        The very first call only establishes the baseline and returns [].
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_sample if self._last_sample is not None else None
+            self._last_sample = now
+
+            current_pids = set(psutil.pids())
+
+            # Evict processes that exited since the last tick
+            for pid in self._keys_by_pid.keys() - current_pids:
+                self._evict(pid)
+            self._inaccessible &= current_pids
+
+            activity = []
+            for pid in current_pids:
+                key = self._keys_by_pid.get(pid)
+                if key is None:
+                    if pid not in self._inaccessible:
+                        self._track(pid)
+                    continue
+
+                tracked = self._processes[key]
+                try:
+                    reused = psutil.Process(pid).create_time() != tracked.process.create_time()
+                    cpu = None if reused else tracked.process.cpu_times()
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    self._evict(pid)
+                    continue
+
+                if reused:
+                    # PID was reused by a new process - start a fresh baseline
+                    self._evict(pid)
+                    self._track(pid)
+                    continue
+
+                cpu_seconds = cpu.user + cpu.system
+                delta = cpu_seconds - tracked.cpu_seconds
+                tracked.cpu_seconds = cpu_seconds
+
+                if elapsed and delta > 0:
+                    activity.append(ProcessActivity(
+                        pid=pid,
+                        name=tracked.name,
+                        cpu_percent=delta / elapsed * 100
+                    ))
+
+            activity.sort(key=lambda proc: proc.cpu_percent, reverse=True)
+            return activity
+
+    def _track(self, pid: int):
+        """Start tracking a PID we have not seen before."""
+        try:
+            process = psutil.Process(pid)
+            with process.oneshot():
+                key = (pid, process.create_time())
+                name = process.name()
+                cpu = process.cpu_times()
+        except psutil.AccessDenied:
+            self._inaccessible.add(pid)
+            return
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return
+
+        self._processes[key] = _TrackedProcess(process=process, name=name, cpu_seconds=cpu.user + cpu.system)
+        self._keys_by_pid[pid] = key
+
+    def _evict(self, pid: int):
+        key = self._keys_by_pid.pop(pid, None)
+        if key is not None:
+            self._processes.pop(key, None)
+
+    def reset(self):
+        """Drop all handles and the baseline."""
+        with self._lock:
+            self._processes.clear()
+            self._keys_by_pid.clear()
+            self._inaccessible.clear()
+            self._last_sample = None
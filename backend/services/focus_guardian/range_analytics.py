@@ -0,0 +1,100 @@
+# =============================================================================
+# range_analytics.py - Multi-Day Analytics from Hourly Buckets
+# =============================================================================
+"""
+Week, month and arbitrary date-range analytics.
+
+Answers come from activity_hour_buckets (one row per user, hour, app and tag,
+maintained on ingest) rather than raw activity rows, so a 90-day dashboard
+reads a couple of thousand bucket rows instead of every logged session.
+"""
+
+import calendar
+from datetime import date, timedelta
+from typing import Any, Dict, Tuple
+
+from models.database import db_manager
+from services.focus_guardian.idle import IDLE_TAG
+
+MAX_RANGE_DAYS = 366
+TOP_APPS = 10
+
+def week_bounds(day: date) -> Tuple[date, date]:
+    """Monday..Sunday of the ISO week containing `day`."""
+    start = day - timedelta(days=day.weekday())
+    return start, start + timedelta(days=6)
+
+def month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """First..last day of a calendar month."""
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+def _percentage(part: float, whole: float) -> float:
+    return (part / whole * 100) if whole > 0 else 0.0
+
+def summarize_buckets(rows, start_day: date, end_day: date) -> Dict[str, Any]:
+    """Aggregate hour bucket rows into the range analytics payload."""
+    total = productive = weighted = idle = 0.0
+    sessions = 0
+    app_seconds: Dict[str, float] = {}
+    tag_seconds: Dict[str, float] = {}
+    hourly_seconds = [0.0] * 24
+    days: Dict[str, Dict[str, float]] = {}
+
+    for row in rows:
+        if row.tag == IDLE_TAG:
+            idle += row.total_seconds
+            continue
+        total += row.total_seconds
+        productive += row.productive_seconds
+        weighted += row.weighted_score
+        sessions += row.session_count
+        app_seconds[row.app_name] = app_seconds.get(row.app_name, 0.0) + row.total_seconds
+        tag_seconds[row.tag] = tag_seconds.get(row.tag, 0.0) + row.total_seconds
+        hourly_seconds[int(row.hour[11:13])] += row.total_seconds
+
+        day = days.setdefault(row.hour[:10], {"total": 0.0, "productive": 0.0, "weighted": 0.0})
+        day["total"] += row.total_seconds
+        day["productive"] += row.productive_seconds
+        day["weighted"] += row.weighted_score
+
+    daily_breakdown = []
+    for offset in range((end_day - start_day).days + 1):
+        key = (start_day + timedelta(days=offset)).isoformat()
+        day = days.get(key, {"total": 0.0, "productive": 0.0, "weighted": 0.0})
+        daily_breakdown.append({
+            "date": key,
+            "total_focused_time": int(day["total"]),
+            "productivity_percentage": _percentage(day["productive"], day["total"]),
+            "productivity_score": day["weighted"] / day["total"] if day["total"] > 0 else 0.0
+        })
+
+    return {
+        "start_date": start_day.isoformat(),
+        "end_date": end_day.isoformat(),
+        "days": len(daily_breakdown),
+        "total_focused_time": int(total),
+        "productive_time": int(productive),
+        "idle_time": int(idle),
+        "productivity_percentage": _percentage(productive, total),
+        "productivity_score": weighted / total if total > 0 else 0.0,
+        "session_count": sessions,
+        "top_apps": [
+            {"app": app, "time": seconds, "percentage": _percentage(seconds, total)}
+            for app, seconds in sorted(app_seconds.items(), key=lambda x: x[1], reverse=True)[:TOP_APPS]
+        ],
+        "tag_breakdown": [
+            {"tag": tag, "time": seconds, "percentage": _percentage(seconds, total)}
+            for tag, seconds in sorted(tag_seconds.items(), key=lambda x: x[1], reverse=True)
+        ],
+        "daily_breakdown": daily_breakdown,
+        "hourly_breakdown": [int(seconds / 60) for seconds in hourly_seconds],
+        "buckets_scanned": len(rows)
+    }
+
+def load_range_analytics(user_id: str, start_day: date, end_day: date) -> Dict[str, Any]:
+    """Read and summarise a user's buckets for [start_day, end_day] (blocking; run on the reader pool)."""
+    if end_day < start_day:
+        raise ValueError("end date is before start date")
+    if (end_day - start_day).days + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f"date range exceeds {MAX_RANGE_DAYS} days")
+    return summarize_buckets(db_manager.get_hour_buckets(user_id, start_day, end_day), start_day, end_day)
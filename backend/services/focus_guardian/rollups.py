@@ -0,0 +1,431 @@
+# =============================================================================
+# rollups.py - Incrementally Maintained Daily Analytics
+# =============================================================================
+"""
+Daily analytics rollups kept in the user_analytics table.
+
+Every finished activity session (ACTIVITY_LOGGED) and pomodoro focus session
+(POMODORO_COMPLETED) is folded into its day's rollup as it happens, so the
+analytics endpoint reads one row instead of re-reading and re-aggregating the
+day's raw logs on every call. Changed rollups are kept in memory and ride
+along with the tracker's next write-behind batch (one transaction instead of
+one commit per event); a slower timer persists changes no batch picked up,
+such as pomodoro-only updates. A day with no stored rollup is built once from
+the raw logs; rebuild_rollups() regenerates every rollup from scratch (see
+`python manage.py rebuild-rollups`).
+
+Stored rollups are eventually consistent with activity_logs, not in lockstep.
+A rollup is the day's running total, so whichever write carries it may count
+sessions whose rows are not stored yet: ones that ended after the batch was
+taken, any the timer flush runs ahead of, and batches the database rejected,
+which wait in the fallback log for the outbox while their rollups are written
+on the next flush. Every session is in the rollup once applied, and its raw
+row follows within a flush or an outbox replay.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from models.database import async_db, db_manager
+from services.focus_guardian.idle import IDLE_TAG
+
+logger = logging.getLogger(__name__)
+
+DISTRACTION_TAG = "❌ Distraction"
+PRODUCTIVE_SCORE = 0.6       # sessions scoring above this count as productive time
+FLOW_SESSION_SECONDS = 1800  # 30+ minute sessions count as flow
+TOP_APPS = 5
+ROLLUP_CACHE_DAYS = 16       # (user, day) rollups kept in memory
+
+RollupKey = Tuple[str, str]
+
+def local_day_of_utc(timestamp: datetime) -> str:
+    """Local YYYY-MM-DD of a naive UTC datetime (pomodoro rows are stored in UTC)."""
+    return timestamp.replace(tzinfo=timezone.utc).astimezone().strftime("%Y-%m-%d")
+
+def utc_bounds(day: date) -> Tuple[datetime, datetime]:
+    """Naive UTC [start, end) of a local day."""
+    start = datetime.combine(day, datetime.min.time())
+    end = datetime.combine(day + timedelta(days=1), datetime.min.time())
+    return (
+        start.astimezone(timezone.utc).replace(tzinfo=None),
+        end.astimezone(timezone.utc).replace(tzinfo=None)
+    )
+
+def _top(seconds_by_app: Dict[str, float]) -> Optional[str]:
+    return max(seconds_by_app, key=seconds_by_app.get) if seconds_by_app else None
+
+class DailyRollup:
+    """One user's analytics for one day, updated one session at a time."""
+
+    def __init__(self):
+        self.session_count = 0
+        self.distraction_count = 0
+        self.flow_sessions = 0
+        self.pomodoro_sessions = 0
+        self.completed_pomodoros = 0
+        self.app_seconds: Dict[str, float] = {}
+        self.productive_app_seconds: Dict[str, float] = {}
+        self.distraction_app_seconds: Dict[str, float] = {}
+        self.hourly_minutes: List[int] = [0] * 24
+
+    def add_session(self, app: str, tag: Optional[str], duration: float, productivity_score: Optional[float], start: datetime):
+        """Fold one activity session in (idle time is not focus time)."""
+        if tag == IDLE_TAG:
+            return
+        self.session_count += 1
+        self.app_seconds[app] = self.app_seconds.get(app, 0.0) + duration
+        if (productivity_score or 0) > PRODUCTIVE_SCORE:
+            self.productive_app_seconds[app] = self.productive_app_seconds.get(app, 0.0) + duration
+        if tag == DISTRACTION_TAG:
+            self.distraction_count += 1
+            self.distraction_app_seconds[app] = self.distraction_app_seconds.get(app, 0.0) + duration
+        if duration > FLOW_SESSION_SECONDS:
+            self.flow_sessions += 1
+        self.hourly_minutes[start.hour] += int(duration / 60)
+
+    def add_app_totals(self, row):
+        """Fold in one app's pre-aggregated totals (a get_activity_aggregates app row)."""
+        self.session_count += row.sessions
+        self.distraction_count += row.distraction_count
+        self.flow_sessions += row.flow_sessions
+        self.app_seconds[row.app_name] = self.app_seconds.get(row.app_name, 0.0) + row.seconds
+        if row.productive_seconds:
+            self.productive_app_seconds[row.app_name] = self.productive_app_seconds.get(row.app_name, 0.0) + row.productive_seconds
+        if row.distraction_seconds:
+            self.distraction_app_seconds[row.app_name] = self.distraction_app_seconds.get(row.app_name, 0.0) + row.distraction_seconds
+
+    def add_pomodoro(self, completed: bool, skipped: bool):
+        """Fold one ended focus pomodoro in."""
+        self.pomodoro_sessions += 1
+        if completed and not skipped:
+            self.completed_pomodoros += 1
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.app_seconds.values())
+
+    @property
+    def productive_seconds(self) -> float:
+        return sum(self.productive_app_seconds.values())
+
+    @property
+    def productivity_percentage(self) -> float:
+        total = self.total_seconds
+        return self.productive_seconds / total * 100 if total > 0 else 0.0
+
+    def to_analytics(self) -> Dict[str, Any]:
+        """The /api/focus/analytics payload."""
+        total = self.total_seconds
+        top_apps = [
+            {"app": app, "time": seconds, "percentage": (seconds / total) * 100}
+            for app, seconds in sorted(self.app_seconds.items(), key=lambda x: x[1], reverse=True)[:TOP_APPS]
+        ] if total > 0 else []
+        return {
+            "total_focused_time": int(total),
+            "productivity_percentage": self.productivity_percentage,
+            "top_apps": top_apps,
+            "hourly_breakdown": list(self.hourly_minutes),
+            "distraction_count": self.distraction_count,
+            "flow_sessions": self.flow_sessions
+        }
+
+    def to_row(self) -> Dict[str, Any]:
+        """user_analytics column values."""
+        return {
+            "total_focus_time": int(self.total_seconds),
+            "productive_time": int(self.productive_seconds),
+            "distraction_time": int(sum(self.distraction_app_seconds.values())),
+            "pomodoro_sessions": self.pomodoro_sessions,
+            "completed_pomodoros": self.completed_pomodoros,
+            "productivity_percentage": self.productivity_percentage,
+            "top_productive_app": _top(self.productive_app_seconds),
+            "top_distraction_app": _top(self.distraction_app_seconds),
+            "session_count": self.session_count,
+            "distraction_count": self.distraction_count,
+            "flow_sessions": self.flow_sessions,
+            "app_seconds": dict(self.app_seconds),
+            "productive_app_seconds": dict(self.productive_app_seconds),
+            "distraction_app_seconds": dict(self.distraction_app_seconds),
+            "hourly_minutes": list(self.hourly_minutes)
+        }
+
+    @classmethod
+    def from_row(cls, row) -> "DailyRollup":
+        rollup = cls()
+        rollup.session_count = row.session_count or 0
+        rollup.distraction_count = row.distraction_count or 0
+        rollup.flow_sessions = row.flow_sessions or 0
+        rollup.pomodoro_sessions = row.pomodoro_sessions or 0
+        rollup.completed_pomodoros = row.completed_pomodoros or 0
+        rollup.app_seconds = dict(row.app_seconds or {})
+        rollup.productive_app_seconds = dict(row.productive_app_seconds or {})
+        rollup.distraction_app_seconds = dict(row.distraction_app_seconds or {})
+        rollup.hourly_minutes = list(row.hourly_minutes or [0] * 24)
+        return rollup
+
+# ===== BUILDING FROM RAW LOGS =====
+
+def _activity_aggregates(user_id: Optional[str] = None, day: Optional[date] = None, before: Optional[datetime] = None):
+    return db_manager.get_activity_aggregates(
+        user_id, day, before,
+        exclude_tag=IDLE_TAG,
+        productive_score=PRODUCTIVE_SCORE,
+        distraction_tag=DISTRACTION_TAG,
+        flow_seconds=FLOW_SESSION_SECONDS
+    )
+
+def build_daily_rollup(
+    user_id: str,
+    day: date,
+    activity_before: Optional[datetime] = None,
+    pomodoro_before: Optional[datetime] = None
+) -> DailyRollup:
+    """
+    Build one day's rollup from SQL aggregates over the raw logs. The
+    *_before bounds exclude the session whose event triggered the build,
+    which is applied on top.
+    """
+    rollup = DailyRollup()
+    app_rows, hour_rows = _activity_aggregates(user_id, day, activity_before)
+    for row in app_rows:
+        rollup.add_app_totals(row)
+    for row in hour_rows:
+        rollup.hourly_minutes[row.hour] += row.minutes
+
+    since, until = utc_bounds(day)
+    if pomodoro_before is not None:
+        until = min(until, pomodoro_before)
+    for row in db_manager.get_finished_focus_pomodoros(user_id, since, until):
+        rollup.add_pomodoro(row.completed, row.skipped)
+    return rollup
+
+def rebuild_rollups(user_id: Optional[str] = None) -> int:
+    """
+    Regenerate all rollups (or one user's) from raw activity and pomodoro
+    rows, replacing what is stored. Days older than the raw-log retention
+    horizon keep their stored rollups, since their raw rows are gone.
+    Returns the number of days written.
+    """
+    from services.retention import raw_retention_horizon
+
+    horizon = raw_retention_horizon()
+    rollups: Dict[RollupKey, DailyRollup] = defaultdict(DailyRollup)
+    app_rows, hour_rows = _activity_aggregates(user_id)
+    for row in app_rows:
+        rollups[(row.user_id, row.day_key)].add_app_totals(row)
+    for row in hour_rows:
+        rollups[(row.user_id, row.day_key)].hourly_minutes[row.hour] += row.minutes
+    for row in db_manager.get_finished_focus_pomodoros(user_id):
+        rollups[(row.user_id, local_day_of_utc(row.end_time))].add_pomodoro(row.completed, row.skipped)
+
+    horizon_key = horizon.isoformat() if horizon else None
+    return db_manager.save_daily_rollups(
+        {key: rollup.to_row() for key, rollup in rollups.items() if horizon_key is None or key[1] >= horizon_key},
+        replace_user=user_id,
+        replace_all=user_id is None,
+        keep_before=horizon_key
+    )
+
+# ===== AGGREGATOR =====
+
+class RollupAggregator:
+    """
+    Applies session events to daily rollups and serves analytics from them.
+    Recent days stay in memory; changed days are marked dirty and written in
+    batches (take_dirty() for the activity write-behind flush, flush() on a
+    timer and at shutdown), never once per event.
+    """
+
+    def __init__(self, cache_days: int = ROLLUP_CACHE_DAYS, flush_interval: float = 30.0):
+        self.cache_days = cache_days
+        self.flush_interval = flush_interval
+        self._cache: "OrderedDict[RollupKey, DailyRollup]" = OrderedDict()
+        self._dirty: Dict[RollupKey, DailyRollup] = {}  # changed since last persisted (survives cache eviction)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._subscribed = False
+        self.sessions_applied = 0
+        self.pomodoros_applied = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.builds = 0
+        self.flushes = 0
+        self.failures = 0
+
+    async def start(self):
+        """Subscribe to session events and start the flush timer (idempotent)."""
+        if not self._subscribed:
+            from services.event_bus import event_bus, EventTypes
+
+            event_bus.subscribe_async(EventTypes.ACTIVITY_LOGGED, self.on_activity_logged)
+            event_bus.subscribe_async(EventTypes.POMODORO_COMPLETED, self.on_pomodoro_completed)
+            self._subscribed = True
+            logger.info("📊 Daily rollup aggregator subscribed to session events")
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush timer and persist whatever is still dirty."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final rollup flush failed: {e}")
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Rollup flush failed: {e}")
+
+    async def on_activity_logged(self, event):
+        data = event.data
+        if data.get("tag") == IDLE_TAG:
+            return
+        try:
+            start = datetime.fromisoformat(data["start_time"])
+            key = (data["user_id"], start.strftime("%Y-%m-%d"))
+            async with self._lock:
+                rollup = await self._load(key, activity_before=start)
+                rollup.add_session(
+                    data["app_name"], data.get("tag"), data["duration_seconds"],
+                    data.get("productivity_score"), start
+                )
+                self._dirty[key] = rollup
+                self.sessions_applied += 1
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Failed to apply activity to daily rollup: {e}")
+
+    async def on_pomodoro_completed(self, event):
+        session = event.data.get("completed_session")
+        if not session or session.get("phase") != "Focus":
+            return
+        try:
+            ended_at = datetime.fromisoformat(session["ended_at"])
+            key = (session["user_id"], local_day_of_utc(ended_at))
+            async with self._lock:
+                rollup = await self._load(key, pomodoro_before=ended_at)
+                rollup.add_pomodoro(session.get("completed", False), session.get("skipped", False))
+                self._dirty[key] = rollup
+                self.pomodoros_applied += 1
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Failed to apply pomodoro to daily rollup: {e}")
+
+    async def get_analytics(self, user_id: str, day: date) -> Dict[str, Any]:
+        """Analytics for one user/day from the rollup."""
+        key = (user_id, day.isoformat())
+        async with self._lock:
+            rollup = self._cached(key)
+            if rollup is not None:
+                return rollup.to_analytics()
+
+            row = await async_db.get_daily_rollup(*key)
+            if row is not None:
+                rollup = DailyRollup.from_row(row)
+                self._remember(key, rollup)
+                return rollup.to_analytics()
+
+            rollup = await async_db.read(build_daily_rollup, user_id, day)
+            self.builds += 1
+            if day < date.today():
+                # Past days are final; today's rollup is created by its first event
+                await async_db.save_daily_rollups({key: rollup.to_row()})
+                self._remember(key, rollup)
+            return rollup.to_analytics()
+
+    async def _load(self, key: RollupKey, **before) -> DailyRollup:
+        rollup = self._cached(key)
+        if rollup is None:
+            row = await async_db.get_daily_rollup(*key)
+            if row is not None:
+                rollup = DailyRollup.from_row(row)
+            else:
+                rollup = await async_db.read(build_daily_rollup, key[0], date.fromisoformat(key[1]), **before)
+                self.builds += 1
+            self._remember(key, rollup)
+        return rollup
+
+    def take_dirty(self) -> Dict[RollupKey, DailyRollup]:
+        """
+        Hand over every rollup changed since the last write; the caller
+        persists them (to_row()) or gives them back with restore_dirty().
+        """
+        dirty, self._dirty = self._dirty, {}
+        return dirty
+
+    def restore_dirty(self, rollups: Dict[RollupKey, DailyRollup]):
+        """Mark rollups whose write failed as dirty again."""
+        for key, rollup in rollups.items():
+            self._dirty.setdefault(key, rollup)
+
+    async def flush(self) -> int:
+        """Persist dirty rollups that no activity batch has carried yet."""
+        dirty = self.take_dirty()
+        if not dirty:
+            return 0
+        try:
+            await async_db.save_daily_rollups({key: rollup.to_row() for key, rollup in dirty.items()})
+        except Exception:
+            self.failures += 1
+            self.restore_dirty(dirty)
+            raise
+        self.flushes += 1
+        return len(dirty)
+
+    def _cached(self, key: RollupKey) -> Optional[DailyRollup]:
+        rollup = self._cache.get(key)
+        if rollup is None:
+            # Evicted from the LRU before its changes were written
+            rollup = self._dirty.get(key)
+            if rollup is not None:
+                self._remember(key, rollup)
+        if rollup is None:
+            self.cache_misses += 1
+        else:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+        return rollup
+
+    def _remember(self, key: RollupKey, rollup: DailyRollup):
+        self._cache[key] = rollup
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_days:
+            self._cache.popitem(last=False)
+
+    def reset(self):
+        """Drop cached rollups (after an out-of-band rebuild)."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "subscribed": self._subscribed,
+            "cached_days": len(self._cache),
+            "dirty_days": len(self._dirty),
+            "flushes": self.flushes,
+            "sessions_applied": self.sessions_applied,
+            "pomodoros_applied": self.pomodoros_applied,
+            "builds_from_raw_logs": self.builds,
+            "failures": self.failures,
+            "cache_hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0
+        }
+
+# Global rollup aggregator instance
+rollup_aggregator = RollupAggregator(flush_interval=settings.rollup_flush_interval)
@@ -0,0 +1,50 @@
+# =============================================================================
+# scheduler.py - Adaptive Foreground Sampling Interval
+# =============================================================================
+"""
+Picks the delay before the next foreground sample in polling mode.
+
+Window switches cluster: after one switch the user is likely tab-hopping, so
+the next few samples come at the minimum interval. While the foreground stays
+the same the interval grows geometrically toward the ceiling, which removes
+most samples from long stable stretches while bounding how late a switch
+after a quiet period can be noticed.
+"""
+
+from typing import Any, Dict
+
+class AdaptiveInterval:
+    """Multiplicative backoff on stable samples, reset to the floor on a switch."""
+
+    def __init__(self, min_interval: float, max_interval: float, backoff: float):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = max(backoff, 1.0)
+        self.current = min_interval
+        self.samples = 0
+        self.changes = 0
+
+    def next_delay(self, changed: bool) -> float:
+        """Record one sample and return the delay before the next one."""
+        self.samples += 1
+        if changed:
+            self.changes += 1
+            self.current = self.min_interval
+        else:
+            self.current = min(self.current * self.backoff, self.max_interval)
+        return self.current
+
+    def reset(self):
+        """Start over at the floor (monitoring restarted, user came back)."""
+        self.current = self.min_interval
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "current_interval": round(self.current, 3),
+            "effective_rate_hz": round(1 / self.current, 3) if self.current > 0 else None,
+            "min_interval": self.min_interval,
+            "max_interval": self.max_interval,
+            "backoff": self.backoff,
+            "samples": self.samples,
+            "changes": self.changes
+        }
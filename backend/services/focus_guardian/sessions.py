@@ -0,0 +1,101 @@
+# =============================================================================
+# sessions.py - Window Identity Canonicalisation and Session Coalescing
+# =============================================================================
+"""
+Separates a window's stable identity from volatile display decoration.
+
+Window titles carry parts that change without the user switching anything:
+clocks, unread counters, CPU percentages from the process fallback. Comparing
+raw titles turns each of those ticks into a new session, activity row,
+WINDOW_CHANGED event and WebSocket broadcast. Session boundaries are decided
+on the canonical identity instead, and consecutive samples of one identity
+are coalesced into a single session as long as they are no further apart
+than the configured gap.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Trailing clock decoration, e.g. "Editor | code | 14:05" or "Monitor - 14:05:33"
+_TRAILING_CLOCK = re.compile(r"\s*[|\-–]\s*\d{1,2}:\d{2}(?::\d{2})?(?:\s*[ap]m)?\s*$", re.IGNORECASE)
+
+# Volatile fragments removed from the identity key only
+_VOLATILE_PATTERNS = [
+    re.compile(r"^\s*[(\[]\d+[)\]]\s*"),                                   # "(3) Inbox"
+    re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?(?:\s*[ap]m)?\b", re.IGNORECASE),  # clocks
+    re.compile(r"\(\s*\d+(?:\.\d+)?%\s*cpu\s*\)", re.IGNORECASE),           # "(12.5% CPU)"
+]
+_WHITESPACE = re.compile(r"\s+")
+
+WindowKey = Tuple[str, str]
+
+@dataclass(frozen=True)
+class CanonicalWindow:
+    """A foreground sample split into display title and stable identity."""
+    app: Optional[str]
+    title: Optional[str]  # display title without trailing clock decoration
+    key: WindowKey        # identity used for session boundaries
+
+def canonicalize(app: Optional[str], title: Optional[str]) -> CanonicalWindow:
+    """Canonicalise a raw (app, title) sample."""
+    display = _TRAILING_CLOCK.sub("", title).strip() if title else title
+
+    normalized = display or ""
+    for pattern in _VOLATILE_PATTERNS:
+        normalized = pattern.sub(" ", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip().lower()
+
+    return CanonicalWindow(app=app, title=display, key=((app or "").lower(), normalized))
+
+class SessionCoalescer:
+    """
+    Decides where sessions begin and end.
+    Samples of the same identity extend the open session while each one
+    arrives within `max_gap` seconds of the previous sample; a different
+    identity, or a longer silence (sleep, suspended sampling), closes it.
+    """
+
+    def __init__(self, max_gap: float):
+        self.max_gap = max_gap
+        self._key: Optional[WindowKey] = None
+        self._last_seen: Optional[float] = None
+        self.samples = 0
+        self.coalesced = 0
+        self.boundaries = 0
+
+    def observe(self, window: CanonicalWindow, timestamp: float) -> Optional[float]:
+        """
+        Feed one sample.
+        Returns None if it extends the open session, otherwise the time at
+        which the open session ended (a new one starts at `timestamp`).
+        """
+        self.samples += 1
+
+        if (
+            window.key == self._key
+            and self._last_seen is not None
+            and timestamp - self._last_seen <= self.max_gap
+        ):
+            self._last_seen = timestamp
+            self.coalesced += 1
+            return None
+
+        # Same identity after a long gap ends at the last sample we saw
+        ended_at = self._last_seen if window.key == self._key and self._last_seen is not None else timestamp
+        self._key = window.key
+        self._last_seen = timestamp
+        self.boundaries += 1
+        return ended_at
+
+    def reset(self):
+        self._key = None
+        self._last_seen = None
+
+    def stats(self):
+        return {
+            "samples": self.samples,
+            "coalesced_samples": self.coalesced,
+            "session_boundaries": self.boundaries,
+            "max_gap_seconds": self.max_gap
+        }
@@ -14,9 +14,10 @@ import json
 import logging
 import platform
 import time
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Any
 import psutil
 
 # Platform-specific imports
@@ -28,10 +29,32 @@ except ImportError:
     HAS_WIN32 = False
 
 from config.settings import settings
-from models.database import db_manager
+from models.database import LogCursor, async_db, db_manager, decode_log_cursor, encode_log_cursor
+from services.focus_guardian.analyzer import ClassificationCache, analyzer
+from services.focus_guardian.day_cache import activity_day_cache
+from services.focus_guardian.fallback_log import JsonlActivityLog
+from services.focus_guardian.log_merge import LogItem, merge_logs
+from services.focus_guardian.outbox import FallbackOutbox
+from services.focus_guardian.idle import (
+    IDLE_APP, IDLE_TAG, IDLE_TITLE, IdleSource, IdleSourceError, create_idle_source
+)
+from services.focus_guardian.process_sampler import ProcessSampler
+from services.focus_guardian.probes import ProbeExecutor, ProbeBusyError, run_probe
+from services.focus_guardian.range_analytics import load_range_analytics
+from services.focus_guardian.rollups import rollup_aggregator
+from services.focus_guardian.scheduler import AdaptiveInterval
+from services.focus_guardian.sessions import SessionCoalescer, canonicalize
+from services.focus_guardian.write_behind import WriteBehindQueue
+from services.retention import raw_retention_horizon, retention_manager
+from services.focus_guardian.window_sources import (
+    WindowSource, XdotoolWindowSource, X11ChangeWatcher, WindowSourceError,
+    create_window_source, create_change_watcher
+)
 
 logger = logging.getLogger(__name__)
 
+NDJSON_BATCH_SIZE = 500  # merged logs encoded per streamed chunk
+
 class ActivityTracker:
     """
     Modernized focus tracking service.
@@ -49,6 +72,59 @@ class ActivityTracker:
         self.current_start_time: Optional[float] = None
         self.current_user_id: str = "default"  # TODO: Get from auth
         
+        # Idle state: sampling is suspended while the user is away
+        self.is_idle = False
+        self.idle_since: Optional[float] = None
+        self._idle_source: Optional[IdleSource] = None
+        
+        # Linux window source (persistent X11 connection or xdotool)
+        self._window_source: Optional[WindowSource] = None
+        self._fallback_window_source: Optional[WindowSource] = None
+        self._change_watcher: Optional[X11ChangeWatcher] = None
+        
+        # Bounded pool for blocking probes (Xlib, win32gui, psutil scans)
+        self._probe_executor = ProbeExecutor(max_workers=settings.focus_probe_workers)
+        self._process_sampler = ProcessSampler()
+        
+        # Memoised (tag, base score) per (app, title)
+        self._classification_cache = ClassificationCache(analyzer, settings.classification_cache_size)
+        
+        # Session boundaries follow canonical window identity, not raw titles
+        self._coalescer = SessionCoalescer(max_gap=settings.focus_coalesce_gap)
+        
+        # Polling-mode sample spacing: fast after a switch, slower while stable
+        self._interval = AdaptiveInterval(
+            settings.focus_min_interval,
+            settings.focus_max_interval,
+            settings.focus_interval_backoff
+        )
+        
+        # Append-only JSONL store for sessions the database rejects
+        self._fallback_log = JsonlActivityLog(
+            self.log_dir,
+            segment_bytes=settings.focus_log_segment_bytes,
+            index_stride=settings.focus_log_index_stride,
+            fsync=settings.focus_log_fsync
+        )
+        
+        # Replays the fallback log into the database once it accepts writes again
+        self._outbox = FallbackOutbox(
+            self._fallback_log,
+            async_db.replay_activity_logs,
+            default_user=self.current_user_id,
+            batch_size=settings.outbox_batch_size,
+            interval=settings.outbox_drain_interval,
+            max_backoff=settings.outbox_max_backoff
+        )
+        
+        # Finished sessions are persisted in batches off the event loop
+        self._writer = WriteBehindQueue(
+            self._persist_records,
+            flush_size=settings.activity_flush_size,
+            flush_interval=settings.activity_flush_interval,
+            fallback=self._save_records_to_json_log
+        )
+        
         # Background task
         self._monitoring_task: Optional[asyncio.Task] = None
         self._lock = asyncio.Lock()
@@ -57,12 +133,39 @@ class ActivityTracker:
         """Initialize the tracker service."""
         logger.info("🛡️ Initializing Focus Guardian Tracker")
         self._check_platform_support()
+        if platform.system() == "Linux":
+            self._window_source = create_window_source(settings.focus_window_backend)
+            if settings.focus_event_driven:
+                self._change_watcher = create_change_watcher()
+            if settings.focus_idle_detection:
+                self._idle_source = create_idle_source()
+        await self._writer.start()
+        await self._outbox.start()
+        retention_manager.outbox = self._outbox  # expires replayed fallback files with the database rows
+        try:
+            # Seed today's productivity totals once (database and fallback log); sessions are added as they end
+            activity_day_cache.reader = self.iter_activity_logs
+            await activity_day_cache.get(self.current_user_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not seed today's activity cache: {e}")
         logger.info("✅ Focus Guardian Tracker initialized")
     
     async def cleanup(self):
         """Clean up resources."""
         if self.is_monitoring:
             await self.stop_monitoring()
+        await self._writer.stop()
+        await self._outbox.stop()
+        self._fallback_log.close()
+        for source in (self._window_source, self._fallback_window_source, self._change_watcher, self._idle_source):
+            if source:
+                source.close()
+        self._window_source = None
+        self._fallback_window_source = None
+        self._change_watcher = None
+        self._idle_source = None
+        self._probe_executor.shutdown()
+        self._process_sampler.reset()
         logger.info("🛑 Focus Guardian Tracker cleaned up")
     
     def _check_platform_support(self):
@@ -87,6 +190,7 @@ class ActivityTracker:
             
             try:
                 self.is_monitoring = True
+                self._interval.reset()
                 self._monitoring_task = asyncio.create_task(self._monitoring_loop())
                 logger.info("▶️ Focus monitoring started")
                 return True
@@ -105,6 +209,8 @@ class ActivityTracker:
                 self.is_monitoring = False
                 
                 if self._monitoring_task:
+                    if self._change_watcher:
+                        self._change_watcher.wake()
                     self._monitoring_task.cancel()
                     try:
                         await self._monitoring_task
@@ -114,6 +220,8 @@ class ActivityTracker:
                 
                 # Save current session
                 await self._end_current_session()
+                self._clear_state()
+                await self._writer.flush()
                 logger.info("⏹️ Focus monitoring stopped")
                 return True
             except Exception as e:
@@ -142,92 +250,373 @@ class ActivityTracker:
         if self.current_start_time:
             elapsed = int(time.time() - self.current_start_time)
         
+        idle_seconds = 0
+        if self.is_idle and self.idle_since:
+            idle_seconds = int(time.time() - self.idle_since)
+        
         return {
             "active_app": self.current_app,
             "window_title": self.current_title,
             "elapsed_seconds": elapsed,
             "is_monitoring": self.is_monitoring,
-            "productivity_score": await self._calculate_productivity_score()
+            "is_idle": self.is_idle,
+            "idle_seconds": idle_seconds,
+            "productivity_score": self._calculate_productivity_score()
         }
     
     async def get_activity_logs(self, target_date: date, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get activity logs for specified date."""
+        """Get activity logs for specified date (database and fallback log merged, newest first)."""
         try:
-            # Try database first
-            logs = db_manager.get_activity_logs(
-                self.current_user_id, 
-                target_date.strftime("%Y-%m-%d"), 
-                limit
-            )
-            
-            if logs:
-                return [self._activity_log_to_dict(log) for log in logs]
-            
-            # Fallback to JSON file
-            return await self._load_json_logs(target_date)
+            items = await async_db.read(self._take, self.iter_activity_logs(target_date), limit)
+            return [item.log for item in items]
         except Exception as e:
             logger.error(f"Failed to get activity logs: {e}")
             return []
     
+    async def get_activity_log_page(
+        self,
+        target_date: date,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One keyset page of activity logs (newest first) and the cursor of the
+        next page, or None on the last page. Raises ValueError for a bad cursor.
+        """
+        after = decode_log_cursor(cursor) if cursor else None
+        items = await async_db.read(self._take, self.iter_activity_logs(target_date, after=after), limit + 1)
+        
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_log_cursor(items[-1].start, items[-1].row_id)
+        return [item.log for item in items], next_cursor
+    
+    def stream_activity_logs(
+        self,
+        target_date: date,
+        cursor: Optional[str] = None,
+        formatter: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        NDJSON chunks with every log of the day after `cursor`, newest first.
+        The merged stream is pulled and encoded batch by batch on the reader
+        pool, so memory stays flat however large the range is.
+        The cursor is validated here (ValueError) before streaming starts.
+        """
+        after = decode_log_cursor(cursor) if cursor else None
+        chunks = self._ndjson_chunks(target_date, after, formatter or (lambda log: log))
+        return async_db.stream(chunks)
+    
+    def _ndjson_chunks(self, target_date: date, after, formatter) -> Iterator[str]:
+        items = self.iter_activity_logs(target_date, after=after)
+        try:
+            while True:
+                batch = list(islice(items, NDJSON_BATCH_SIZE))
+                if not batch:
+                    break
+                yield "".join(json.dumps(formatter(item.log)) + "\n" for item in batch)
+        finally:
+            items.close()
+    
+    @staticmethod
+    def _take(items: Iterator[LogItem], count: int) -> List[LogItem]:
+        """The first `count` items, releasing the sources' read cursors afterwards."""
+        try:
+            return list(islice(items, count))
+        finally:
+            items.close()
+    
+    async def get_app_usage(self, target_date: date) -> Dict[str, Any]:
+        """Per-app usage for specified date, aggregated in SQL (time away excluded)."""
+        usage = []
+        horizon = raw_retention_horizon()
+        if horizon is None or target_date >= horizon:
+            try:
+                rows = await async_db.get_app_usage(self.current_user_id, target_date.strftime("%Y-%m-%d"), IDLE_TAG)
+                usage = [(row.app_name, row.total_time, row.session_count, row.productivity_avg) for row in rows]
+            except Exception as e:
+                logger.error(f"Failed to aggregate app usage: {e}")
+            
+            if not usage:
+                # Fall back to the merged logs (sessions still waiting in the fallback log)
+                logs = await async_db.read(lambda: [item.log for item in self.iter_activity_logs(target_date)])
+                usage = self._app_usage_from_logs(logs)
+        
+        if not usage:
+            # Raw rows expired (or about to be) by retention: the hour buckets still have the day
+            try:
+                rows = await async_db.get_bucket_app_usage(self.current_user_id, target_date.strftime("%Y-%m-%d"), IDLE_TAG)
+                usage = [(row.app_name, row.total_time, row.session_count, row.productivity_avg) for row in rows]
+            except Exception as e:
+                logger.error(f"Failed to read app usage from hour buckets: {e}")
+        
+        total_time = sum(total for _, total, _, _ in usage)
+        return {
+            "date": target_date.isoformat(),
+            "total_time": total_time,
+            "total_apps": len(usage),
+            "apps": [
+                {
+                    "app_name": app_name,
+                    "total_time": total,
+                    "session_count": sessions,
+                    "productivity_avg": round(productivity_avg or 0, 2),
+                    "time_percentage": round((total / total_time * 100) if total_time > 0 else 0, 2),
+                    "minutes": round(total / 60, 1)
+                }
+                for app_name, total, sessions, productivity_avg in usage
+            ]
+        }
+    
+    def _app_usage_from_logs(self, logs: List[Dict[str, Any]]) -> List[Tuple[str, float, int, float]]:
+        """(app, total time, sessions, mean productivity) from log dicts, largest first."""
+        stats: Dict[str, List[float]] = {}
+        for log in logs:
+            if log.get("tag") == IDLE_TAG:
+                continue
+            entry = stats.setdefault(log.get("app_name", "Unknown"), [0.0, 0, 0.0])
+            entry[0] += log.get("duration_seconds", 0)
+            entry[1] += 1
+            entry[2] += log.get("productivity_score") or 0
+        usage = [(app, total, sessions, score_sum / sessions) for app, (total, sessions, score_sum) in stats.items()]
+        return sorted(usage, key=lambda item: item[1], reverse=True)
+    
+    def get_classification_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters of the classification cache."""
+        return self._classification_cache.stats()
+    
+    def get_write_stats(self) -> Dict[str, Any]:
+        """Queue depth and flush latency of the activity write-behind queue."""
+        return self._writer.stats()
+    
+    def get_sampling_stats(self) -> Dict[str, Any]:
+        """Current sampling mode and effective polling rate."""
+        if self.is_idle:
+            mode = "idle"
+        elif self._change_watcher:
+            mode = "event_driven"
+        else:
+            mode = "polling"
+        return {"mode": mode, **self._interval.stats()}
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """Samples seen vs. session boundaries produced by the coalescer."""
+        return self._coalescer.stats()
+    
+    def get_rollup_stats(self) -> Dict[str, Any]:
+        """Daily analytics rollup statistics."""
+        return rollup_aggregator.stats()
+    
+    def get_fallback_log_stats(self) -> Dict[str, Any]:
+        """JSONL fallback log write statistics."""
+        return self._fallback_log.stats()
+    
+    def get_outbox_stats(self) -> Dict[str, Any]:
+        """Fallback outbox depth, age and replay statistics."""
+        return self._outbox.stats()
+    
+    def get_day_cache_stats(self) -> Dict[str, Any]:
+        """Columnar day cache statistics."""
+        return activity_day_cache.stats()
+    
     async def get_analytics(self, target_date: date) -> Dict[str, Any]:
-        """Get focus analytics for specified date."""
+        """Get focus analytics for specified date from the daily rollup."""
         try:
-            logs = await self.get_activity_logs(target_date)
-            return await self._calculate_analytics(logs)
+            return await rollup_aggregator.get_analytics(self.current_user_id, target_date)
         except Exception as e:
             logger.error(f"Failed to get analytics: {e}")
             return self._empty_analytics()
     
+    async def get_range_analytics(self, start_date: date, end_date: date) -> Dict[str, Any]:
+        """Get focus analytics for an inclusive date range from the hourly buckets."""
+        return await async_db.read(load_range_analytics, self.current_user_id, start_date, end_date)
+    
     # ===== MONITORING LOOP =====
     
     async def _monitoring_loop(self):
         """Main monitoring loop."""
+        if self._change_watcher:
+            await self._event_driven_loop()
+            return
+        
         logger.info("🔄 Starting monitoring loop")
         
         while self.is_monitoring:
             try:
-                await self._check_foreground_window()
-                await asyncio.sleep(settings.focus_update_interval)
+                delay = await self._sample()
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Monitoring loop error: {e}")
+                await asyncio.sleep(5)  # Wait longer on error
+        
+        logger.info("🛑 Monitoring loop stopped")
+    
+    async def _event_driven_loop(self):
+        """
+        Monitoring loop driven by X11 PropertyNotify events.
+        Samples only when focus or title changes, plus a low-frequency safety poll.
+        """
+        logger.info("🔄 Starting event-driven monitoring loop")
+        loop = asyncio.get_running_loop()
+        
+        timeout = settings.focus_safety_poll_interval
+        try:
+            timeout = await self._sample()
+        except Exception as e:
+            logger.error(f"Monitoring loop error: {e}")
+        
+        while self.is_monitoring:
+            try:
+                changed_at = await loop.run_in_executor(
+                    None,
+                    self._change_watcher.wait_for_change,
+                    timeout
+                )
+                if not self.is_monitoring:
+                    break
+                timeout = await self._sample(changed_at)
             except asyncio.CancelledError:
                 break
+            except WindowSourceError as e:
+                # Display went away - fall back to fixed-interval polling
+                logger.warning(f"Change watcher failed, reverting to polling: {e}")
+                self._change_watcher.close()
+                self._change_watcher = None
+                await self._monitoring_loop()
+                return
             except Exception as e:
                 logger.error(f"Monitoring loop error: {e}")
                 await asyncio.sleep(5)  # Wait longer on error
         
         logger.info("🛑 Monitoring loop stopped")
     
-    async def _check_foreground_window(self):
-        """Check active window and update session."""
-        app, title = self._get_foreground_info()
+    async def _sample(self, changed_at: Optional[float] = None) -> float:
+        """
+        Run one sampling step and return the seconds to wait before the next.
+        While the user is idle only the idle counter is read, still every
+        focus_update_interval so a return is noticed promptly in polling mode.
+        """
+        resumed_at = await self._update_idle_state()
+        if self.is_idle:
+            return settings.focus_update_interval
+        
+        changed = await self._check_foreground_window(resumed_at or changed_at)
+        if self._change_watcher:
+            return settings.focus_safety_poll_interval
+        return self._interval.next_delay(changed)
+    
+    async def _update_idle_state(self) -> Optional[float]:
+        """
+        Enter or leave the idle state based on the input idle counter.
+        Returns the time of the first input event when the user just came back.
+        """
+        if not self._idle_source:
+            return None
+        
+        try:
+            idle_seconds = await self._probe_executor.run(self._idle_source.get_idle_seconds)
+        except ProbeBusyError:
+            return None
+        except IdleSourceError as e:
+            logger.warning(f"Idle detection disabled: {e}")
+            self._idle_source.close()
+            self._idle_source = None
+            return None
+        if idle_seconds is None:
+            return None
+        
         now = time.time()
+        if not self.is_idle and idle_seconds >= settings.focus_idle_threshold:
+            await self._enter_idle(now - idle_seconds)
+        elif self.is_idle and idle_seconds < settings.focus_idle_threshold:
+            active_at = now - idle_seconds
+            await self._leave_idle(active_at)
+            return active_at
+        return None
+    
+    async def _enter_idle(self, idle_since: float):
+        """Close the active session at the last input and open an idle session."""
+        await self._end_current_session(idle_since)
+        self._clear_state()
         
-        if app != self.current_app or title != self.current_title:
-            # Window changed - end current session and start new one
-            await self._end_current_session()
-            
-            self.current_app = app
-            self.current_title = title
-            self.current_start_time = now
-            
-            logger.debug(f"Window changed: {app} - {title}")
-            
-            # Emit window changed event
-            await self._emit_window_changed_event(app, title)
-            
-            # Send real-time status update via WebSocket
-            await self._send_websocket_update()
+        self.is_idle = True
+        self.idle_since = idle_since
+        self.current_app = IDLE_APP
+        self.current_title = IDLE_TITLE
+        self.current_start_time = idle_since
+        
+        logger.info("💤 User idle - sampling suspended")
+        await self._emit_idle_changed_event()
+        await self._send_websocket_update()
+    
+    async def _leave_idle(self, active_at: float):
+        """Record the idle session up to the first input event."""
+        await self._end_current_session(active_at)
+        self._clear_state()
+        
+        logger.info("⚡ User active - sampling resumed")
+        await self._emit_idle_changed_event()
     
-    def _get_foreground_info(self) -> Tuple[Optional[str], Optional[str]]:
-        """Get current foreground window info."""
+    async def _check_foreground_window(self, changed_at: Optional[float] = None) -> bool:
+        """
+        Check active window and update session.
+        `changed_at` is the time the change was observed (event-driven mode).
+        Returns True if a new session started.
+        """
+        app, title = await self._get_foreground_info()
+        now = changed_at or time.time()
+        window = canonicalize(app, title)
+        
+        session_end = self._coalescer.observe(window, now)
+        if session_end is None:
+            # Same window identity - only the display decoration may differ
+            self.current_title = window.title
+            return False
+        
+        # Window changed (or returned after a long gap) - end current session and start new one
+        await self._end_current_session(session_end)
+        
+        self.current_app = app
+        self.current_title = window.title
+        self.current_start_time = now
+        
+        logger.debug(f"Window changed: {app} - {window.title}")
+        
+        # Emit window changed event
+        await self._emit_window_changed_event(app, window.title)
+        
+        # Send real-time status update via WebSocket
+        await self._send_websocket_update()
+        return True
+    
+    async def _get_foreground_info(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Get current foreground window info without blocking the event loop.
+        A probe that misses its deadline (or finds every worker stalled) keeps
+        the current window, so a hung tool never splits or ends a session.
+        """
+        try:
+            return await asyncio.wait_for(self._probe_foreground(), timeout=settings.focus_probe_deadline)
+        except asyncio.TimeoutError:
+            logger.warning(f"Foreground probe exceeded {settings.focus_probe_deadline}s deadline")
+        except ProbeBusyError as e:
+            logger.debug(f"Skipping foreground sample: {e}")
+        return self.current_app, self.current_title
+    
+    async def _probe_foreground(self) -> Tuple[Optional[str], Optional[str]]:
+        """Dispatch to the platform-specific probe."""
         current_os = platform.system()
         
         if current_os == "Windows" and HAS_WIN32:
-            return self._get_windows_foreground_info()
+            return await self._probe_executor.run(self._get_windows_foreground_info)
         elif current_os == "Darwin":
-            return self._get_macos_foreground_info()
+            return await self._get_macos_foreground_info()
         else:
             # Linux/WSL support
-            return self._get_linux_foreground_info()
+            return await self._get_linux_foreground_info()
     
     def _get_windows_foreground_info(self) -> Tuple[Optional[str], Optional[str]]:
         """Get Windows foreground window info."""
@@ -252,76 +641,59 @@ class ActivityTracker:
             logger.error(f"Failed to get Windows foreground info: {e}")
             return None, None
     
-    def _get_macos_foreground_info(self) -> Tuple[Optional[str], Optional[str]]:
+    async def _get_macos_foreground_info(self) -> Tuple[Optional[str], Optional[str]]:
         """Get macOS foreground window info using AppleScript."""
         try:
-            import subprocess
-            # Get active application
+            # Get active application and window title concurrently
             app_script = 'tell application "System Events" to get name of first application process whose frontmost is true'
-            app_result = subprocess.run(['osascript', '-e', app_script], capture_output=True, text=True, timeout=2)
-            app = app_result.stdout.strip() if app_result.returncode == 0 else "Unknown"
-            
-            # Get window title
             title_script = 'tell application "System Events" to get title of front window of first application process whose frontmost is true'
-            title_result = subprocess.run(['osascript', '-e', title_script], capture_output=True, text=True, timeout=2)
-            title = title_result.stdout.strip() if title_result.returncode == 0 else "Unknown"
+            app, title = await asyncio.gather(
+                run_probe('osascript', '-e', app_script, timeout=2),
+                run_probe('osascript', '-e', title_script, timeout=2)
+            )
             
-            return app, title
+            return app or "Unknown", title or "Unknown"
         except Exception as e:
             logger.error(f"Failed to get macOS foreground info: {e}")
             return None, None
     
-    def _get_linux_foreground_info(self) -> Tuple[Optional[str], Optional[str]]:
+    async def _get_linux_foreground_info(self) -> Tuple[Optional[str], Optional[str]]:
         """Get Linux foreground window info using enhanced methods with content detection."""
         try:
-            import subprocess
-            
-            # Method 1: Try xdotool (most reliable)
-            try:
-                # Get window ID of active window
-                window_id_result = subprocess.run(['xdotool', 'getactivewindow'], capture_output=True, text=True, timeout=2)
-                if window_id_result.returncode == 0:
-                    window_id = window_id_result.stdout.strip()
-                    
-                    # Get window title
-                    title_result = subprocess.run(['xdotool', 'getwindowname', window_id], capture_output=True, text=True, timeout=2)
-                    title = title_result.stdout.strip() if title_result.returncode == 0 else "Unknown"
-                    
-                    # Get process name
-                    pid_result = subprocess.run(['xdotool', 'getwindowpid', window_id], capture_output=True, text=True, timeout=2)
-                    if pid_result.returncode == 0:
-                        pid = pid_result.stdout.strip()
-                        try:
-                            process = psutil.Process(int(pid))
-                            app = process.name()
-                            
-                            # Enhanced content detection
-                            enhanced_title = self._enhance_content_detection(app, title, process)
-                            
-                            return app, enhanced_title
-                        except:
-                            app = "Unknown"
-                    else:
+            # Method 1: Window source (persistent X11 connection, xdotool fallback)
+            window = await self._get_active_window_info()
+            if window:
+                title = window.title or "Unknown"
+                if window.pid:
+                    try:
+                        process = psutil.Process(window.pid)
+                        app = process.name()
+                        
+                        # Enhanced content detection
+                        enhanced_title = analyzer.enhance_title(app, title)
+                        
+                        return app, enhanced_title
+                    except:
                         app = "Unknown"
-                    
-                    return app, title
-            except FileNotFoundError:
-                pass  # xdotool not installed, try other methods
+                else:
+                    app = "Unknown"
+                
+                return app, title
             
             # Method 2: Try wmctrl with enhanced detection
             try:
-                result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True, timeout=2)
-                if result.returncode == 0:
-                    lines = result.stdout.strip().split('\n')
+                output = await run_probe('wmctrl', '-l', timeout=2)
+                if output:
+                    lines = output.split('\n')
                     for line in lines:
                         if line.strip():
                             parts = line.split(None, 3)
                             if len(parts) >= 4:
                                 # Enhanced browser detection
                                 if "firefox" in line.lower():
-                                    return "firefox", self._enhance_browser_title(parts[3])
+                                    return "firefox", analyzer.enhance_browser_title(parts[3])
                                 elif "chrome" in line.lower():
-                                    return "chrome", self._enhance_browser_title(parts[3])
+                                    return "chrome", analyzer.enhance_browser_title(parts[3])
                                 else:
                                     return "Application", parts[3]
             except FileNotFoundError:
@@ -329,192 +701,68 @@ class ActivityTracker:
             
             # Method 3: Enhanced fallback with real-time process analysis
             try:
-                most_active_process = self._get_most_active_process()
+                most_active_process = await self._probe_executor.run(self._get_most_active_process)
                 if most_active_process:
                     app_name, title = most_active_process
-                    enhanced_title = self._enhance_content_detection(app_name, title)
+                    enhanced_title = analyzer.enhance_title(app_name, title)
                     return app_name, enhanced_title
                 
+            except ProbeBusyError:
+                raise
             except Exception:
                 pass
             
-            # Final fallback with timestamp
-            return "system_monitor", f"Linux Activity Monitor - {datetime.now().strftime('%H:%M:%S')}"
+            # Final fallback
+            return "system_monitor", "Linux Activity Monitor"
             
+        except ProbeBusyError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get Linux foreground info: {e}")
             # Even if everything fails, return some activity to show the system is working
-            return "system_monitor", f"Active Session - {datetime.now().strftime('%H:%M:%S')}"
+            return "system_monitor", "Active Session"
     
-    def _enhance_content_detection(self, app_name: str, title: str, process=None) -> str:
-        """Enhance content detection with detailed analysis."""
-        if not title or not app_name:
-            return title or "No Title"
-        
-        app_lower = app_name.lower()
-        title_lower = title.lower()
+    async def _get_active_window_info(self):
+        """Query the active window, falling back to xdotool if the X11 source fails."""
+        if self._window_source is None:
+            return None
         
-        # Browser content enhancement
-        if any(browser in app_lower for browser in ['firefox', 'chrome', 'edge', 'safari']):
-            return self._enhance_browser_title(title)
-        
-        # Code editor enhancement
-        elif any(editor in app_lower for editor in ['code', 'cursor', 'vim', 'emacs']):
-            return self._enhance_code_editor_title(title)
-        
-        # Terminal enhancement
-        elif any(term in app_lower for term in ['terminal', 'cmd', 'powershell', 'bash']):
-            return self._enhance_terminal_title(title, process)
-        
-        # Document editor enhancement
-        elif any(doc in app_lower for doc in ['word', 'notepad', 'gedit']):
-            return self._enhance_document_title(title)
-        
-        # Default enhancement with metadata
-        else:
-            return f"{title} | {app_name} | {datetime.now().strftime('%H:%M')}"
-    
-    def _enhance_browser_title(self, title: str) -> str:
-        """Enhanced browser title with content detection."""
-        if not title:
-            return "Browser - Unknown Page"
+        try:
+            return await self._window_source.get_active_window_async(self._probe_executor)
+        except WindowSourceError as e:
+            if isinstance(self._window_source, XdotoolWindowSource):
+                return None
+            logger.debug(f"{self._window_source.name} window source failed: {e}")
         
-        title_lower = title.lower()
+        if self._fallback_window_source is None:
+            self._fallback_window_source = XdotoolWindowSource()
+        if not self._fallback_window_source.is_available():
+            return None
         
-        # YouTube detection
-        if 'youtube' in title_lower:
-            # Extract video title from YouTube page title
-            if ' - youtube' in title_lower:
-                video_title = title.split(' - youtube')[0].strip()
-                return f"🎥 YouTube: {video_title}"
-            else:
-                return f"🎥 YouTube: {title}"
-        
-        # Social media detection
-        elif 'facebook' in title_lower:
-            return f"📘 Facebook: {title.replace(' | Facebook', '').strip()}"
-        elif 'twitter' in title_lower or 'x.com' in title_lower:
-            return f"🐦 Twitter/X: {title.replace(' / X', '').strip()}"
-        elif 'linkedin' in title_lower:
-            return f"💼 LinkedIn: {title.replace(' | LinkedIn', '').strip()}"
-        elif 'instagram' in title_lower:
-            return f"📸 Instagram: {title}"
-        
-        # Development sites
-        elif any(dev in title_lower for dev in ['github', 'stackoverflow', 'docs']):
-            return f"💻 Dev: {title}"
-        
-        # News sites
-        elif any(news in title_lower for news in ['news', 'bbc', 'cnn', 'reuters']):
-            return f"📰 News: {title}"
-        
-        # Shopping
-        elif any(shop in title_lower for shop in ['amazon', 'ebay', 'shop']):
-            return f"🛒 Shopping: {title}"
-        
-        # Default browser with URL hint
-        else:
-            # Try to extract domain from title
-            if ' - ' in title:
-                parts = title.split(' - ')
-                if len(parts) > 1:
-                    return f"🌐 Web: {parts[0]} | {parts[-1]}"
-            
-            return f"🌐 Web: {title}"
-    
-    def _enhance_code_editor_title(self, title: str) -> str:
-        """Enhanced code editor title with file and project detection."""
-        if not title:
-            return "Code Editor"
-        
-        # Extract file name and project
-        if ' - ' in title:
-            parts = title.split(' - ')
-            filename = parts[0]
-            editor_info = ' - '.join(parts[1:])
-            
-            # Detect file type
-            if '.' in filename:
-                ext = filename.split('.')[-1].lower()
-                lang_map = {
-                    'py': '🐍 Python',
-                    'js': '⚡ JavaScript', 
-                    'jsx': '⚛️ React',
-                    'ts': '🔷 TypeScript',
-                    'css': '🎨 CSS',
-                    'html': '🌐 HTML',
-                    'json': '📋 JSON',
-                    'md': '📝 Markdown'
-                }
-                lang_icon = lang_map.get(ext, '📄')
-                return f"💻 {lang_icon} {filename} | {editor_info}"
-            
-            return f"💻 Code: {filename} | {editor_info}"
-        
-        return f"💻 Code: {title}"
-    
-    def _enhance_terminal_title(self, title: str, process=None) -> str:
-        """Enhanced terminal title with command detection."""
-        if not title:
-            return "Terminal Session"
-        
-        # Common command detection
-        title_lower = title.lower()
-        
-        if 'npm' in title_lower:
-            return f"⚡ Terminal: {title} (Node.js)"
-        elif 'git' in title_lower:
-            return f"🔀 Terminal: {title} (Git)"
-        elif 'python' in title_lower:
-            return f"🐍 Terminal: {title} (Python)"
-        elif 'docker' in title_lower:
-            return f"🐳 Terminal: {title} (Docker)"
-        else:
-            return f"💻 Terminal: {title}"
-    
-    def _enhance_document_title(self, title: str) -> str:
-        """Enhanced document title with file type detection."""
-        if not title:
-            return "Document"
-        
-        # Detect document type from title
-        title_lower = title.lower()
-        
-        if any(word in title_lower for word in ['readme', 'documentation', 'docs']):
-            return f"📚 Docs: {title}"
-        elif any(word in title_lower for word in ['note', 'memo']):
-            return f"📝 Notes: {title}"
-        elif any(word in title_lower for word in ['todo', 'task']):
-            return f"✅ Tasks: {title}"
-        else:
-            return f"📄 Document: {title}"
+        try:
+            return await self._fallback_window_source.get_active_window_async(self._probe_executor)
+        except WindowSourceError:
+            return None
     
     def _get_most_active_process(self) -> Tuple[Optional[str], Optional[str]]:
         """Get the most active process based on CPU usage and known applications."""
         try:
-            # Get processes sorted by CPU usage
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent']):
-                try:
-                    proc_info = proc.info
-                    if proc_info['cpu_percent'] > 0.1:  # Only consider active processes
-                        processes.append(proc_info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-            
-            # Sort by CPU usage
-            processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
+            # Only consider processes that were active since the previous tick
+            processes = [
+                proc for proc in self._process_sampler.sample()
+                if proc.cpu_percent > 0.1
+            ]
             
-            # Look for known applications
+            # Look for known applications (already sorted by CPU usage)
             for proc in processes:
-                name = proc['name'].lower()
+                name = proc.name.lower()
                 if any(app in name for app in ['firefox', 'chrome', 'code', 'terminal']):
-                    return proc['name'], f"Active Process ({proc['cpu_percent']:.1f}% CPU)"
+                    return proc.name, f"Active Process ({proc.cpu_percent:.1f}% CPU)"
             
             # Fallback to highest CPU process
             if processes:
                 top_proc = processes[0]
-                return top_proc['name'], f"High Activity ({top_proc['cpu_percent']:.1f}% CPU)"
+                return top_proc.name, f"High Activity ({top_proc.cpu_percent:.1f}% CPU)"
             
             return None, None
             
@@ -524,53 +772,44 @@ class ActivityTracker:
     
     # ===== SESSION MANAGEMENT =====
     
-    async def _end_current_session(self):
+    async def _end_current_session(self, end_time: Optional[float] = None):
         """End and save current session."""
         if not self.current_app or not self.current_start_time:
             return
         
         try:
-            end_time = time.time()
+            end_time = max(end_time or time.time(), self.current_start_time)
             duration = end_time - self.current_start_time
             start_dt = datetime.fromtimestamp(self.current_start_time)
             end_dt = datetime.fromtimestamp(end_time)
             
-            # Calculate productivity score
-            productivity_score = await self._calculate_session_productivity(
-                self.current_app, self.current_title, duration
-            )
+            # Classify once: tag and duration-scaled productivity score
+            if self.is_idle:
+                tag, productivity_score = IDLE_TAG, 0.0
+            else:
+                tag, base_score = self._classification_cache.classify(self.current_app, self.current_title)
+                productivity_score = analyzer.scale_score(base_score, duration) if duration >= 1 else 0.0
             
-            # Save to database
-            activity_data = {
+            # Queue for batched persistence
+            record = {
                 "user_id": self.current_user_id,
                 "app_name": self.current_app,
                 "window_title": self.current_title or "",
-                "start_time": start_dt.isoformat(),
-                "end_time": end_dt.isoformat(),
+                "start_time": start_dt,
+                "end_time": end_dt,
                 "duration_seconds": duration,
-                "tag": await self._classify_activity(self.current_app, self.current_title),
+                "tag": tag,
                 "productivity_score": productivity_score
             }
+            self._writer.submit(record)
+            activity_day_cache.append(record)
             
-            try:
-                db_manager.create_activity_log(
-                    user_id=self.current_user_id,
-                    app_name=self.current_app,
-                    window_title=self.current_title or "",
-                    start_time=start_dt,
-                    end_time=end_dt,
-                    duration_seconds=duration,
-                    tag=activity_data["tag"],
-                    productivity_score=productivity_score
-                )
-                
-                # Emit activity logged event
-                await self._emit_activity_logged_event(activity_data)
-                
-            except Exception as e:
-                logger.error(f"Failed to save to database: {e}")
-                # Fallback to JSON logging
-                await self._save_to_json_log(start_dt, end_dt, duration)
+            # Emit activity logged event
+            await self._emit_activity_logged_event({
+                **record,
+                "start_time": start_dt.isoformat(),
+                "end_time": end_dt.isoformat()
+            })
             
             logger.debug(f"Session saved: {self.current_app} ({duration:.1f}s)")
             
@@ -582,142 +821,27 @@ class ActivityTracker:
         self.current_app = None
         self.current_title = None
         self.current_start_time = None
+        self.is_idle = False
+        self.idle_since = None
+        self._coalescer.reset()
     
     # ===== PRODUCTIVITY ANALYSIS =====
     
-    async def _calculate_session_productivity(self, app: str, title: str, duration: float) -> float:
-        """Calculate productivity score for a session."""
-        if not app or duration < 1:
-            return 0.0
-        
-        # Basic productivity classification
-        productive_apps = {
-            "code.exe": 0.9,
-            "cursor.exe": 0.9,
-            "notepad++.exe": 0.8,
-            "cmd.exe": 0.7,
-            "powershell.exe": 0.7,
-            "terminal.exe": 0.7,
-            "firefox.exe": 0.3,  # Depends on content
-            "chrome.exe": 0.3,   # Depends on content
-            "edge.exe": 0.3,     # Depends on content
-        }
-        
-        base_score = productive_apps.get(app.lower(), 0.5)
-        
-        # Analyze title for additional context
-        if title:
-            title_lower = title.lower()
-            
-            # Boost for coding/learning content
-            if any(keyword in title_lower for keyword in [
-                "python", "javascript", "react", "fastapi", "github",
-                "stackoverflow", "documentation", "tutorial"
-            ]):
-                base_score = min(1.0, base_score + 0.3)
-            
-            # Reduce for distracting content
-            elif any(keyword in title_lower for keyword in [
-                "youtube", "facebook", "twitter", "reddit", "tiktok",
-                "instagram", "netflix", "gaming"
-            ]):
-                base_score = max(0.0, base_score - 0.4)
-        
-        # Duration factor (longer focused sessions get slight boost)
-        duration_factor = min(1.1, 1.0 + (duration / 3600) * 0.1)  # Max 10% boost for 1hr+
-        
-        return min(1.0, base_score * duration_factor)
+    def _calculate_productivity_score(self) -> float:
+        """
+        Today's duration-weighted productivity score from the day cache's
+        running sums: O(1), no I/O (0.0 until the day has been seeded).
+        """
+        columns = activity_day_cache.current(self.current_user_id)
+        return columns.weighted_productivity() if columns is not None else 0.0
     
-    async def _calculate_productivity_score(self) -> float:
-        """Calculate current overall productivity score."""
-        try:
-            today_logs = await self.get_activity_logs(date.today())
-            if not today_logs:
-                return 0.0
-            
-            total_time = sum(log["duration_seconds"] for log in today_logs)
-            if total_time == 0:
-                return 0.0
-            
-            weighted_score = sum(
-                log["duration_seconds"] * log.get("productivity_score", 0.5)
-                for log in today_logs
-            )
-            
-            return weighted_score / total_time
-        except Exception:
-            return 0.0
-    
-    async def _classify_activity(self, app: str, title: str) -> str:
-        """Classify activity with a tag."""
-        if not app:
-            return "Untagged"
-        
-        app_lower = app.lower()
-        title_lower = (title or "").lower()
-        
-        # Development
-        if any(keyword in app_lower for keyword in ["code", "cursor", "git", "terminal", "cmd"]):
-            return "✅ Development"
-        
-        # Learning/Research
-        if any(keyword in title_lower for keyword in [
-            "documentation", "tutorial", "learning", "course", "stackoverflow"
-        ]):
-            return "🧪 Research"
-        
-        # Communication
-        if any(keyword in app_lower for keyword in ["slack", "teams", "discord", "zoom"]):
-            return "💬 Communication"
-        
-        # Entertainment/Distraction
-        if any(keyword in title_lower for keyword in [
-            "youtube", "netflix", "gaming", "social", "reddit"
-        ]):
-            return "❌ Distraction"
-        
-        # Default
-        return "📝 General"
+    async def get_today_summary(self) -> Dict[str, Any]:
+        """Today's live totals, top apps and hourly minutes from the day cache."""
+        columns = await activity_day_cache.get(self.current_user_id)
+        return columns.summary()
     
     # ===== ANALYTICS =====
     
-    async def _calculate_analytics(self, logs: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Calculate comprehensive analytics from logs."""
-        if not logs:
-            return self._empty_analytics()
-        
-        total_time = sum(log["duration_seconds"] for log in logs)
-        productive_time = sum(
-            log["duration_seconds"] for log in logs 
-            if log.get("productivity_score", 0) > 0.6
-        )
-        
-        # App breakdown
-        app_times = {}
-        for log in logs:
-            app = log["app_name"]
-            app_times[app] = app_times.get(app, 0) + log["duration_seconds"]
-        
-        top_apps = [
-            {"app": app, "time": time, "percentage": (time / total_time) * 100}
-            for app, time in sorted(app_times.items(), key=lambda x: x[1], reverse=True)[:5]
-        ]
-        
-        # Hourly breakdown
-        hourly_breakdown = [0] * 24
-        for log in logs:
-            start_time = datetime.fromisoformat(log["start_time"])
-            hourly_breakdown[start_time.hour] += int(log["duration_seconds"] / 60)
-        
-        return {
-            "total_focused_time": int(total_time),
-            "productivity_percentage": (productive_time / total_time * 100) if total_time > 0 else 0,
-            "top_apps": top_apps,
-            "hourly_breakdown": hourly_breakdown,
-            "distraction_count": len([log for log in logs if log.get("tag") == "❌ Distraction"]),
-            "flow_sessions": len([log for log in logs if log["duration_seconds"] > 1800])  # 30+ min sessions
-        }
-    
     def _empty_analytics(self) -> Dict[str, Any]:
         """Return empty analytics structure."""
         return {
@@ -731,44 +855,91 @@ class ActivityTracker:
     
     # ===== LOGGING =====
     
-    async def _save_to_json_log(self, start_dt: datetime, end_dt: datetime, duration: float):
-        """Fallback JSON logging (compatible with original format)."""
+    async def _persist_records(self, records: List[Dict[str, Any]]) -> int:
+        """Write-behind sink: one transaction for the batch and every dirty daily rollup (see rollups)."""
+        rollups = rollup_aggregator.take_dirty()
         try:
-            log_entry = {
-                "app": self.current_app,
-                "title": self.current_title or "",
-                "start_time": start_dt.strftime("%Y-%m-%d %H:%M:%S"),
-                "end_time": end_dt.strftime("%Y-%m-%d %H:%M:%S"),
-                "duration_seconds": round(duration, 2),
-                "tag": await self._classify_activity(self.current_app, self.current_title)
-            }
-            
-            # Save to daily log file
-            log_file = self.log_dir / f"{start_dt.date()}.json"
-            logs = await self._load_json_logs(start_dt.date()) if log_file.exists() else []
-            logs.append(log_entry)
-            
-            with log_file.open("w", encoding="utf-8") as f:
-                json.dump(logs, f, indent=2, ensure_ascii=False)
-                
+            return await async_db.bulk_create_activity_logs(
+                records,
+                {key: rollup.to_row() for key, rollup in rollups.items()}
+            )
+        except Exception:
+            rollup_aggregator.restore_dirty(rollups)
+            raise
+    
+    async def _save_records_to_json_log(self, records: List[Dict[str, Any]]):
+        """Fallback logging for records the database rejected (appended to the day's JSONL log)."""
+        try:
+            await asyncio.to_thread(self._fallback_log.append, records)
+            self._outbox.notify()
         except Exception as e:
             logger.error(f"Failed to save JSON log: {e}")
     
-    async def _load_json_logs(self, target_date: date) -> List[Dict[str, Any]]:
-        """Load logs from JSON file."""
+    # ===== MERGED LOG READER =====
+    
+    def iter_activity_logs(
+        self,
+        start_day: date,
+        end_day: Optional[date] = None,
+        after: Optional[LogCursor] = None,
+        user_id: Optional[str] = None
+    ) -> Iterator[LogItem]:
+        """
+        Every log from end_day back to start_day (inclusive), newest first,
+        merged from the database and the fallback log with duplicates and
+        overlaps resolved (see log_merge), for user_id (default: the tracked
+        user). `after` resumes strictly after a (start_time, id) cursor.
+        Blocking and lazy: run it on the reader pool and close it when done.
+        Database rows come in keyset batches on short-lived connections, so
+        nothing is pinned between batches. Days before the raw retention
+        horizon yield nothing: their raw rows are pruned, so a fallback copy
+        would be all that is left of them.
+        """
+        horizon = raw_retention_horizon()
+        if horizon is not None:
+            start_day = max(start_day, horizon)
+        day = end_day or start_day
+        if after is not None:
+            day = min(day, after[0].date())
+        user_id = user_id or self.current_user_id
+        while day >= start_day:
+            yield from self._iter_day(day, after, user_id)
+            day -= timedelta(days=1)
+    
+    def _iter_day(self, day: date, after: Optional[LogCursor], user_id: str) -> Iterator[LogItem]:
+        # Sources are read inclusively of the cursor item so it still takes
+        # part in de-duplication and trimming, then filtered out below
+        inclusive = (after[0], after[1] + 1) if after else None
+        sources = [
+            self._database_items(day, inclusive, user_id),
+            self._fallback_items(day, after[0] if after else None, user_id)
+        ]
+        for item in merge_logs(sources, newest_first=True):
+            if after is None or (item.start, item.row_id) < after:
+                yield item
+    
+    def _database_items(self, day: date, after: Optional[LogCursor], user_id: str) -> Iterator[LogItem]:
+        for batch in db_manager.iter_activity_log_rows(user_id, day.isoformat(), after):
+            for row in batch:
+                yield LogItem(row.start_time, row.end_time, 0, row.id, self._activity_log_to_dict(row))
+    
+    def _fallback_items(self, day: date, until: Optional[datetime], user_id: str) -> Iterator[LogItem]:
+        """The day's fallback sessions of user_id starting at or before `until`, newest first."""
         try:
-            log_file = self.log_dir / f"{target_date}.json"
-            if not log_file.exists():
-                return []
-            
-            with log_file.open("r", encoding="utf-8") as f:
-                logs = json.load(f)
-            
-            # Convert to standard format
-            return [self._normalize_log_entry(log) for log in logs]
+            entries = self._fallback_log.iter_day(day, until=until + timedelta(microseconds=1) if until else None, newest_first=True)
+            for entry in entries:
+                if entry.get("user_id", self.current_user_id) != user_id:
+                    continue
+                try:
+                    start = datetime.fromisoformat(entry["start_time"])
+                    end = datetime.fromisoformat(entry["end_time"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                log = self._normalize_log_entry(entry)
+                log["start_time"], log["end_time"] = start.isoformat(), end.isoformat()  # same format as database rows
+                yield LogItem(start, end, 1, 0, log)
         except Exception as e:
             logger.error(f"Failed to load JSON logs: {e}")
-            return []
     
     def _normalize_log_entry(self, log: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize log entry to standard format."""
@@ -783,7 +954,7 @@ class ActivityTracker:
         }
     
     def _activity_log_to_dict(self, log) -> Dict[str, Any]:
-        """Convert database ActivityLog to dictionary."""
+        """Convert a database ActivityLog (or activity log row) to dictionary."""
         return {
             "app_name": log.app_name,
             "window_title": log.window_title,
@@ -828,6 +999,24 @@ class ActivityTracker:
         except Exception as e:
             logger.error(f"Failed to emit window changed event: {e}")
     
+    async def _emit_idle_changed_event(self):
+        """Emit idle state change so clients can pause polling."""
+        try:
+            from services.event_bus import event_bus, EventTypes
+            
+            await event_bus.emit_async(
+                EventTypes.FOCUS_IDLE_CHANGED,
+                {
+                    "is_idle": self.is_idle,
+                    "idle_since": self.idle_since,
+                    "timestamp": time.time(),
+                    "user_id": self.current_user_id
+                },
+                source="tracker"
+            )
+        except Exception as e:
+            logger.error(f"Failed to emit idle changed event: {e}")
+    
     async def _emit_activity_logged_event(self, activity_data: dict):
         """Emit activity logged event."""
         try:
@@ -0,0 +1,388 @@
+# =============================================================================
+# window_sources.py - Foreground Window Sources for Linux Focus Tracking
+# =============================================================================
+"""
+Pluggable backends that report the active X11 window (id, title, pid).
+
+The X11 backend keeps one long-lived X protocol connection and reads the EWMH
+properties directly; the xdotool backend shells out once per property and is
+kept as the fallback for systems without python-xlib or a reachable display.
+X11ChangeWatcher lets the tracker sleep until the focus or title changes.
+"""
+
+import logging
+import os
+import select
+import shutil
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from services.focus_guardian.probes import ProbeExecutor, run_probe
+
+# Optional X11 client library
+try:
+    from Xlib import X, display as xdisplay
+    from Xlib.error import XError, ConnectionClosedError, DisplayError
+    HAS_XLIB = True
+except ImportError:
+    HAS_XLIB = False
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class WindowInfo:
+    """Snapshot of the active window as reported by a window source."""
+    window_id: int
+    title: Optional[str]
+    pid: Optional[int]
+
+class WindowSourceError(Exception):
+    """Raised when a window source cannot talk to the display server."""
+
+class WindowSource:
+    """Base class for foreground window backends."""
+
+    name = "base"
+
+    def is_available(self) -> bool:
+        """Check whether this backend can be used on the current system."""
+        return False
+
+    def get_active_window(self) -> Optional[WindowInfo]:
+        """Return the active window, or None if no window is focused."""
+        raise NotImplementedError
+
+    async def get_active_window_async(self, executor: ProbeExecutor) -> Optional[WindowInfo]:
+        """Non-blocking variant; by default runs the sync query on the probe executor."""
+        return await executor.run(self.get_active_window)
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+class X11WindowSource(WindowSource):
+    """Reads _NET_ACTIVE_WINDOW, _NET_WM_NAME and _NET_WM_PID over one X connection."""
+
+    name = "x11"
+
+    def __init__(self, display_name: Optional[str] = None):
+        self.display_name = display_name
+        self._display = None
+        self._root = None
+        self._atoms = {}
+
+    def is_available(self) -> bool:
+        if not HAS_XLIB or not (self.display_name or os.environ.get("DISPLAY")):
+            return False
+        try:
+            self._connect()
+            return True
+        except WindowSourceError:
+            return False
+
+    def _connect(self):
+        """Open the display connection and intern the atoms we need."""
+        if self._display is not None:
+            return
+
+        try:
+            self._display = xdisplay.Display(self.display_name)
+        except (DisplayError, ConnectionClosedError, OSError) as e:
+            self._display = None
+            raise WindowSourceError(f"Cannot open X display: {e}") from e
+
+        self._root = self._display.screen().root
+        for atom_name in ("_NET_ACTIVE_WINDOW", "_NET_WM_NAME", "_NET_WM_PID", "UTF8_STRING"):
+            self._atoms[atom_name] = self._display.intern_atom(atom_name)
+
+    def _get_property(self, window, atom_name: str, property_type=None):
+        """Read a full property value from a window, or None if unset."""
+        prop = window.get_full_property(
+            self._atoms[atom_name],
+            property_type if property_type is not None else X.AnyPropertyType
+        )
+        return prop.value if prop is not None else None
+
+    def get_active_window(self) -> Optional[WindowInfo]:
+        self._connect()
+
+        try:
+            value = self._get_property(self._root, "_NET_ACTIVE_WINDOW")
+            if not value or not value[0]:
+                return None
+
+            window_id = int(value[0])
+            window = self._display.create_resource_object("window", window_id)
+
+            # Prefer the UTF-8 EWMH title, fall back to legacy WM_NAME
+            title = None
+            name_value = self._get_property(window, "_NET_WM_NAME", self._atoms["UTF8_STRING"])
+            if name_value:
+                title = name_value.decode("utf-8", errors="replace") if isinstance(name_value, bytes) else str(name_value)
+            else:
+                legacy_name = window.get_wm_name()
+                if legacy_name:
+                    title = legacy_name.decode("latin-1") if isinstance(legacy_name, bytes) else str(legacy_name)
+
+            pid_value = self._get_property(window, "_NET_WM_PID")
+            pid = int(pid_value[0]) if pid_value else None
+
+            return WindowInfo(window_id=window_id, title=title, pid=pid)
+        except XError as e:
+            # Window vanished between reading the root and its properties
+            logger.debug(f"X11 property read failed: {e}")
+            return None
+        except (ConnectionClosedError, OSError) as e:
+            self.close()
+            raise WindowSourceError(f"X connection lost: {e}") from e
+
+    def close(self):
+        if self._display is not None:
+            try:
+                self._display.close()
+            except Exception:
+                pass
+        self._display = None
+        self._root = None
+        self._atoms = {}
+
+class XdotoolWindowSource(WindowSource):
+    """Subprocess backend that calls xdotool for each property."""
+
+    name = "xdotool"
+
+    def __init__(self, timeout: float = 2):
+        self.timeout = timeout
+
+    def is_available(self) -> bool:
+        return shutil.which("xdotool") is not None
+
+    def _run(self, *args: str) -> Optional[str]:
+        try:
+            result = subprocess.run(["xdotool", *args], capture_output=True, text=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            logger.debug(f"xdotool {args[0]} timed out after {self.timeout}s")
+            return None
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def get_active_window(self) -> Optional[WindowInfo]:
+        try:
+            window_id = self._run("getactivewindow")
+        except FileNotFoundError as e:
+            raise WindowSourceError("xdotool not installed") from e
+
+        if not window_id:
+            return None
+
+        title = self._run("getwindowname", window_id) or "Unknown"
+        pid = self._run("getwindowpid", window_id)
+
+        return WindowInfo(
+            window_id=int(window_id),
+            title=title,
+            pid=int(pid) if pid and pid.isdigit() else None
+        )
+
+    async def get_active_window_async(self, executor: ProbeExecutor) -> Optional[WindowInfo]:
+        """Query xdotool through killable asyncio subprocesses."""
+        try:
+            window_id = await run_probe("xdotool", "getactivewindow", timeout=self.timeout)
+        except FileNotFoundError as e:
+            raise WindowSourceError("xdotool not installed") from e
+
+        if not window_id:
+            return None
+
+        title = await run_probe("xdotool", "getwindowname", window_id, timeout=self.timeout) or "Unknown"
+        pid = await run_probe("xdotool", "getwindowpid", window_id, timeout=self.timeout)
+
+        return WindowInfo(
+            window_id=int(window_id),
+            title=title,
+            pid=int(pid) if pid and pid.isdigit() else None
+        )
+
+class X11ChangeWatcher:
+    """
+    Blocks until the active window or its title changes.
+    Uses its own X connection and subscribes to PropertyNotify on the root
+    window (_NET_ACTIVE_WINDOW) and on the currently active window (title).
+    """
+
+    def __init__(self, display_name: Optional[str] = None):
+        self.display_name = display_name
+        self._display = None
+        self._root = None
+        self._active_window = None
+        self._watched_atoms = set()
+        self._active_atom = None
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+
+    def is_available(self) -> bool:
+        if not HAS_XLIB or not (self.display_name or os.environ.get("DISPLAY")):
+            return False
+        try:
+            self._connect()
+            return True
+        except WindowSourceError:
+            return False
+
+    def _connect(self):
+        if self._display is not None:
+            return
+
+        try:
+            self._display = xdisplay.Display(self.display_name)
+        except (DisplayError, ConnectionClosedError, OSError) as e:
+            self._display = None
+            raise WindowSourceError(f"Cannot open X display: {e}") from e
+
+        self._root = self._display.screen().root
+        self._active_atom = self._display.intern_atom("_NET_ACTIVE_WINDOW")
+        self._watched_atoms = {
+            self._active_atom,
+            self._display.intern_atom("_NET_WM_NAME"),
+            self._display.intern_atom("WM_NAME"),
+        }
+        self._root.change_attributes(event_mask=X.PropertyChangeMask)
+        self._follow_active_window()
+        self._display.flush()
+
+    def _follow_active_window(self):
+        """Move the title subscription to the currently active window."""
+        prop = self._root.get_full_property(self._active_atom, X.AnyPropertyType)
+        window_id = int(prop.value[0]) if prop is not None and prop.value else 0
+
+        if self._active_window is not None and self._active_window.id == window_id:
+            return
+
+        if self._active_window is not None:
+            try:
+                self._active_window.change_attributes(event_mask=X.NoEventMask)
+            except XError:
+                pass
+            self._active_window = None
+
+        if window_id:
+            window = self._display.create_resource_object("window", window_id)
+            try:
+                window.change_attributes(event_mask=X.PropertyChangeMask)
+                self._active_window = window
+            except XError:
+                self._active_window = None
+
+    def wait_for_change(self, timeout: float) -> Optional[float]:
+        """
+        Wait up to `timeout` seconds for a focus or title change.
+        Returns the wall-clock time of the first change, or None on timeout/wake.
+        """
+        if self._wake_read is None:
+            raise WindowSourceError("Change watcher is closed")
+        self._connect()
+        deadline = time.monotonic() + timeout
+        changed_at = None
+
+        try:
+            while changed_at is None:
+                # Drain events already buffered by Xlib before blocking
+                while self._display.pending_events():
+                    event = self._display.next_event()
+                    if event.type == X.PropertyNotify and event.atom in self._watched_atoms:
+                        if changed_at is None:
+                            changed_at = time.time()
+                        if event.atom == self._active_atom:
+                            self._follow_active_window()
+
+                if changed_at is not None:
+                    self._display.flush()
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+
+                readable, _, _ = select.select([self._display.fileno(), self._wake_read], [], [], remaining)
+                if self._wake_read in readable:
+                    self._drain_wake_pipe()
+                    return None
+                if not readable:
+                    return None
+        except (ConnectionClosedError, OSError) as e:
+            self._disconnect()
+            raise WindowSourceError(f"X connection lost: {e}") from e
+
+        return changed_at
+
+    def _drain_wake_pipe(self):
+        try:
+            while os.read(self._wake_read, 64):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wake(self):
+        """Interrupt a blocking wait_for_change call from another thread."""
+        if self._wake_write is None:
+            return
+        try:
+            os.write(self._wake_write, b"x")
+        except OSError:
+            pass
+
+    def _disconnect(self):
+        """Drop the X connection; the next wait reconnects."""
+        if self._display is not None:
+            try:
+                self._display.close()
+            except Exception:
+                pass
+        self._display = None
+        self._root = None
+        self._active_window = None
+
+    def close(self):
+        """Drop the X connection and the wake pipe; the watcher is unusable afterwards."""
+        self._disconnect()
+        for fd in (self._wake_read, self._wake_write):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._wake_read = self._wake_write = None
+
+def create_change_watcher() -> Optional[X11ChangeWatcher]:
+    """Create an X11 change watcher if the display supports it."""
+    watcher = X11ChangeWatcher()
+    if watcher.is_available():
+        return watcher
+    watcher.close()
+    return None
+
+WINDOW_SOURCES = {
+    X11WindowSource.name: X11WindowSource,
+    XdotoolWindowSource.name: XdotoolWindowSource,
+}
+
+def create_window_source(backend: str = "auto") -> Optional[WindowSource]:
+    """
+    Create the configured window source.
+    'auto' prefers the persistent X11 connection and falls back to xdotool.
+    """
+    candidates = ["x11", "xdotool"] if backend == "auto" else [backend]
+
+    for candidate in candidates:
+        source_class = WINDOW_SOURCES.get(candidate)
+        if source_class is None:
+            logger.warning(f"Unknown window source backend: {candidate}")
+            continue
+
+        source = source_class()
+        if source.is_available():
+            logger.info(f"🪟 Using {source.name} window source")
+            return source
+        source.close()
+
+    return None
@@ -0,0 +1,150 @@
+# =============================================================================
+# write_behind.py - Batched Write-Behind Queue for Activity Logs
+# =============================================================================
+"""
+Buffers finished activity sessions and persists them in batches.
+
+Ending a session only appends a record to an in-memory queue. A background
+flusher writes the queue with one multi-row INSERT per transaction when it
+reaches the size threshold or the oldest record has waited for the flush
+interval, so window switches no longer pay for a SQLite transaction and fsync
+on the event loop. Batches that fail to persist are handed to a fallback sink
+(the JSON log) instead of being dropped. The queue drains on shutdown.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BatchSink = Callable[[List[Dict[str, Any]]], Awaitable[Any]]
+FallbackSink = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+class WriteBehindQueue:
+    """Size/time triggered batch writer with an async sink (the DB executor)."""
+
+    def __init__(
+        self,
+        sink: BatchSink,
+        flush_size: int = 50,
+        flush_interval: float = 2.0,
+        fallback: Optional[FallbackSink] = None
+    ):
+        self.sink = sink
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self.fallback = fallback
+
+        self._pending: List[Dict[str, Any]] = []
+        self._oldest_at: Optional[float] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Observability counters
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+        self.fallback_rows = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Records waiting to be flushed."""
+        return len(self._pending)
+
+    async def start(self):
+        """Start the background flusher."""
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._flush_loop())
+
+    def submit(self, record: Dict[str, Any]):
+        """Queue one record; never blocks."""
+        if not self._pending:
+            self._oldest_at = time.monotonic()
+        self._pending.append(record)
+        if len(self._pending) >= self.flush_size and self._wakeup:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write everything queued so far. Returns the number of rows persisted."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending, self._oldest_at = self._pending, [], None
+            started = time.perf_counter()
+            try:
+                await self.sink(batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Write-behind flush of {len(batch)} records failed: {e}")
+                if self.fallback:
+                    await self.fallback(batch)
+                    self.fallback_rows += len(batch)
+                return 0
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.last_flush_ms = elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                self._total_flush_ms += elapsed_ms
+
+            self.flushes += 1
+            self.flushed_rows += len(batch)
+            return len(batch)
+
+    async def _flush_loop(self):
+        while not self._stopping:
+            try:
+                timeout = self.flush_interval
+                if self._oldest_at is not None:
+                    timeout = max(0.0, self._oldest_at + self.flush_interval - time.monotonic())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Write-behind loop error: {e}")
+                await asyncio.sleep(1)
+
+    async def stop(self):
+        """Stop the flusher and drain the queue."""
+        if self._task:
+            # Let an in-progress flush finish instead of cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        attempts = self.flushes + self.failed_flushes
+        return {
+            "queue_depth": self.depth,
+            "oldest_pending_seconds": round(time.monotonic() - self._oldest_at, 3) if self._oldest_at else 0.0,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+            "fallback_rows": self.fallback_rows,
+            "avg_batch_size": round(self.flushed_rows / self.flushes, 2) if self.flushes else 0.0,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / attempts, 3) if attempts else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "flush_size": self.flush_size,
+            "flush_interval": self.flush_interval
+        }
@@ -0,0 +1,304 @@
+# =============================================================================
+# retention.py - Retention Tiering for Activity History
+# =============================================================================
+"""
+Keeps activity history from growing without bound.
+
+Raw activity_logs rows (one per window switch) are the finest tier. Every
+session is also folded into activity_hour_buckets as it is written, and each
+day into a user_analytics rollup, so old raw rows can go once those coarser
+tiers are in place:
+
+- days older than retention_raw_days get a stored daily rollup if they lack
+  one, then their raw rows are deleted (hour buckets and rollups stay, so
+  range analytics, daily analytics and per-app usage keep working);
+- window titles older than retention_title_days are replaced by a short
+  sha256 digest (or dropped), keeping "same window" comparisons without the
+  text;
+- fallback log files (focus_logs) of days past either horizon are deleted
+  once the outbox has replayed them, so their plaintext titles do not
+  outlive the database's;
+- freed pages are handed back to the filesystem with PRAGMA
+  incremental_vacuum, retention_vacuum_pages at a time.
+
+Every delete, title update and vacuum step is its own short job on the
+database writer thread, so queued session writes run between them rather
+than waiting behind one long transaction. Incremental vacuum needs
+auto_vacuum=INCREMENTAL; new databases get it from the storage profile,
+existing ones need one `python manage.py retention --compact`.
+"""
+
+import asyncio
+import hashlib
+import logging
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+from models.database import LogCursor, async_db, db_manager
+from models.storage import database_pages, run_incremental_vacuum, run_vacuum
+from services.focus_guardian.outbox import FallbackOutbox
+
+logger = logging.getLogger(__name__)
+
+TITLE_HASH_PREFIX = "sha256:"
+STARTUP_DELAY = 60.0  # seconds before the first background pass
+
+def _horizon(days: int, today: Optional[date] = None) -> Optional[date]:
+    if days <= 0:
+        return None
+    return (today or date.today()) - timedelta(days=days)
+
+def raw_retention_horizon(today: Optional[date] = None) -> Optional[date]:
+    """First local day whose raw activity rows are kept, or None when they are kept forever."""
+    return _horizon(settings.retention_raw_days, today)
+
+def scrub_title(title: Optional[str], mode: str) -> Optional[str]:
+    """The stored form of an expired window title ("drop" empties it, anything else hashes it)."""
+    if not title:
+        return title
+    if mode == "drop":
+        return ""
+    if title.startswith(TITLE_HASH_PREFIX):
+        return title
+    return TITLE_HASH_PREFIX + hashlib.sha256(title.encode("utf-8")).hexdigest()[:16]
+
+def measure_query_latency(user_id: str, day: date, repeat: int = 5) -> Dict[str, float]:
+    """
+    Median milliseconds of the queries retention affects (blocking; run it
+    before and after a pass to see the effect).
+    """
+    from services.focus_guardian import rollups
+    from services.focus_guardian.range_analytics import load_range_analytics
+
+    probes = {
+        "day_log_page": lambda: db_manager.get_activity_log_rows(user_id, day.isoformat(), 100),
+        "day_rollup_build": lambda: rollups.build_daily_rollup(user_id, day),
+        "range_analytics_30d": lambda: load_range_analytics(user_id, day - timedelta(days=29), day),
+        "history_aggregate": lambda: db_manager.get_activity_aggregates(
+            user_id,
+            exclude_tag=rollups.IDLE_TAG,
+            productive_score=rollups.PRODUCTIVE_SCORE,
+            distraction_tag=rollups.DISTRACTION_TAG,
+            flow_seconds=rollups.FLOW_SESSION_SECONDS
+        )
+    }
+    timings = {}
+    for name, probe in probes.items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            probe()
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[name] = round(statistics.median(samples), 3)
+    return timings
+
+class RetentionManager:
+    """Periodic retention passes: fold, prune, scrub titles, vacuum."""
+
+    def __init__(
+        self,
+        raw_days: int = 0,
+        title_days: int = 0,
+        title_mode: str = "hash",
+        interval: float = 3600.0,
+        batch_rows: int = 2000,
+        vacuum_pages: int = 256,
+        vacuum_pause: float = 0.05
+    ):
+        self.raw_days = raw_days
+        self.title_days = title_days
+        self.title_mode = title_mode
+        self.interval = interval
+        self.batch_rows = max(1, batch_rows)
+        self.vacuum_pages = max(1, vacuum_pages)
+        self.vacuum_pause = vacuum_pause
+        self.outbox: Optional[FallbackOutbox] = None  # set by the tracker; its drained files expire too
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._titles_scrubbed_before: Dict[str, datetime] = {}  # user -> earlier rows already scrubbed
+        self.passes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.raw_days > 0 or self.title_days > 0
+
+    async def start(self):
+        """Start background passes (no-op when nothing is configured to expire)."""
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._retention_loop())
+        logger.info(f"🧹 Retention started (raw rows {self.raw_days or '∞'} days, titles {self.title_days or '∞'} days)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _retention_loop(self):
+        delay = min(STARTUP_DELAY, self.interval)
+        while True:
+            try:
+                await asyncio.sleep(delay)
+                delay = self.interval
+                await self.run()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error(f"Retention pass failed: {e}")
+
+    async def run(self, today: Optional[date] = None, compact: bool = False) -> Dict[str, Any]:
+        """
+        One retention pass. With compact, the file is rebuilt with a full
+        VACUUM instead of incremental steps (blocks writers; offline use).
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            started = time.perf_counter()
+            raw_horizon = _horizon(self.raw_days, today)
+            title_horizon = _horizon(self.title_days, today)
+            before = await async_db.write(database_pages)
+
+            users = await async_db.read(db_manager.get_activity_users)
+            rollups_built = rows_pruned = titles_scrubbed = 0
+            for user_id in users:
+                if raw_horizon is not None:
+                    rollups_built += await self._fold_days(user_id, raw_horizon)
+                    rows_pruned += await self._prune(user_id, datetime.combine(raw_horizon, datetime.min.time()))
+                if title_horizon is not None:
+                    titles_scrubbed += await self._scrub_titles(user_id, datetime.combine(title_horizon, datetime.min.time()))
+            fallback_files_expired = await self._expire_fallback(raw_horizon, title_horizon)
+
+            if compact:
+                await async_db.write(run_vacuum)
+                pages_vacuumed = max(0, before["page_count"] - (await async_db.write(database_pages))["page_count"])
+            else:
+                pages_vacuumed = await self.vacuum()
+            after = await async_db.write(database_pages)
+
+            report = {
+                "ran_at": datetime.now().isoformat(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "raw_kept_from": raw_horizon.isoformat() if raw_horizon else None,
+                "titles_kept_from": title_horizon.isoformat() if title_horizon else None,
+                "rollups_built": rollups_built,
+                "rows_pruned": rows_pruned,
+                "titles_scrubbed": titles_scrubbed,
+                "fallback_files_expired": fallback_files_expired,
+                "pages_vacuumed": pages_vacuumed,
+                "compacted": compact,
+                "database_bytes_before": before["database_bytes"],
+                "database_bytes_after": after["database_bytes"],
+                "bytes_reclaimed": before["database_bytes"] - after["database_bytes"],
+                "free_bytes": after["free_bytes"],
+                "auto_vacuum": after["auto_vacuum"]
+            }
+            self.passes += 1
+            self.last_error = None
+            self.last_report = report
+            if rows_pruned or titles_scrubbed or fallback_files_expired or report["bytes_reclaimed"]:
+                logger.info(
+                    f"🧹 Retention: {rows_pruned} rows pruned, {titles_scrubbed} titles scrubbed, "
+                    f"{fallback_files_expired} fallback files expired, "
+                    f"{report['bytes_reclaimed'] / 1048576:.1f} MB reclaimed"
+                )
+            return report
+
+    async def _fold_days(self, user_id: str, horizon: date) -> int:
+        """Store a daily rollup for every expiring day that has none yet."""
+        from services.focus_guardian.rollups import build_daily_rollup
+
+        days = await async_db.read(db_manager.get_days_without_rollup, user_id, horizon.isoformat())
+        for day in days:
+            rollup = await async_db.read(build_daily_rollup, user_id, date.fromisoformat(day))
+            await async_db.save_daily_rollups({(user_id, day): rollup.to_row()})
+        return len(days)
+
+    async def _expire_fallback(self, raw_horizon: Optional[date], title_horizon: Optional[date]) -> int:
+        """Delete replayed fallback files of days past either horizon."""
+        horizons = [horizon for horizon in (raw_horizon, title_horizon) if horizon is not None]
+        if self.outbox is None or not horizons:
+            return 0
+        return await self.outbox.expire(max(horizons))
+
+    async def _prune(self, user_id: str, before: datetime) -> int:
+        pruned = 0
+        while True:
+            deleted = await async_db.write(db_manager.prune_activity_logs, user_id, before, self.batch_rows)
+            pruned += deleted
+            if deleted < self.batch_rows:
+                return pruned
+
+    async def _scrub_titles(self, user_id: str, before: datetime) -> int:
+        since = self._titles_scrubbed_before.get(user_id)
+        position: Optional[LogCursor] = (since, 0) if since else None
+        scrubbed = 0
+        while True:
+            rows = await async_db.read(db_manager.get_window_titles, user_id, before, position, self.batch_rows)
+            if not rows:
+                break
+            changes = {}
+            for row in rows:
+                title = scrub_title(row.window_title, self.title_mode)
+                if title != row.window_title:
+                    changes[row.id] = title
+            scrubbed += await async_db.write(db_manager.update_window_titles, changes)
+            position = (rows[-1].start_time, rows[-1].id)
+        self._titles_scrubbed_before[user_id] = before
+        return scrubbed
+
+    async def vacuum(self) -> int:
+        """Release free pages in small steps; returns the pages released."""
+        pages = await async_db.write(database_pages)
+        if not pages["freelist_count"]:
+            return 0
+        if pages["auto_vacuum"] != "incremental":
+            logger.warning(
+                f"⚠️ {pages['free_bytes'] / 1048576:.1f} MB free in the database, but auto_vacuum is "
+                f"{pages['auto_vacuum']}; run `python manage.py retention --compact` once to enable incremental vacuum"
+            )
+            return 0
+        released = 0
+        while True:
+            step = await async_db.write(run_incremental_vacuum, self.vacuum_pages)
+            released += step
+            if step < self.vacuum_pages:
+                return released
+            await asyncio.sleep(self.vacuum_pause)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "raw_days": self.raw_days,
+            "title_days": self.title_days,
+            "title_mode": self.title_mode,
+            "passes": self.passes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_report": self.last_report
+        }
+
+# Global retention manager instance
+retention_manager = RetentionManager(
+    raw_days=settings.retention_raw_days,
+    title_days=settings.retention_title_days,
+    title_mode=settings.retention_title_mode,
+    interval=settings.retention_interval,
+    batch_rows=settings.retention_batch_rows,
+    vacuum_pages=settings.retention_vacuum_pages,
+    vacuum_pause=settings.retention_vacuum_pause
+)
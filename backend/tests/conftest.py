@@ -0,0 +1,52 @@
+import os
+import tempfile
+from datetime import timedelta
+
+import pytest
+
+# Point the app at a throwaway database and log directory before any
+# backend module reads settings, so tests never touch backend/data.
+_TEST_DATA_DIR = tempfile.mkdtemp(prefix="control-station-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TEST_DATA_DIR}/control_station.db")
+os.environ.setdefault("FOCUS_LOG_DIR", os.path.join(_TEST_DATA_DIR, "focus_logs"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database_schema():
+    """Create the schema once so database tests do not depend on app startup."""
+    from models.database import Base, engine
+    from models.migrations import run_migrations
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    yield
+
+
+def activity_record(user_id, start, seconds=60.0, app="code", title=None, tag="💻 Coding", score=0.5):
+    """A create_activity_log keyword dict (window title defaults to the app name)."""
+    return {
+        "user_id": user_id,
+        "app_name": app,
+        "window_title": app if title is None else title,
+        "start_time": start,
+        "end_time": start + timedelta(seconds=seconds),
+        "duration_seconds": float(seconds),
+        "tag": tag,
+        "productivity_score": score
+    }
+
+
+@pytest.fixture
+def purge_users():
+    """Call with a user id; its activity, bucket, rollup and pomodoro rows are deleted after the test."""
+    from models.database import ActivityHourBucket, ActivityLog, PomodoroSession, SessionLocal, UserAnalytics
+
+    users = []
+    yield users.append
+    db = SessionLocal()
+    try:
+        for model in (ActivityLog, ActivityHourBucket, UserAnalytics, PomodoroSession):
+            db.query(model).filter(model.user_id.in_(users)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
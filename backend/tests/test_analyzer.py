@@ -0,0 +1,45 @@
+from services.focus_guardian.analyzer import ClassificationCache, KeywordMatcher, analyzer
+
+
+def test_keyword_matcher_finds_overlapping_keywords():
+    matcher = KeywordMatcher(["git", "github", "hub", "tube", "youtube"])
+
+    assert matcher.match("github.com/youtube") == {"git", "github", "hub", "tube", "youtube"}
+    assert matcher.match("gitube") == {"git", "tube"}
+    assert matcher.match("nothing here") == set()
+
+
+def test_rule_order_wins_over_match_position():
+    # The app rule for Development precedes the title rule for Distraction
+    tag, _ = analyzer.classify("code", "reddit - python")
+    assert tag == "✅ Development"
+
+    # Productive title boost is listed before the distraction penalty
+    _, score = analyzer.classify("firefox.exe", "youtube python tutorial")
+    assert score == 0.3 + 0.3
+
+
+def test_analyze_returns_tag_score_and_enhanced_title_together():
+    analysis = analyzer.analyze("firefox", "Never Gonna Give You Up - youtube")
+
+    assert analysis.enhanced_title == "🎥 YouTube: Never Gonna Give You Up"
+    assert analysis.tag == "❌ Distraction"
+    assert analysis.base_score == 0.5 - 0.4
+
+
+def test_classification_cache_counts_and_invalidates_on_rule_reload():
+    cache = ClassificationCache(analyzer, max_size=2)
+
+    assert cache.classify("Code", "main.py") == analyzer.classify("Code", "main.py")
+    cache.classify("code", "MAIN.PY")  # same normalised key
+    cache.classify("slack", "general")
+    cache.classify("firefox", "news")  # evicts the least recently used entry
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+
+    analyzer.reload()
+    cache.classify("slack", "general")
+    stats = cache.stats()
+    assert stats["invalidations"] == 1
+    assert stats["size"] == 1
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from conftest import activity_record
+from models.database import AsyncDatabaseManager, ReadSessionLocal, db_manager, read_engine, engine
+
+USER = "stress"
+
+
+def _record(i):
+    start = datetime(2024, 2, 1, 8) + timedelta(seconds=i * 7)
+    return activity_record(USER, start, 7, app=f"app-{i % 5}", title=f"title {i}", tag="📝 General")
+
+
+@pytest.fixture
+def clean_rows(purge_users):
+    purge_users(USER)
+
+
+def test_parallel_ingestion_and_analytics_without_lock_errors(clean_rows):
+    manager = AsyncDatabaseManager(db_manager, read_pool_size=3, write_queue_size=4)
+
+    async def ingest(worker):
+        for batch in range(10):
+            base = worker * 1000 + batch * 10
+            if batch % 2:
+                await manager.bulk_create_activity_logs([_record(base + i) for i in range(10)])
+            else:
+                for i in range(10):
+                    await manager.create_activity_log(**_record(base + i))
+
+    async def analyse():
+        seen = []
+        for _ in range(20):
+            rows = await manager.get_activity_log_rows(USER, "2024-02-01", limit=10000)
+            seen.append(len(rows))
+        return seen
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(ingest(worker) for worker in range(8)),
+            *(analyse() for _ in range(3))
+        )
+        return results[8:]
+
+    try:
+        reads = asyncio.run(scenario())
+        stats = manager.stats()
+    finally:
+        manager.shutdown()
+
+    assert len(db_manager.get_activity_log_rows(USER, "2024-02-01", limit=10000)) == 8 * 100
+    assert all(counts == sorted(counts) for counts in reads)  # readers see monotonic progress
+    assert stats["writer"]["failed"] == 0
+    assert stats["writer"]["completed"] == 8 * (5 * 10 + 5)
+    assert 1 <= stats["writer"]["max_queue_depth"] <= 4
+    assert stats["readers"]["completed"] == 60
+
+
+def test_full_write_queue_waits_for_the_job_to_leave_the_writer():
+    manager = AsyncDatabaseManager(db_manager, write_queue_size=1)
+    release = threading.Event()
+    order = []
+
+    def slow():
+        release.wait(5)
+        order.append("slow")
+
+    async def scenario():
+        first = asyncio.create_task(manager.write(slow))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(manager.write(order.append, "second"))
+        first.cancel()  # the caller gives up, the job keeps its slot
+        await asyncio.sleep(0.05)
+        queued = second.done()
+        depth = manager.stats()["writer"]["queue_depth"]
+        release.set()
+        await second
+        return queued, depth
+
+    try:
+        queued, depth = asyncio.run(scenario())
+    finally:
+        manager.shutdown()
+
+    assert (queued, depth) == (False, 1)
+    assert order == ["slow", "second"]
+
+
+def test_reader_connections_are_read_only():
+    assert read_engine is not engine
+
+    db = ReadSessionLocal()
+    try:
+        with pytest.raises(OperationalError):
+            db.execute(text("DELETE FROM activity_logs"))
+    finally:
+        db.close()
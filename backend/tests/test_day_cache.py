@@ -0,0 +1,139 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from conftest import activity_record
+from models.database import db_manager
+from services.focus_guardian import day_cache
+from services.focus_guardian.day_cache import ActivityDayCache, DayColumns
+from services.focus_guardian.fallback_log import JsonlActivityLog
+from services.focus_guardian.idle import IDLE_TAG
+from services.focus_guardian.rollups import DailyRollup
+from services.focus_guardian.tracker import ActivityTracker
+
+USER = "day-cache"
+
+SESSIONS = [
+    # (minute offset, app, tag, duration, score)
+    (0, "code", "💻 Coding", 2400.0, 0.9),
+    (40, "firefox", "❌ Distraction", 300.0, 0.1),
+    (45, "idle", IDLE_TAG, 900.0, 0.0),
+    (60, "code", "💻 Coding", 600.0, 0.7),
+    (70, "slack", "📝 General", 125.0, None),
+]
+
+
+def _record(offset, app, tag, duration, score):
+    start = datetime.combine(date.today(), datetime.min.time()) + timedelta(minutes=offset)
+    return activity_record(USER, start, duration, app, tag=tag, score=score)
+
+
+@pytest.fixture
+def clean_rows(purge_users):
+    purge_users(USER)
+
+
+@pytest.fixture(params=["numpy", "pure-python"])
+def reductions(request, monkeypatch):
+    """Run a test over the numpy reductions (skipped without numpy) and the builtin fallback."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(day_cache, "HAS_NUMPY", request.param == "numpy")
+    return request.param
+
+
+def test_column_reductions_match_the_daily_rollup(reductions):
+    columns, rollup = DayColumns(date.today()), DailyRollup()
+    for session in SESSIONS:
+        record = _record(*session)
+        args = (record["app_name"], record["tag"], record["duration_seconds"],
+                record["productivity_score"], record["start_time"])
+        columns.append(*args)
+        rollup.add_session(*args)
+
+    expected = rollup.to_analytics()
+    summary = columns.summary()
+    assert summary["session_count"] == 4 and summary["idle_time"] == 900
+    assert summary["total_focused_time"] == expected["total_focused_time"]
+    assert summary["hourly_breakdown"] == expected["hourly_breakdown"]
+    assert summary["top_apps"] == pytest.approx(expected["top_apps"])
+    assert columns.weighted_productivity() == pytest.approx((2400 * 0.9 + 300 * 0.1 + 600 * 0.7) / 3425)
+    assert DayColumns(date.today()).summary()["productivity_score"] == 0.0
+    assert ActivityDayCache().stats()["vectorised"] == (reductions == "numpy")
+
+
+def test_cold_start_reads_the_database_once_and_merges_unflushed_sessions(clean_rows):
+    records = [_record(*session) for session in SESSIONS]
+    cache = ActivityDayCache()
+
+    async def scenario():
+        db_manager.bulk_create_activity_logs(records[:3])
+        # Ended before the cache was warm: one already flushed, one still queued
+        cache.append(records[2])
+        cache.append(records[3])
+        first = await cache.get(USER)
+        cache.append(records[4])
+        second = await cache.get(USER)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert cache.stats()["cold_loads"] == 1
+    assert len(second) == 4 and second.idle_seconds == 900
+    assert second.total_seconds == 2400 + 300 + 600 + 125
+    assert second.weighted_productivity() == pytest.approx((2400 * 0.9 + 300 * 0.1 + 600 * 0.7) / 3425)
+
+
+def test_seeded_day_rolls_over_at_midnight_without_reading_the_database():
+    cache = ActivityDayCache()
+    yesterday = DayColumns(date.today() - timedelta(days=1))
+    yesterday.append("code", "💻 Coding", 600.0, 0.9, datetime.combine(yesterday.day, datetime.min.time()))
+    cache._days[USER] = yesterday
+    assert cache.current("someone-else") is None
+
+    # Ends after midnight, before anyone asked for today's status
+    cache.append(_record(*SESSIONS[0]))
+    today = cache.current(USER)
+    assert today.day == date.today() and len(today) == 1
+    assert today.weighted_productivity() == pytest.approx(0.9)
+
+    cache._days[USER] = yesterday
+    fresh = cache.current(USER)
+    assert len(fresh) == 0 and fresh.weighted_productivity() == 0.0
+    assert cache.stats()["rollovers"] == 2 and cache.stats()["cold_loads"] == 0
+
+
+def test_cold_start_seeds_through_the_merged_reader(clean_rows, tmp_path):
+    tracker = ActivityTracker()
+    tracker.current_user_id = USER
+    tracker._fallback_log = JsonlActivityLog(tmp_path, fsync=False)
+    records = [_record(*session) for session in SESSIONS]
+    db_manager.bulk_create_activity_logs(records[:2])
+    # Rejected by the database: only in the fallback log, waiting for the outbox
+    tracker._fallback_log.append([records[3]])
+
+    # A session that started before midnight counts with the part after it
+    night = datetime.combine(date.today(), datetime.min.time()) - timedelta(minutes=10)
+    db_manager.bulk_create_activity_logs([{
+        **records[0], "app_name": "late", "start_time": night,
+        "end_time": night + timedelta(minutes=30), "duration_seconds": 1800.0
+    }])
+
+    columns = asyncio.run(ActivityDayCache(reader=tracker.iter_activity_logs).get(USER))
+    assert sorted(columns.app_seconds().items()) == [("code", 3000.0), ("firefox", 300.0), ("late", 1200.0)]
+
+
+def test_session_spanning_midnight_is_split_across_the_rollover():
+    cache = ActivityDayCache()
+    yesterday = DayColumns(date.today() - timedelta(days=1))
+    cache._days[USER] = yesterday
+
+    start = datetime.combine(date.today(), datetime.min.time()) - timedelta(minutes=15)
+    cache.append({**_record(*SESSIONS[0]), "start_time": start,
+                  "end_time": start + timedelta(minutes=20), "duration_seconds": 1200.0})
+
+    assert yesterday.total_seconds == pytest.approx(900.0)
+    today = cache.current(USER)
+    assert today.day == date.today() and today.total_seconds == pytest.approx(300.0)
+    assert list(today.hours) == [0]
@@ -0,0 +1,79 @@
+import csv
+import io
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from conftest import activity_record
+from models.database import db_manager, read_engine
+from services.export import HAS_PYARROW, export_chunks
+
+USER = "exporter"
+DAY = date(2023, 9, 4)
+
+
+@pytest.fixture
+def seeded_history(purge_users):
+    purge_users(USER)
+    start = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=9)
+    db_manager.bulk_create_activity_logs([
+        activity_record(USER, start + timedelta(minutes=i), 45, f"app-{i % 3}", title=f"title, \"{i}\"", score=0.8)  # needs CSV quoting
+        for i in range(120)
+    ] + [activity_record(USER, start + timedelta(days=1), 10, "late", title="next day", score=0.8)])
+
+
+def test_csv_export_streams_in_chunks_and_round_trips(seeded_history):
+    chunks = list(export_chunks("activity_logs", "csv", USER, DAY, DAY, chunk_rows=50))
+    assert len(chunks) == 3  # 50 + 50 + 20 rows, header in the first chunk
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert len(rows) == 120
+    assert rows[0]["window_title"] == 'title, "0"'
+    assert rows[0]["start_time"].startswith("2023-09-04 09:00:00")
+    assert [row["start_time"] for row in rows] == sorted(row["start_time"] for row in rows)
+
+
+def test_export_batches_are_keyset_queries_on_short_lived_connections(seeded_history):
+    tied = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=9, minutes=6)
+    db_manager.bulk_create_activity_logs([
+        {"user_id": USER, "app_name": "tie", "window_title": str(i), "start_time": tied, "end_time": tied,
+         "duration_seconds": 0.0, "tag": "💻 Coding", "productivity_score": 0.8}
+        for i in range(4)
+    ])
+
+    batches = db_manager.iter_export_rows("activity_logs", USER, batch_size=7)
+    first = next(batches)
+    assert read_engine.pool.checkedout() == 0
+    rows = first + [row for batch in batches for row in batch]
+    assert len({row.id for row in rows}) == len(rows) == 125
+    assert [(row.start_time, row.id) for row in rows] == sorted((row.start_time, row.id) for row in rows)
+
+    pomodoros = list(db_manager.iter_export_rows("pomodoro_sessions", batch_size=3))
+    assert all(len(batch) <= 3 for batch in pomodoros)
+
+
+def test_export_endpoint_streams_csv_with_attachment_headers(seeded_history):
+    client = TestClient(app)
+    response = client.get("/api/focus/export", params={
+        "table": "activity_logs", "format": "csv", "user_id": USER, "start_date": DAY.isoformat()
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="activity_logs-2023-09-04.csv"' in response.headers["content-disposition"]
+    assert len(list(csv.DictReader(io.StringIO(response.text)))) == 121
+
+    assert client.get("/api/focus/export", params={"table": "users"}).status_code == 400
+    assert client.get("/api/focus/export", params={"start_date": "2023-09-05", "end_date": "2023-09-04"}).status_code == 400
+
+
+def test_columnar_export_requires_pyarrow(seeded_history):
+    response = TestClient(app).get("/api/focus/export", params={"format": "parquet", "user_id": USER})
+    if HAS_PYARROW:
+        import pyarrow.parquet as pq
+
+        assert response.status_code == 200
+        assert pq.read_table(io.BytesIO(response.content)).num_rows == 121
+    else:
+        assert response.status_code == 501
@@ -0,0 +1,82 @@
+import json
+from datetime import date, datetime, timedelta
+
+from conftest import activity_record
+from services.focus_guardian.fallback_log import JsonlActivityLog
+
+DAY = date(2024, 2, 10)
+
+
+def _records(count, offset=0):
+    start = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=8)
+    return [
+        activity_record("default", start + timedelta(seconds=i * 30), 20, f"app-{i % 4}", title=f"title {i}", score=0.8)
+        for i in range(offset, offset + count)
+    ]
+
+
+def test_appends_rotate_index_and_read_back_in_order(tmp_path):
+    log = JsonlActivityLog(tmp_path, segment_bytes=4096, index_stride=10)
+    for offset in range(0, 100, 25):
+        log.append(_records(25, offset))
+    log.close()
+
+    segments = {path.name for path in tmp_path.glob("*.jsonl")}
+    assert {f"{DAY}.jsonl", f"{DAY}.1.jsonl"} <= segments
+    assert log.stats()["fsyncs"] < log.stats()["records_written"] == 100
+
+    entries = log.read_day(DAY)
+    assert [entry["title"] for entry in entries] == [f"title {i}" for i in range(100)]
+
+    since = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=8, seconds=30 * 40)
+    window = log.read_day(DAY, since, since + timedelta(seconds=30 * 5))
+    assert [entry["title"] for entry in window] == [f"title {i}" for i in range(40, 45)]
+
+
+def test_range_reads_seek_past_non_matching_blocks(tmp_path):
+    log = JsonlActivityLog(tmp_path, index_stride=10)
+    log.append(_records(100))
+    log.close()
+
+    segment = tmp_path / f"{DAY}.jsonl"
+    blocks = [json.loads(line) for line in (tmp_path / f"{DAY}.jsonl.idx").read_text().splitlines()]
+    assert len(blocks) == 10 and blocks[-1]["end"] == segment.stat().st_size
+
+    # Corrupt a block the range cannot match: it must never be read
+    data = bytearray(segment.read_bytes())
+    data[blocks[0]["offset"]:blocks[0]["end"]] = b"x" * (blocks[0]["end"] - blocks[0]["offset"])
+    segment.write_bytes(bytes(data))
+    since = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=8, seconds=30 * 90)
+    assert len(log.read_day(DAY, since)) == 10
+
+
+def test_torn_tail_is_skipped_and_fenced_and_legacy_arrays_still_read(tmp_path):
+    (tmp_path / f"{DAY}.json").write_text(json.dumps([{
+        "app": "legacy", "title": "old format", "start_time": f"{DAY} 07:00:00",
+        "end_time": f"{DAY} 07:01:00", "duration_seconds": 60, "tag": "📝 General", "productivity_score": 0.5
+    }], indent=2))
+    log = JsonlActivityLog(tmp_path)
+    log.append(_records(3))
+    with open(tmp_path / f"{DAY}.jsonl", "ab") as f:
+        f.write(b'{"app": "torn", "start_ti')  # crash mid-write
+
+    restarted = JsonlActivityLog(tmp_path)
+    assert len(restarted.read_day(DAY)) == 4
+    restarted.append(_records(2, offset=3))
+    titles = [entry["title"] for entry in restarted.read_day(DAY)]
+    assert titles == ["old format"] + [f"title {i}" for i in range(5)]
+
+
+def test_iter_day_merges_segments_lazily_newest_first(tmp_path):
+    log = JsonlActivityLog(tmp_path, segment_bytes=4096, index_stride=10)
+    log.append(_records(60))
+    log.close()
+    assert len(list(tmp_path.glob("*.jsonl"))) > 1
+
+    entries = log.iter_day(DAY, newest_first=True)
+    assert [next(entries)["title"] for _ in range(3)] == ["title 59", "title 58", "title 57"]
+
+    until = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=8, seconds=30 * 20)
+    assert [entry["title"] for entry in log.iter_day(DAY, until=until, newest_first=True)] == [
+        f"title {i}" for i in range(19, -1, -1)
+    ]
@@ -0,0 +1,69 @@
+import platform
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config.settings import settings
+from main import app
+from services.focus_guardian.tracker import tracker
+from services.focus_guardian.window_sources import WindowInfo, WindowSource
+
+
+class StalledWindowSource(WindowSource):
+    """Window source whose query hangs like a wedged X server or xdotool."""
+
+    name = "stalled"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def is_available(self) -> bool:
+        return True
+
+    def get_active_window(self):
+        self.calls += 1
+        self.release.wait(timeout=30)
+        return WindowInfo(window_id=1, title="stalled", pid=None)
+
+
+@pytest.mark.skipif(platform.system() != "Linux", reason="exercises the Linux window source path")
+def test_http_latency_stays_flat_while_probe_is_stalled(monkeypatch):
+    monkeypatch.setattr(settings, "focus_update_interval", 0.1)
+    monkeypatch.setattr(settings, "focus_probe_deadline", 0.2)
+
+    with TestClient(app) as client:
+        stalled = StalledWindowSource()
+        monkeypatch.setattr(tracker, "_window_source", stalled)
+        monkeypatch.setattr(tracker, "_change_watcher", None)
+
+        baseline = []
+        for _ in range(5):
+            started = time.perf_counter()
+            assert client.get("/api/health").status_code == 200
+            baseline.append(time.perf_counter() - started)
+
+        try:
+            assert client.post("/api/focus/start").status_code == 200
+
+            # Wait until the probe is actually wedged in a worker thread
+            deadline = time.monotonic() + 5
+            while stalled.calls == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert stalled.calls > 0
+
+            stalled_latencies = []
+            for _ in range(20):
+                started = time.perf_counter()
+                assert client.get("/api/health").status_code == 200
+                stalled_latencies.append(time.perf_counter() - started)
+                time.sleep(0.05)
+
+            # The probe pool is bounded, so stalled probes never pile up
+            assert stalled.calls <= settings.focus_probe_workers
+            assert max(stalled_latencies) < max(baseline) + 0.1
+        finally:
+            stalled.release.set()
+            client.post("/api/focus/stop")
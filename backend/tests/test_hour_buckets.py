@@ -0,0 +1,62 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import activity_record
+from main import app
+from models.buckets import aggregate_hour_buckets, hour_slices
+from models.database import db_manager
+from services.focus_guardian.idle import IDLE_TAG
+from services.focus_guardian.range_analytics import load_range_analytics, month_bounds, week_bounds
+
+
+def _record(user_id, start, seconds, app="code", tag="💻 Coding", score=0.9):
+    return activity_record(user_id, start, seconds, app, tag=tag, score=score)
+
+
+def test_sessions_are_split_at_hour_boundaries():
+    slices = list(hour_slices(datetime(2024, 5, 1, 9, 45), datetime(2024, 5, 1, 11, 15), 5400.0))
+    assert slices == [("2024-05-01 09", 900.0), ("2024-05-01 10", 3600.0), ("2024-05-01 11", 900.0)]
+
+    buckets = aggregate_hour_buckets([_record("u", datetime(2024, 5, 1, 23, 30), 3600)])
+    assert {key[1]: value["session_count"] for key, value in buckets.items()} == {"2024-05-01 23": 1, "2024-05-02 00": 0}
+    assert sum(value["total_seconds"] for value in buckets.values()) == pytest.approx(3600.0)
+
+
+def test_ingest_maintains_buckets_and_ranges_read_them(purge_users):
+    user = "buckets"
+    purge_users(user)
+    start = datetime(2024, 5, 6, 9)  # a Monday
+    db_manager.bulk_create_activity_logs([
+        _record(user, start + timedelta(days=day, minutes=10 * i), 600, app=f"app-{i % 3}")
+        for day in range(7) for i in range(6)
+    ])
+    db_manager.create_activity_log(**_record(user, start + timedelta(hours=2), 1200, app="idle", tag=IDLE_TAG, score=0.0))
+    db_manager.create_activity_log(**_record(user, start + timedelta(hours=3), 600, app="reddit", tag="❌ Distraction", score=0.1))
+
+    summary = load_range_analytics(user, *week_bounds(date(2024, 5, 9)))
+
+    assert summary["start_date"] == "2024-05-06" and summary["days"] == 7
+    assert summary["total_focused_time"] == 7 * 6 * 600 + 600
+    assert summary["idle_time"] == 1200
+    assert summary["session_count"] == 43
+    assert summary["productive_time"] == 7 * 6 * 600
+    assert summary["productivity_score"] == pytest.approx((25200 * 0.9 + 600 * 0.1) / 25800)
+    assert summary["daily_breakdown"][0]["total_focused_time"] == 4200
+    assert summary["hourly_breakdown"][9] == 7 * 60
+    # 3 apps x 7 days in hour 9, plus idle and distraction buckets
+    assert summary["buckets_scanned"] == 23
+
+    assert load_range_analytics(user, *month_bounds(2024, 6))["total_focused_time"] == 0
+
+
+def test_range_endpoints_validate_and_answer():
+    with TestClient(app) as client:
+        assert client.get("/api/focus/analytics/week", params={"date_filter": "2024-05-09"}).json()["start_date"] == "2024-05-06"
+        assert client.get("/api/focus/analytics/month", params={"month": "2024-02"}).json()["days"] == 29
+        assert client.get("/api/focus/analytics/month", params={"month": "2024-13"}).status_code == 400
+        response = client.get("/api/focus/analytics/range", params={"start_date": "2024-05-10", "end_date": "2024-05-01"})
+        assert response.status_code == 400
+        response = client.get("/api/focus/analytics/range", params={"start_date": "2023-01-01", "end_date": "2024-12-31"})
+        assert response.status_code == 400
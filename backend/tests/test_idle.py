@@ -0,0 +1,111 @@
+import asyncio
+
+from config.settings import settings
+from services.focus_guardian.idle import IDLE_APP, IdleSource
+from services.focus_guardian.tracker import ActivityTracker
+
+
+class ScriptedIdleSource(IdleSource):
+    name = "scripted"
+
+    def __init__(self):
+        self.idle_seconds = 0.0
+
+    def is_available(self) -> bool:
+        return True
+
+    def get_idle_seconds(self):
+        return self.idle_seconds
+
+
+def test_tracker_suspends_while_idle_and_backdates_resume(monkeypatch):
+    monkeypatch.setattr(settings, "focus_update_interval", 1.0)
+    monkeypatch.setattr(settings, "focus_idle_threshold", 300.0)
+    monkeypatch.setattr(settings, "focus_idle_backoff_max", 4.0)
+
+    tracker = ActivityTracker()
+    idle = ScriptedIdleSource()
+    tracker._idle_source = idle
+    clock = [1000.0]
+    ended, probes = [], []
+
+    async def fake_end(end_time=None):
+        if tracker.current_app:
+            ended.append((tracker.current_app, tracker.current_start_time, end_time, tracker.is_idle))
+
+    async def probe():
+        probes.append(clock[0])
+        return "code", "main.py"
+
+    async def noop(*args):
+        pass
+
+    monkeypatch.setattr("services.focus_guardian.tracker.time.time", lambda: clock[0])
+    monkeypatch.setattr(tracker, "_end_current_session", fake_end)
+    monkeypatch.setattr(tracker, "_get_foreground_info", probe)
+    monkeypatch.setattr(tracker, "_emit_window_changed_event", noop)
+    monkeypatch.setattr(tracker, "_emit_idle_changed_event", noop)
+    monkeypatch.setattr(tracker, "_send_websocket_update", noop)
+
+    async def step(now, idle_seconds):
+        clock[0] = now
+        idle.idle_seconds = idle_seconds
+        return await tracker._sample()
+
+    async def scenario():
+        delays = [await step(1000, 0)]
+        delays.append(await step(1400, 350))  # last input at 1050
+        status = await tracker.get_current_status()
+        delays += [await step(1401, 351), await step(1402, 352), await step(1403, 353)]
+        delays.append(await step(1404, 3))  # input at 1401
+        return delays, status
+
+    delays, idle_status = asyncio.run(scenario())
+
+    # The idle counter is re-read every focus_update_interval so a return is not delayed
+    assert delays == [settings.focus_min_interval, 1.0, 1.0, 1.0, 1.0, settings.focus_min_interval]
+    assert idle_status["is_idle"] and idle_status["idle_seconds"] == 350
+    assert probes == [1000, 1404]  # no foreground probes while away
+    assert ended == [("code", 1000, 1050, False), (IDLE_APP, 1050, 1401, True)]
+    assert (tracker.current_app, tracker.current_start_time, tracker.is_idle) == ("code", 1401, False)
+
+
+def test_idle_broadcasts_slow_down_but_wake_on_resume_and_keep_pomodoro_pace(monkeypatch):
+    from datetime import datetime
+
+    from api import websocket
+    from services.event_bus import Event, EventTypes
+
+    sent = []
+
+    async def status():
+        return {}
+
+    async def record(message):
+        sent.append(message)
+
+    monkeypatch.setattr(settings, "focus_update_interval", 0.01)
+    monkeypatch.setattr(settings, "focus_idle_backoff_max", 60.0)
+    monkeypatch.setattr(websocket.tracker, "is_idle", True)
+    monkeypatch.setattr(websocket.tracker, "get_current_status", status)
+    monkeypatch.setattr(websocket.pomodoro, "get_status", status)
+    monkeypatch.setattr(websocket.manager, "active_connections", {object()})
+    monkeypatch.setattr(websocket.manager, "broadcast", record)
+
+    monkeypatch.setattr(websocket.pomodoro, "is_running", True)
+    assert websocket.broadcast_interval() == 0.01  # the countdown keeps ticking while away
+    monkeypatch.setattr(websocket.pomodoro, "is_running", False)
+    assert websocket.broadcast_interval() == 60.0
+
+    async def scenario():
+        task = asyncio.create_task(websocket.broadcast_updates())
+        await asyncio.sleep(0.05)
+        idle_broadcasts = len(sent)
+        websocket.tracker.is_idle = False
+        await websocket.on_websocket_event(Event(EventTypes.FOCUS_IDLE_CHANGED, {"idle": False}, datetime.utcnow(), "test"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return idle_broadcasts
+
+    assert asyncio.run(scenario()) == 1
+    assert len([message for message in sent if message.get("type") == "status_update"]) > 2
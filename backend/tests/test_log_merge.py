@@ -0,0 +1,110 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from conftest import activity_record
+from models.database import db_manager
+from services.focus_guardian.fallback_log import JsonlActivityLog
+from services.focus_guardian.log_merge import LogItem, merge_logs
+from services.focus_guardian.tracker import ActivityTracker
+
+DAY = date(2023, 8, 14)
+BASE = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=9)
+
+
+def _record(app, minute, seconds=50, user=None):
+    return activity_record(user or "merge", BASE + timedelta(minutes=minute), seconds, app, title=f"{app} window", score=0.7)
+
+
+def _item(app, start, end, priority, row_id=0):
+    return LogItem(BASE + timedelta(seconds=start), BASE + timedelta(seconds=end), priority, row_id, {
+        "app_name": app, "duration_seconds": float(end - start)
+    })
+
+
+@pytest.fixture
+def merge_tracker(tmp_path, purge_users):
+    purge_users("merge")
+    tracker = ActivityTracker()
+    tracker.current_user_id = "merge"
+    tracker._fallback_log = JsonlActivityLog(tmp_path, fsync=False)
+    return tracker
+
+
+def test_merge_collapses_duplicates_and_trims_overlaps_across_sources():
+    database = [_item("editor", 300, 360, 0, row_id=7), _item("browser", 100, 200, 0, row_id=3)]
+    fallback = [
+        _item("editor", 300, 360, 1),      # replayed copy of row 7
+        _item("terminal", 150, 250, 1),    # overlaps browser's end
+        _item("terminal", 0, 120, 1)       # overlaps browser's start
+    ]
+    merged = list(merge_logs([iter(database), iter(fallback)]))
+
+    assert [(m.log["app_name"], m.priority) for m in merged] == [
+        ("editor", 0), ("terminal", 1), ("browser", 0), ("terminal", 1)
+    ]
+    # browser (database) is trimmed against the newer terminal session; the
+    # oldest terminal session is trimmed against browser
+    assert [(m.start - BASE).seconds for m in merged] == [300, 150, 100, 0]
+    assert [(m.end - BASE).seconds for m in merged] == [360, 250, 150, 100]
+    assert merged[2].log["duration_seconds"] == pytest.approx(50.0)
+
+    oldest_first = list(merge_logs([iter(database[::-1]), iter(fallback[::-1])], newest_first=False))
+    assert [m.log["app_name"] for m in oldest_first] == ["terminal", "browser", "terminal", "editor"]
+    assert [(m.start - BASE).seconds for m in oldest_first] == [0, 120, 200, 300]
+
+
+def test_merge_passes_overlapping_items_of_one_source_through():
+    rows = [_item("a", 0, 60, 0, row_id=2), _item("b", 0, 60, 0, row_id=1)]
+    assert list(merge_logs([iter(rows), iter([])])) == rows
+
+
+def test_merge_keeps_the_database_copy_when_the_fallback_copy_sorts_first():
+    # Replayed copy recorded a moment later, so it comes first newest-first
+    database = [_item("editor", 300, 360, 0, row_id=7), _item("browser", 100, 200, 0, row_id=3)]
+    fallback = [_item("editor", 301, 360, 1), _item("terminal", 210, 250, 1)]
+    merged = list(merge_logs([iter(database), iter(fallback)]))
+    assert [(m.log["app_name"], m.priority) for m in merged] == [("editor", 0), ("terminal", 1), ("browser", 0)]
+
+    # Oldest first, a same-start fallback entry (row_id 0) sorts before its twin
+    database = [_item("editor", 300, 360, 0, row_id=7)]
+    fallback = [_item("terminal", 200, 250, 1), _item("editor", 300, 360, 1)]
+    merged = list(merge_logs([iter(database), iter(fallback)], newest_first=False))
+    assert [(m.log["app_name"], m.priority) for m in merged] == [("terminal", 1), ("editor", 0)]
+
+
+def test_merge_stays_lazy_over_database_rows():
+    def endless():
+        start = 0
+        while True:
+            yield _item("editor", -start - 60, -start, 0, row_id=start + 1)
+            start += 60
+
+    merged = merge_logs([endless(), iter([])])
+    assert [next(merged).row_id for _ in range(3)] == [1, 61, 121]
+
+
+def test_tracker_pages_merge_database_and_fallback_without_gaps(merge_tracker):
+    db_manager.bulk_create_activity_logs([_record(f"db-{i}", i * 2) for i in range(30)])
+    merge_tracker._fallback_log.append(
+        [_record(f"db-{i}", i * 2) for i in range(0, 30, 5)]          # already replayed
+        + [_record(f"json-{i}", i * 2 + 1) for i in range(30)]       # only in the fallback log
+        + [_record("someone-else", 90, user="other")]
+    )
+
+    async def scenario():
+        pages, cursor = [], None
+        while True:
+            logs, cursor = await merge_tracker.get_activity_log_page(DAY, 7, cursor)
+            pages.append(logs)
+            if not cursor:
+                return pages, await merge_tracker.get_activity_logs(DAY, limit=1000)
+
+    pages, everything = asyncio.run(scenario())
+    paged = [log for page in pages for log in page]
+    assert [len(page) for page in pages] == [7] * 8 + [4]
+    assert [log["app_name"] for log in paged] == [log["app_name"] for log in everything]
+    assert len(paged) == 60 and len({log["app_name"] for log in paged}) == 60
+    assert [log["start_time"] for log in paged] == sorted((log["start_time"] for log in paged), reverse=True)
+    assert paged[0]["app_name"] == "json-29" and paged[-1]["app_name"] == "db-0"
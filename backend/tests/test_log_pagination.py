@@ -0,0 +1,79 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import activity_record
+from main import app
+from models.database import db_manager, decode_log_cursor, encode_log_cursor, read_engine
+from services.focus_guardian.tracker import tracker
+
+DAY = "2023-07-01"
+
+
+@pytest.fixture
+def seeded_day(purge_users):
+    purge_users(tracker.current_user_id)
+    start = datetime(2023, 7, 1, 8)
+    # Pairs share a start_time so the id tie-breaker is exercised
+    db_manager.bulk_create_activity_logs([
+        activity_record(
+            tracker.current_user_id, start + timedelta(seconds=(i // 2) * 60), 30,
+            f"app-{i}", title=f"title {i}", tag="📝 General"
+        )
+        for i in range(250)
+    ])
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    position = (datetime(2023, 7, 1, 8, 30, 0, 250000), 42)
+    assert decode_log_cursor(encode_log_cursor(*position)) == position
+    with pytest.raises(ValueError):
+        decode_log_cursor("not-a-cursor")
+
+
+def test_keyset_pages_and_ndjson_stream_cover_the_day_once(seeded_day):
+    with TestClient(app) as client:
+        pages, cursor = [], None
+        while True:
+            params = {"date_filter": DAY, "limit": 100, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/focus/logs", params=params)
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert [len(page) for page in pages] == [100, 100, 50]
+        paged = [log for page in pages for log in page]
+        assert len({log["app"] for log in paged}) == 250
+        assert [log["start_time"] for log in paged] == sorted((log["start_time"] for log in paged), reverse=True)
+
+        response = client.get("/api/focus/logs", params={"date_filter": DAY, "stream": "true"})
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        streamed = [json.loads(line) for line in response.text.splitlines()]
+        assert [log["app"] for log in streamed] == [log["app"] for log in paged]
+
+        timeline = client.get("/api/focus/activity/timeline", params={"date_filter": DAY, "limit": 200}).json()
+        rest = client.get("/api/focus/activity/timeline", params={
+            "date_filter": DAY, "cursor": timeline["next_cursor"], "stream": "true"
+        })
+        remaining = [json.loads(line)["app_name"] for line in rest.text.splitlines()]
+        assert [entry["app_name"] for entry in timeline["timeline"]] + remaining == [log["app"] for log in paged]
+
+        assert client.get("/api/focus/logs", params={"cursor": "bogus"}).status_code == 400
+        assert client.get("/api/focus/logs", params={"date_filter": DAY, "limit": 10000000}).status_code == 422
+        assert client.get("/api/focus/activity/timeline", params={"date_filter": DAY, "limit": 1001}).status_code == 422
+        assert client.get("/api/focus/logs", params={"cursor": "bogus", "stream": "true"}).status_code == 400
+
+
+def test_batched_reader_requeries_by_keyset_without_pinning_a_connection(seeded_day):
+    batches = db_manager.iter_activity_log_rows(tracker.current_user_id, DAY, batch_size=7)
+    first = next(batches)
+    assert len(first) == 7
+    assert read_engine.pool.checkedout() == 0  # nothing held while the consumer is busy
+
+    rows = first + [row for batch in batches for row in batch]
+    assert len({row.id for row in rows}) == len(rows) == 250  # ties split across batches are not lost
+    assert [(row.start_time, row.id) for row in rows] == sorted(((row.start_time, row.id) for row in rows), reverse=True)
@@ -0,0 +1,83 @@
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, text
+
+from models.database import ActivityLog, DatabaseManager, SessionLocal, db_manager, engine
+from models.migrations import SCHEMA_VERSION, get_schema_version, run_migrations
+
+LEGACY_SCHEMA = [
+    """CREATE TABLE activity_logs (
+        id INTEGER NOT NULL, user_id VARCHAR, app_name VARCHAR NOT NULL, window_title TEXT,
+        start_time DATETIME NOT NULL, end_time DATETIME NOT NULL, duration_seconds FLOAT NOT NULL,
+        tag VARCHAR, productivity_score FLOAT, created_at DATETIME, PRIMARY KEY (id))""",
+    "CREATE INDEX ix_activity_logs_id ON activity_logs (id)",
+    "CREATE INDEX ix_activity_logs_user_id ON activity_logs (user_id)",
+    """INSERT INTO activity_logs (user_id, app_name, start_time, end_time, duration_seconds)
+       VALUES ('default', 'code', '2024-03-05 23:59:59.500000', '2024-03-06 00:00:10.000000', 10.5)""",
+    """CREATE TABLE user_analytics (
+        id INTEGER NOT NULL, user_id VARCHAR, date VARCHAR NOT NULL, total_focus_time INTEGER,
+        productive_time INTEGER, distraction_time INTEGER, pomodoro_sessions INTEGER,
+        completed_pomodoros INTEGER, productivity_percentage FLOAT, top_productive_app VARCHAR,
+        top_distraction_app VARCHAR, created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id))""",
+    "INSERT INTO user_analytics (user_id, date) VALUES ('default', '2024-03-05'), ('default', '2024-03-05')",
+]
+
+
+def test_migrations_upgrade_a_legacy_database(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+
+    assert get_schema_version(legacy) == 0
+    assert run_migrations(legacy) == SCHEMA_VERSION
+    assert run_migrations(legacy) == SCHEMA_VERSION  # idempotent
+
+    with legacy.connect() as connection:
+        assert connection.execute(text("SELECT day_key, hour FROM activity_logs")).one() == ("2024-03-05", 23)
+        indexes = {row[1] for row in connection.execute(text("PRAGMA index_list(activity_logs)"))}
+    assert {"ix_activity_logs_user_start", "ux_activity_logs_source_key"} <= indexes
+    assert "ix_activity_logs_user_id" not in indexes
+
+    with legacy.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM user_analytics")).scalar() == 1
+        columns = {row[1] for row in connection.execute(text("PRAGMA table_info(user_analytics)"))}
+        indexes = {row[1] for row in connection.execute(text("PRAGMA index_list(user_analytics)"))}
+    assert {"app_seconds", "hourly_minutes", "session_count"} <= columns
+    assert "ux_user_analytics_user_date" in indexes
+
+    with legacy.connect() as connection:
+        buckets = connection.execute(text(
+            "SELECT hour, session_count FROM activity_hour_buckets ORDER BY hour"
+        )).all()
+    assert [tuple(bucket) for bucket in buckets] == [("2024-03-05 23", 1), ("2024-03-06 00", 0)]
+    legacy.dispose()
+
+
+def test_day_query_is_an_index_range_scan_without_sort():
+    stmt = DatabaseManager._activity_logs_statement([ActivityLog], "default", "2024-03-05", 100)
+    compiled = stmt.compile(engine, compile_kwargs={"literal_binds": True})
+
+    with engine.connect() as connection:
+        plan = " | ".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+    assert "USING INDEX ix_activity_logs_user_start" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_day_query_includes_the_last_second_and_sets_time_keys():
+    late = datetime(2024, 3, 5, 23, 59, 59, 500000)
+    db_manager.create_activity_log(
+        user_id="migration-test", app_name="code", window_title="", start_time=late,
+        end_time=late, duration_seconds=0.5
+    )
+
+    try:
+        rows = db_manager.get_activity_logs("migration-test", date(2024, 3, 5))
+        assert [(row.start_time, row.day_key, row.hour) for row in rows] == [(late, "2024-03-05", 23)]
+        assert db_manager.get_activity_logs("migration-test", "2024-03-06") == []
+    finally:
+        db = SessionLocal()
+        db.query(ActivityLog).filter(ActivityLog.user_id == "migration-test").delete()
+        db.commit()
+        db.close()
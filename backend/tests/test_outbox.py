@@ -0,0 +1,123 @@
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from conftest import activity_record
+from models.database import ActivityHourBucket, ActivityLog, SessionLocal, db_manager
+from services.focus_guardian.fallback_log import JsonlActivityLog, to_entry
+from services.focus_guardian.outbox import FallbackOutbox, entry_to_record
+
+USER = "outbox"
+DAY = date(2024, 5, 6)
+
+
+def _records(count, offset=0):
+    start = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=9)
+    return [
+        activity_record(USER, start + timedelta(minutes=i), 50, f"app-{i % 3}", title=f"title {i}", score=0.7)
+        for i in range(offset, offset + count)
+    ]
+
+
+def _stored():
+    db = SessionLocal()
+    try:
+        logs = db.query(ActivityLog).filter(ActivityLog.user_id == USER).count()
+        seconds = sum(b.total_seconds for b in db.query(ActivityHourBucket).filter(ActivityHourBucket.user_id == USER))
+        return logs, seconds
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def clean_rows(purge_users):
+    purge_users(USER)
+
+
+def test_outbox_replays_once_the_database_recovers_and_is_idempotent(tmp_path, clean_rows):
+    (tmp_path / f"{DAY}.json").write_text(json.dumps([{
+        "app": "legacy", "title": "old format", "start_time": f"{DAY} 08:00:00",
+        "end_time": f"{DAY} 08:01:00", "duration_seconds": 60, "tag": "📝 General", "productivity_score": 0.5
+    }]))
+    log = JsonlActivityLog(tmp_path)
+    log.append(_records(7))
+    database_up = False
+
+    async def sink(batch):
+        if not database_up:
+            raise RuntimeError("database is locked")
+        return db_manager.replay_activity_logs(batch)
+
+    async def scenario():
+        nonlocal database_up
+        outbox = FallbackOutbox(log, sink, default_user=USER, batch_size=3)
+        await outbox.start()
+        assert outbox.stats()["pending"] == 8
+        assert outbox.stats()["oldest_pending_age_seconds"] > 0
+
+        with pytest.raises(RuntimeError):
+            await outbox.drain()
+        assert outbox.stats()["pending"] == 8 and _stored()[0] == 0
+
+        database_up = True
+        assert await outbox.drain() == 8
+        assert outbox.stats()["pending"] == 0
+        assert await outbox.drain() == 0
+
+        # More sessions land later; a lost checkpoint only replays duplicates
+        log.append(_records(2, offset=7))
+        (tmp_path / "outbox.json").unlink()
+        restarted = FallbackOutbox(log, sink, default_user=USER, batch_size=3)
+        assert await restarted.drain() == 2
+        await outbox.stop()
+        return restarted.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["replayed_rows"], stats["duplicate_rows"], stats["pending"]) == (2, 8, 0)
+    assert _stored() == (10, pytest.approx(60 + 9 * 50.0))
+
+
+def test_replay_skips_keys_already_stored_and_duplicates_within_a_batch(clean_rows):
+    records = [entry_to_record(to_entry(record), USER) for record in _records(3)]
+    assert db_manager.replay_activity_logs(records + records[:1]) == 3
+    assert db_manager.replay_activity_logs(records) == 0
+    assert _stored()[0] == 3
+
+
+def test_expire_deletes_only_replayed_files_of_older_days(tmp_path, clean_rows):
+    (tmp_path / f"{DAY}.json").write_text(json.dumps([{
+        "app": "legacy", "title": "old format", "start_time": f"{DAY} 08:00:00",
+        "end_time": f"{DAY} 08:01:00", "duration_seconds": 60, "tag": "📝 General", "productivity_score": 0.5
+    }]))
+    log = JsonlActivityLog(tmp_path, index_stride=2)
+    log.append(_records(3))
+    later = [dict(record, start_time=record["start_time"] + timedelta(days=1), end_time=record["end_time"] + timedelta(days=1))
+             for record in _records(2, offset=3)]
+    log.append(later)
+
+    async def sink(batch):
+        return db_manager.replay_activity_logs(batch)
+
+    async def scenario():
+        outbox = FallbackOutbox(log, sink, default_user=USER)
+        await outbox.drain()
+        earlier = [dict(record, start_time=record["start_time"] - timedelta(days=1), end_time=record["end_time"] - timedelta(days=1))
+                   for record in _records(2, offset=5)]
+        log.append(earlier)  # still pending: must survive expiry
+
+        assert await outbox.expire(DAY + timedelta(days=1)) == 2
+        assert not list(tmp_path.glob(f"{DAY}.*"))  # data, index and legacy file
+        remaining = sorted(path.name for path in tmp_path.glob("*.json*") if path.suffix != ".idx")
+        assert remaining == [f"{DAY - timedelta(days=1)}.jsonl", f"{DAY + timedelta(days=1)}.jsonl", "outbox.json"]
+        assert set(json.loads((tmp_path / "outbox.json").read_text())) == {f"{DAY + timedelta(days=1)}.jsonl"}
+
+        assert await outbox.drain() == 2
+        assert await outbox.expire(DAY + timedelta(days=1)) == 1
+        return outbox.stats()
+
+    assert asyncio.run(scenario())["pending"] == 0
+    assert _stored()[0] == 8
+    log.append(_records(1, offset=9))  # the expired day starts a fresh segment
+    assert [entry["title"] for entry in log.read_day(DAY)] == ["title 9"]
@@ -0,0 +1,107 @@
+import contextlib
+from types import SimpleNamespace
+
+import psutil
+import pytest
+
+from services.focus_guardian import process_sampler
+from services.focus_guardian.process_sampler import ProcessSampler
+
+
+class FakeSystem:
+    """A process table behind a mocked psutil.Process."""
+
+    def __init__(self, monkeypatch):
+        self.table = {}
+        self.clock = [100.0]
+        system = self
+
+        class FakeProcess:
+            def __init__(self, pid):
+                if pid not in system.table:
+                    raise psutil.NoSuchProcess(pid)
+                self.pid = pid
+                self._create_time = system.table[pid]["create_time"]  # psutil caches it per handle
+
+            def oneshot(self):
+                return contextlib.nullcontext()
+
+            def create_time(self):
+                return self._create_time
+
+            def name(self):
+                return system.table[self.pid]["name"]
+
+            def cpu_times(self):
+                # Like psutil on Linux, a stale handle reads whatever now owns the PID
+                entry = system.table.get(self.pid)
+                if entry is None:
+                    raise psutil.NoSuchProcess(self.pid)
+                return SimpleNamespace(user=entry["cpu"], system=0.0)
+
+        monkeypatch.setattr(process_sampler.psutil, "Process", FakeProcess)
+        monkeypatch.setattr(process_sampler.psutil, "pids", lambda: list(self.table))
+        monkeypatch.setattr(process_sampler.time, "monotonic", lambda: self.clock[0])
+
+    def spawn(self, pid, name, create_time, cpu=0.0):
+        self.table[pid] = {"name": name, "create_time": create_time, "cpu": cpu}
+
+    def tick(self, seconds=1.0, **cpu_used):
+        self.clock[0] += seconds
+        for name, used in cpu_used.items():
+            next(entry for entry in self.table.values() if entry["name"] == name)["cpu"] += used
+
+
+@pytest.fixture
+def system(monkeypatch):
+    return FakeSystem(monkeypatch)
+
+
+def test_first_sample_only_primes_the_baseline(system):
+    system.spawn(10, "editor", create_time=1.0, cpu=50.0)
+    sampler = ProcessSampler()
+
+    assert sampler.sample() == []
+    assert sampler.tracked_count == 1
+
+
+def test_sample_ranks_processes_by_cpu_since_the_last_tick(system):
+    system.spawn(10, "editor", create_time=1.0, cpu=50.0)
+    system.spawn(11, "browser", create_time=2.0, cpu=900.0)
+    system.spawn(12, "shell", create_time=3.0)
+    sampler = ProcessSampler()
+    sampler.sample()
+
+    system.tick(2.0, editor=0.5, browser=1.0)
+    activity = sampler.sample()
+
+    assert [(proc.name, proc.cpu_percent) for proc in activity] == [("browser", 50.0), ("editor", 25.0)]
+
+
+def test_exited_processes_are_evicted(system):
+    system.spawn(10, "editor", create_time=1.0)
+    system.spawn(11, "build", create_time=2.0)
+    sampler = ProcessSampler()
+    sampler.sample()
+
+    del system.table[11]
+    system.tick(editor=0.2)
+
+    assert [proc.name for proc in sampler.sample()] == ["editor"]
+    assert sampler.tracked_count == 1
+
+
+def test_reused_pid_starts_a_fresh_baseline(system):
+    system.spawn(10, "compiler", create_time=1.0, cpu=30.0)
+    sampler = ProcessSampler()
+    sampler.sample()
+
+    # The compiler exits and an unrelated process gets its PID between ticks
+    system.spawn(10, "daemon", create_time=5.0, cpu=400.0)
+    system.tick()
+    assert sampler.sample() == []  # no delta against the old process's CPU time
+
+    system.tick(daemon=0.1)
+    activity = sampler.sample()
+    assert [(proc.pid, proc.name) for proc in activity] == [(10, "daemon")]
+    assert activity[0].cpu_percent == pytest.approx(10.0)
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from config.settings import settings
+from conftest import activity_record
+from models.database import ActivityLog, SessionLocal, db_manager, engine
+from models.storage import database_pages
+from services.focus_guardian.fallback_log import JsonlActivityLog
+from services.focus_guardian.rollups import rebuild_rollups
+from services.focus_guardian.tracker import tracker
+from services.retention import RetentionManager, scrub_title
+
+USER = "retention"
+TODAY = date.today()
+
+
+def _records(days_ago, count=4):
+    start = datetime.combine(TODAY - timedelta(days=days_ago), datetime.min.time()) + timedelta(hours=10)
+    return [
+        activity_record(USER, start + timedelta(minutes=i), 40, f"app-{i % 2}", title=f"secret document {days_ago}-{i}", score=0.8)
+        for i in range(count)
+    ]
+
+
+def _rows():
+    db = SessionLocal()
+    try:
+        return db.query(ActivityLog).filter(ActivityLog.user_id == USER).order_by(ActivityLog.start_time).all()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def seeded_history(purge_users):
+    purge_users(USER)
+    db_manager.bulk_create_activity_logs(_records(10) + _records(9) + _records(3) + _records(0))
+
+
+def test_retention_folds_old_days_prunes_raw_rows_and_scrubs_titles(seeded_history, monkeypatch):
+    manager = RetentionManager(raw_days=5, title_days=2, batch_rows=3)
+    report = asyncio.run(manager.run(TODAY))
+
+    assert (report["rollups_built"], report["rows_pruned"], report["titles_scrubbed"]) == (2, 8, 4)
+    rows = _rows()
+    assert len(rows) == 8
+    assert all(row.window_title.startswith("sha256:") for row in rows[:4])
+    assert [row.window_title for row in rows[4:]] == [f"secret document 0-{i}" for i in range(4)]
+    assert scrub_title("secret document 3-0", "hash") == rows[0].window_title
+
+    # The expired days still answer from the coarser tiers
+    old_day = TODAY - timedelta(days=10)
+    rollup = db_manager.get_daily_rollup(USER, old_day.isoformat())
+    assert rollup is not None and (rollup.total_focus_time, rollup.session_count) == (160, 4)
+    usage = db_manager.get_bucket_app_usage(USER, old_day)
+    assert sorted((row.app_name, row.total_time, row.session_count) for row in usage) == [("app-0", 80.0, 2), ("app-1", 80.0, 2)]
+    assert usage[0].productivity_avg == pytest.approx(0.8)
+
+    # A rebuild leaves rollups of pruned days alone
+    monkeypatch.setattr(settings, "retention_raw_days", 5)
+    rebuild_rollups(USER)
+    assert db_manager.get_daily_rollup(USER, old_day.isoformat()) is not None
+
+    again = asyncio.run(manager.run(TODAY))
+    assert (again["rollups_built"], again["rows_pruned"], again["titles_scrubbed"]) == (0, 0, 0)
+
+
+def test_pruned_days_answer_from_hour_buckets_and_ignore_fallback_copies(seeded_history, monkeypatch, tmp_path):
+    asyncio.run(RetentionManager(raw_days=5).run(TODAY))
+    monkeypatch.setattr(settings, "retention_raw_days", 5)
+    monkeypatch.setattr(tracker, "current_user_id", USER)
+    fallback = JsonlActivityLog(tmp_path, fsync=False)
+    late = [dict(record, app_name="replayed-late") for record in _records(10, count=1) + _records(3, count=1)]
+    late[1]["start_time"] += timedelta(hours=2)
+    late[1]["end_time"] += timedelta(hours=2)
+    fallback.append(late)
+    monkeypatch.setattr(tracker, "_fallback_log", fallback)
+
+    old_day = TODAY - timedelta(days=10)
+    usage = asyncio.run(tracker.get_app_usage(old_day))
+    assert sorted((app["app_name"], app["total_time"]) for app in usage["apps"]) == [("app-0", 80.0), ("app-1", 80.0)]
+    assert list(tracker.iter_activity_logs(old_day)) == []
+
+    # A kept day still merges its fallback entries
+    apps = [item.log["app_name"] for item in tracker.iter_activity_logs(old_day, TODAY - timedelta(days=3))]
+    assert apps == ["replayed-late", "app-1", "app-0", "app-1", "app-0"]
+
+
+def test_incremental_vacuum_hands_free_pages_back_in_steps():
+    assert database_pages()["auto_vacuum"] == "incremental"
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE IF NOT EXISTS vacuum_probe (value TEXT)"))
+        connection.execute(text("INSERT INTO vacuum_probe VALUES (:v)"), [{"v": "x" * 4000}] * 300)
+    grown = database_pages()["page_count"]
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE vacuum_probe"))
+    assert database_pages()["freelist_count"] >= 300
+
+    manager = RetentionManager(vacuum_pages=64, vacuum_pause=0)
+    released = asyncio.run(manager.vacuum())
+
+    pages = database_pages()
+    assert released >= 300 and pages["freelist_count"] == 0
+    assert pages["page_count"] == grown - released
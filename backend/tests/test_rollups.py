@@ -0,0 +1,163 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from conftest import activity_record
+from models.database import db_manager
+from services.event_bus import Event
+from services.focus_guardian.idle import IDLE_TAG
+from services.focus_guardian.rollups import DailyRollup, RollupAggregator, build_daily_rollup, rebuild_rollups
+
+USER = "rollups"
+DAY = date(2024, 4, 2)
+
+SESSIONS = [
+    # (hour, minute, app, tag, duration, score)
+    (9, 0, "code", "💻 Coding", 2400.0, 0.9),
+    (9, 40, "firefox", "❌ Distraction", 300.0, 0.1),
+    (10, 0, "idle", IDLE_TAG, 900.0, 0.0),
+    (10, 15, "code", "💻 Coding", 600.0, 0.7),
+    (11, 0, "slack", "📝 General", 120.0, 0.5),
+]
+
+
+def _record(hour, minute, app, tag, duration, score):
+    start = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=hour, minutes=minute)
+    return activity_record(USER, start, duration, app, tag=tag, score=score)
+
+
+def _event(event_type, data):
+    return Event(type=event_type, data=data, timestamp=datetime.utcnow(), source="test")
+
+
+@pytest.fixture
+def clean_rows(purge_users):
+    purge_users(USER)
+
+
+def test_daily_rollup_matches_the_analytics_payload():
+    rollup = DailyRollup()
+    for session in SESSIONS:
+        record = _record(*session)
+        rollup.add_session(record["app_name"], record["tag"], record["duration_seconds"],
+                           record["productivity_score"], record["start_time"])
+
+    analytics = rollup.to_analytics()
+    assert analytics["total_focused_time"] == 3420  # idle excluded
+    assert analytics["productivity_percentage"] == pytest.approx(3000 / 3420 * 100)
+    assert [app["app"] for app in analytics["top_apps"]] == ["code", "firefox", "slack"]
+    assert analytics["hourly_breakdown"][9] == 45 and analytics["hourly_breakdown"][10] == 10
+    assert analytics["distraction_count"] == 1
+    assert analytics["flow_sessions"] == 1
+
+    row = rollup.to_row()
+    assert row["top_productive_app"] == "code" and row["top_distraction_app"] == "firefox"
+    assert row["distraction_time"] == 300
+
+
+def test_events_update_rollups_incrementally_and_rebuild_agrees(clean_rows):
+    aggregator = RollupAggregator()
+    records = [_record(*session) for session in SESSIONS]
+    ended_at = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=12)
+
+    async def scenario():
+        # Persist each session before its event, as the write-behind queue would
+        for record in records:
+            db_manager.bulk_create_activity_logs([record])
+            await aggregator.on_activity_logged(_event("activity_logged", {
+                **record,
+                "start_time": record["start_time"].isoformat(),
+                "end_time": record["end_time"].isoformat()
+            }))
+
+        session = db_manager.create_pomodoro_session(user_id=USER, phase="Focus", planned_duration=1500)
+        db_manager.update_pomodoro_session(session.id, completed=True, end_time=ended_at)
+        await aggregator.on_pomodoro_completed(_event("pomodoro_completed", {"completed_session": {
+            "user_id": USER, "phase": "Focus", "completed": True, "skipped": False,
+            "ended_at": ended_at.isoformat()
+        }}))
+        analytics = await aggregator.get_analytics(USER, DAY)
+        unflushed = db_manager.get_daily_rollup(USER, DAY.isoformat())
+        return analytics, unflushed, await aggregator.flush()
+
+    incremental, unflushed, flushed = asyncio.run(scenario())
+    assert incremental["total_focused_time"] == 3420
+    assert aggregator.stats()["sessions_applied"] == 4
+    assert aggregator.stats()["builds_from_raw_logs"] == 1  # only the first event
+    assert unflushed is None and flushed == 1  # no write per event, one per flush
+
+    stored = db_manager.get_daily_rollup(USER, DAY.isoformat())
+    assert (stored.session_count, stored.pomodoro_sessions, stored.completed_pomodoros) == (4, 1, 1)
+
+    assert rebuild_rollups(USER) == 1
+    rebuilt = db_manager.get_daily_rollup(USER, DAY.isoformat())
+    assert DailyRollup.from_row(rebuilt).to_analytics() == incremental
+    assert (rebuilt.pomodoro_sessions, rebuilt.completed_pomodoros) == (1, 1)
+
+
+def test_missing_past_rollup_is_built_once_from_raw_logs(clean_rows):
+    db_manager.bulk_create_activity_logs([_record(*session) for session in SESSIONS])
+    aggregator = RollupAggregator()
+
+    async def scenario():
+        first = await aggregator.get_analytics(USER, DAY)
+        second = await aggregator.get_analytics(USER, DAY)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert first["total_focused_time"] == 3420
+    assert aggregator.stats()["builds_from_raw_logs"] == 1
+    assert db_manager.get_daily_rollup(USER, DAY.isoformat()) is not None
+
+
+def test_sql_aggregates_match_per_session_fold_without_row_limit(clean_rows):
+    records = [
+        {**_record(9, 0, f"app-{i % 7}", ("❌ Distraction", "💻 Coding", IDLE_TAG)[i % 3], 30.0 + i % 2000, (i % 10) / 10),
+         "start_time": datetime.combine(DAY, datetime.min.time()) + timedelta(seconds=i * 30)}
+        for i in range(2500)
+    ]
+    db_manager.bulk_create_activity_logs(records)
+
+    expected = DailyRollup()
+    for record in records:
+        expected.add_session(record["app_name"], record["tag"], record["duration_seconds"],
+                             record["productivity_score"], record["start_time"])
+
+    built = build_daily_rollup(USER, DAY)
+    assert built.to_analytics() == pytest.approx(expected.to_analytics())
+    assert built.session_count == expected.session_count > 1000
+
+    usage = db_manager.get_app_usage(USER, DAY, IDLE_TAG)
+    assert sum(row.session_count for row in usage) == expected.session_count
+    assert [row.app_name for row in usage] == sorted(expected.app_seconds, key=expected.app_seconds.get, reverse=True)
+
+
+def test_activity_batches_carry_dirty_rollups_in_the_same_transaction(clean_rows):
+    aggregator = RollupAggregator()
+    record = _record(*SESSIONS[0])
+
+    async def scenario():
+        await aggregator.on_activity_logged(_event("activity_logged", {
+            **record,
+            "start_time": record["start_time"].isoformat(),
+            "end_time": record["end_time"].isoformat()
+        }))
+        dirty = aggregator.take_dirty()
+        rows = {key: rollup.to_row() for key, rollup in dirty.items()}
+
+        # A failing batch stores neither the sessions nor the rollup
+        with pytest.raises(Exception):
+            db_manager.bulk_create_activity_logs([{**record, "start_time": None}], rows)
+        assert db_manager.get_daily_rollup(USER, DAY.isoformat()) is None
+        aggregator.restore_dirty(dirty)
+
+        dirty = aggregator.take_dirty()
+        db_manager.bulk_create_activity_logs([record], {key: rollup.to_row() for key, rollup in dirty.items()})
+        return await aggregator.flush()
+
+    assert asyncio.run(scenario()) == 0  # nothing left for the timer
+    stored = db_manager.get_daily_rollup(USER, DAY.isoformat())
+    assert (stored.session_count, stored.total_focus_time) == (1, 2400)
+    assert len(db_manager.get_activity_log_rows(USER, DAY.isoformat())) == 1
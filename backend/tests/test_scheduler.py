@@ -0,0 +1,11 @@
+from services.focus_guardian.scheduler import AdaptiveInterval
+
+
+def test_interval_backs_off_while_stable_and_snaps_back_on_switch():
+    interval = AdaptiveInterval(min_interval=0.5, max_interval=4.0, backoff=2.0)
+
+    delays = [interval.next_delay(changed) for changed in (True, False, False, False, False, True)]
+
+    assert delays == [0.5, 1.0, 2.0, 4.0, 4.0, 0.5]
+    stats = interval.stats()
+    assert (stats["samples"], stats["changes"], stats["effective_rate_hz"]) == (6, 2, 2.0)
@@ -0,0 +1,68 @@
+import asyncio
+
+from services.focus_guardian.sessions import SessionCoalescer, canonicalize
+from services.focus_guardian.tracker import ActivityTracker
+
+
+def test_canonical_identity_ignores_volatile_decoration():
+    base = canonicalize("code", "main.py - backend | code")
+
+    assert canonicalize("code", "main.py - backend | code | 14:05").key == base.key
+    assert canonicalize("Code", "main.py - backend | code - 9:41:07 PM").key == base.key
+    assert canonicalize("slack", "(3) general").key == canonicalize("slack", "(12) general").key
+    assert canonicalize("python3", "⚙️ python3 (12.5% CPU)").key == canonicalize("python3", "⚙️ python3 (0.4% CPU)").key
+    assert canonicalize("code", "tracker.py - backend | code").key != base.key
+
+    # Display title keeps counters but drops the trailing clock
+    assert canonicalize("code", "Editor | code | 14:05").title == "Editor | code"
+    assert canonicalize("slack", "(3) general").title == "(3) general"
+
+
+def test_coalescer_merges_within_gap_and_splits_after_it():
+    coalescer = SessionCoalescer(max_gap=60)
+    editor = canonicalize("code", "main.py | 10:00")
+
+    assert coalescer.observe(editor, 0) == 0
+    assert coalescer.observe(canonicalize("code", "main.py | 10:01"), 30) is None
+    assert coalescer.observe(editor, 80) is None
+
+    # Laptop slept for an hour: the session ends at the last sample seen
+    assert coalescer.observe(editor, 3680) == 80
+
+    # Real switch ends the session at the switch time
+    assert coalescer.observe(canonicalize("slack", "general"), 3700) == 3700
+    assert coalescer.stats()["session_boundaries"] == 3
+
+
+def test_clock_ticks_do_not_create_sessions(monkeypatch):
+    tracker = ActivityTracker()
+    ended, changed = [], []
+
+    async def fake_end(end_time=None):
+        if tracker.current_app:
+            ended.append((tracker.current_start_time, end_time))
+
+    async def fake_changed(app, title):
+        changed.append((app, title))
+
+    async def noop():
+        pass
+
+    monkeypatch.setattr(tracker, "_end_current_session", fake_end)
+    monkeypatch.setattr(tracker, "_emit_window_changed_event", fake_changed)
+    monkeypatch.setattr(tracker, "_send_websocket_update", noop)
+
+    samples = [("code", f"main.py | code | 10:{minute:02d}") for minute in range(10)]
+    samples.append(("slack", "general"))
+
+    async def replay():
+        for second, sample in enumerate(samples):
+            async def probe(sample=sample):
+                return sample
+            monkeypatch.setattr(tracker, "_get_foreground_info", probe)
+            await tracker._check_foreground_window(changed_at=1000.0 + second * 60)
+
+    asyncio.run(replay())
+
+    assert changed == [("code", "main.py | code"), ("slack", "general")]
+    assert ended == [(1000.0, 1600.0)]
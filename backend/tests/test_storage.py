@@ -0,0 +1,35 @@
+import asyncio
+
+from sqlalchemy import text
+
+from models.database import engine
+from models.storage import WalCheckpointer, wal_size_bytes
+
+
+def test_connections_use_the_configured_storage_profile():
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_checkpointer_truncates_an_oversized_wal():
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE IF NOT EXISTS wal_probe (value TEXT)"))
+        connection.execute(text("INSERT INTO wal_probe VALUES (:v)"), [{"v": "x" * 1000}] * 200)
+    assert wal_size_bytes() > 0
+
+    async def scenario():
+        checkpointer = WalCheckpointer(interval=60, truncate_bytes=1)
+        await checkpointer.start()
+        await checkpointer.checkpoint()
+        stats = checkpointer.stats()
+        await checkpointer.stop()
+        return stats
+
+    stats = asyncio.run(scenario())
+
+    assert stats["journal_mode"] == "wal"
+    assert stats["last_checkpoint"]["mode"] == "TRUNCATE"
+    assert stats["wal_size_bytes"] == 0
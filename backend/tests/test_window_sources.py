@@ -0,0 +1,281 @@
+import asyncio
+import os
+import subprocess
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+from Xlib import X, error
+
+from services.focus_guardian import window_sources
+from services.focus_guardian.tracker import ActivityTracker
+from services.focus_guardian.window_sources import (
+    WindowInfo, WindowSourceError, X11ChangeWatcher, X11WindowSource, XdotoolWindowSource, create_window_source
+)
+
+ROOT = 1
+
+
+def _x_error():
+    return error.BadWindow(SimpleNamespace(get_resource_class=lambda name: None), bytes(32))
+
+
+class FakeWindow:
+    def __init__(self, display, window_id):
+        self.display = display
+        self.id = window_id
+
+    def get_full_property(self, atom, property_type):
+        value = self.display.properties.get(self.id, {}).get(atom)
+        if isinstance(value, Exception):
+            raise value
+        return SimpleNamespace(value=value) if value is not None else None
+
+    def get_wm_name(self):
+        return self.display.wm_names.get(self.id)
+
+    def change_attributes(self, event_mask):
+        self.display.event_masks[self.id] = event_mask
+
+
+class FakeDisplay:
+    """Just enough of Xlib.display.Display for the window sources."""
+
+    def __init__(self, name=None):
+        self.atoms = {}
+        self.properties = {ROOT: {}}
+        self.wm_names = {}
+        self.event_masks = {}
+        self.events = deque()
+        self.closed = False
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+
+    def atom(self, name):
+        return self.intern_atom(name)
+
+    def intern_atom(self, name):
+        return self.atoms.setdefault(name, len(self.atoms) + 100)
+
+    def set_property(self, window_id, name, value):
+        self.properties.setdefault(window_id, {})[self.atom(name)] = value
+
+    def screen(self):
+        return SimpleNamespace(root=FakeWindow(self, ROOT))
+
+    def create_resource_object(self, kind, window_id):
+        return FakeWindow(self, window_id)
+
+    def queue_property_notify(self, name):
+        self.events.append(SimpleNamespace(type=X.PropertyNotify, atom=self.atom(name)))
+        os.write(self._write_fd, b"e")
+
+    def pending_events(self):
+        try:
+            os.read(self._read_fd, 1024)
+        except BlockingIOError:
+            pass
+        return len(self.events)
+
+    def next_event(self):
+        return self.events.popleft()
+
+    def fileno(self):
+        return self._read_fd
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+        for fd in (self._read_fd, self._write_fd):
+            os.close(fd)
+
+
+@pytest.fixture
+def x_server(monkeypatch):
+    """Route Display() to fakes; `displays` lists every connection opened."""
+    displays = []
+    state = SimpleNamespace(displays=displays, setup=lambda display: None, fail=None)
+
+    def connect(name=None):
+        if state.fail is not None:
+            raise state.fail
+        display = FakeDisplay(name)
+        state.setup(display)
+        displays.append(display)
+        return display
+
+    monkeypatch.setattr(window_sources, "xdisplay", SimpleNamespace(Display=connect))
+    monkeypatch.setenv("DISPLAY", ":99")
+    yield state
+    for display in displays:
+        if not display.closed:
+            display.close()
+
+
+def _focused_editor(display, name=b"Caf\xc3\xa9 \xe2\x80\x94 notes.md"):
+    display.set_property(ROOT, "_NET_ACTIVE_WINDOW", [42])
+    if name is not None:
+        display.set_property(42, "_NET_WM_NAME", name)
+    display.set_property(42, "_NET_WM_PID", [1234])
+
+
+def test_x11_source_reads_the_utf8_title_and_pid(x_server):
+    x_server.setup = _focused_editor
+    source = X11WindowSource()
+
+    assert source.is_available()
+    assert source.get_active_window() == WindowInfo(window_id=42, title="Café — notes.md", pid=1234)
+    assert len(x_server.displays) == 1  # one persistent connection
+    source.close()
+    assert x_server.displays[0].closed
+
+
+def test_x11_source_falls_back_to_legacy_wm_name(x_server):
+    def setup(display):
+        _focused_editor(display, name=None)
+        display.wm_names[42] = b"Caf\xe9"
+    x_server.setup = setup
+
+    assert X11WindowSource().get_active_window() == WindowInfo(window_id=42, title="Café", pid=1234)
+
+
+def test_x11_source_returns_none_without_focus_or_when_the_window_vanishes(x_server):
+    source = X11WindowSource()
+    assert source.get_active_window() is None  # nothing focused
+
+    display = x_server.displays[0]
+    _focused_editor(display)
+    display.set_property(42, "_NET_WM_NAME", _x_error())
+    assert source.get_active_window() is None
+    assert not display.closed  # an XError keeps the connection
+
+
+def test_x11_source_reconnects_after_the_connection_closes(x_server):
+    x_server.setup = _focused_editor
+    source = X11WindowSource()
+    source.get_active_window()
+    x_server.displays[0].set_property(42, "_NET_WM_PID", error.ConnectionClosedError("server"))
+
+    with pytest.raises(WindowSourceError):
+        source.get_active_window()
+    assert x_server.displays[0].closed
+
+    assert source.get_active_window() == WindowInfo(window_id=42, title="Café — notes.md", pid=1234)
+    assert len(x_server.displays) == 2
+
+
+def test_auto_backend_falls_back_to_xdotool(x_server, monkeypatch):
+    x_server.fail = error.DisplayError(":99")
+    monkeypatch.setattr(window_sources.shutil, "which", lambda name: f"/usr/bin/{name}")
+    assert isinstance(create_window_source("auto"), XdotoolWindowSource)
+
+    monkeypatch.setattr(window_sources.shutil, "which", lambda name: None)
+    assert create_window_source("auto") is None
+
+    x_server.fail = None
+    x11 = create_window_source("auto")
+    assert isinstance(x11, X11WindowSource)
+    x11.close()
+
+
+def test_xdotool_source_treats_a_hung_call_as_no_window(monkeypatch):
+    def hung(args, **kwargs):
+        raise subprocess.TimeoutExpired(args, kwargs["timeout"])
+
+    monkeypatch.setattr(window_sources.subprocess, "run", hung)
+    assert XdotoolWindowSource(timeout=0.1).get_active_window() is None
+
+
+def test_change_watcher_reports_title_changes_and_follows_the_active_window(x_server):
+    x_server.setup = _focused_editor
+    watcher = X11ChangeWatcher()
+    assert watcher.is_available()
+    display = x_server.displays[0]
+    assert display.event_masks == {ROOT: X.PropertyChangeMask, 42: X.PropertyChangeMask}
+
+    display.queue_property_notify("_NET_WM_NAME")
+    before = time.time()
+    assert watcher.wait_for_change(5) >= before
+
+    # Focus moves: the title subscription moves with it
+    display.set_property(ROOT, "_NET_ACTIVE_WINDOW", [43])
+    display.queue_property_notify("_NET_ACTIVE_WINDOW")
+    assert watcher.wait_for_change(5) is not None
+    assert display.event_masks[42] == X.NoEventMask
+    assert display.event_masks[43] == X.PropertyChangeMask
+    watcher.close()
+
+
+def test_change_watcher_times_out_ignores_other_properties_and_wakes(x_server):
+    watcher = X11ChangeWatcher()
+    assert watcher.wait_for_change(0.05) is None
+    display = x_server.displays[0]
+
+    display.queue_property_notify("_NET_WM_PID")
+    assert watcher.wait_for_change(0.05) is None
+
+    watcher.wake()
+    started = time.monotonic()
+    assert watcher.wait_for_change(5) is None
+    assert time.monotonic() - started < 1
+    watcher.close()
+
+
+def test_change_watcher_reconnects_after_the_connection_drops_and_closes_its_pipe(x_server):
+    watcher = X11ChangeWatcher()
+    watcher.wait_for_change(0)
+    first = x_server.displays[0]
+    first.pending_events = lambda: (_ for _ in ()).throw(error.ConnectionClosedError("server"))
+
+    with pytest.raises(WindowSourceError):
+        watcher.wait_for_change(0.05)
+    assert first.closed
+    assert watcher.wait_for_change(0.05) is None  # new connection, same wake pipe
+    assert len(x_server.displays) == 2
+
+    watcher.close()
+    watcher.close()
+    watcher.wake()
+    with pytest.raises(WindowSourceError):
+        watcher.wait_for_change(0)
+
+
+def test_event_driven_loop_samples_on_change_and_falls_back_to_polling(monkeypatch):
+    tracker = ActivityTracker()
+    sampled, polled = [], []
+
+    class FakeWatcher:
+        def __init__(self, results):
+            self.results = list(results)
+            self.closed = False
+
+        def wait_for_change(self, timeout):
+            result = self.results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        def close(self):
+            self.closed = True
+
+    async def fake_sample(changed_at=None):
+        sampled.append(changed_at)
+        return 1.0
+
+    async def fake_polling():
+        polled.append(True)
+
+    monkeypatch.setattr(tracker, "_sample", fake_sample)
+    monkeypatch.setattr(tracker, "_monitoring_loop", fake_polling)
+    tracker.is_monitoring = True
+    watcher = FakeWatcher([100.0, None, WindowSourceError("gone")])
+    tracker._change_watcher = watcher
+
+    asyncio.run(tracker._event_driven_loop())
+
+    assert sampled == [None, 100.0, None]
+    assert watcher.closed and tracker._change_watcher is None
+    assert polled == [True]
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from conftest import activity_record
+from models.database import ActivityLog, SessionLocal, db_manager
+from services.focus_guardian.write_behind import WriteBehindQueue
+
+
+def _record(i):
+    return activity_record("bench", datetime(2024, 1, 1, 9) + timedelta(minutes=i), 30, app=f"app-{i}", title="title", tag="📝 General")
+
+
+def test_queue_flushes_on_size_and_time_and_drains_on_stop():
+    batches = []
+
+    async def sink(batch):
+        batches.append(batch)
+
+    async def scenario():
+        queue = WriteBehindQueue(sink, flush_size=3, flush_interval=0.2)
+        await queue.start()
+
+        for i in range(3):
+            queue.submit(_record(i))
+        await asyncio.sleep(0.05)
+        assert [len(batch) for batch in batches] == [3]  # size threshold
+
+        queue.submit(_record(3))
+        await asyncio.sleep(0.3)
+        assert [len(batch) for batch in batches] == [3, 1]  # time threshold
+
+        queue.submit(_record(4))
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert [len(batch) for batch in batches] == [3, 1, 1]  # drained on shutdown
+    assert (stats["queue_depth"], stats["flushes"], stats["flushed_rows"]) == (0, 3, 5)
+
+
+def test_failed_flush_goes_to_fallback():
+    fallback = []
+
+    async def broken_sink(batch):
+        raise RuntimeError("database is locked")
+
+    async def save(batch):
+        fallback.extend(batch)
+
+    async def scenario():
+        queue = WriteBehindQueue(broken_sink, flush_size=10, flush_interval=5, fallback=save)
+        queue.submit(_record(0))
+        await queue.flush()
+        return queue.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert len(fallback) == 1
+    assert (stats["failed_flushes"], stats["fallback_rows"]) == (1, 1)
+
+
+def test_bulk_insert_writes_all_rows_in_one_call(purge_users):
+    purge_users("bench")
+    records = [_record(i) for i in range(250)]  # spans several VALUES statements
+
+    assert db_manager.bulk_create_activity_logs(records) == 250
+
+    db = SessionLocal()
+    try:
+        rows = db.query(ActivityLog).filter(ActivityLog.user_id == "bench").all()
+        assert len(rows) == 250
+        assert all(row.created_at is not None for row in rows)
+    finally:
+        db.close()